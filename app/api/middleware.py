@@ -0,0 +1,120 @@
+import time
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.logging_config import get_logger
+from app.core.metrics import db_statements_per_request, db_time_per_request, http_request_duration
+from app.db.instrumentation import RequestDbStats, request_db_stats
+
+logger = get_logger(__name__)
+
+# label for requests no route matched, so unknown paths do not each get a series
+UNMATCHED = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the route that handled the request, prefix included.
+
+    Routers included with a prefix keep their own paths ("/robot/commands"),
+    so the prefix is whatever precedes the first suffix the route's regex
+    matches; without nesting that is the empty string.
+    """
+    route: Any = scope.get("route")
+    if route is None or not hasattr(route, "path_regex"):
+        return UNMATCHED
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if route.path_regex.match(path[start:]):
+            return path[:start] + route.path
+        start = path.find("/", start + 1)
+    return route.path
+
+
+def server_timing(stats: RequestDbStats, elapsed: float) -> str:
+    """Server-Timing value splitting the time so far into SQL and everything else."""
+    value = f'db;dur={stats.seconds * 1e3:.2f};desc="{stats.statements} statements", '
+    if stats.actor_statements:
+        value += (
+            f"actor;dur={stats.actor_seconds * 1e3:.2f};"
+            f'desc="{stats.actor_statements} statements", '
+        )
+    return value + f"app;dur={(elapsed - stats.seconds - stats.actor_seconds) * 1e3:.2f}"
+
+
+def log_slow_request(scope: Scope, status: int, elapsed: float, stats: RequestDbStats) -> None:
+    lines = [
+        f"Slow request: {scope['method']} {scope['path']} {status} in {elapsed * 1e3:.1f} ms, "
+        f"{stats.statements} statements in {stats.seconds * 1e3:.1f} ms"
+    ]
+    if stats.actor_statements:
+        lines[0] += (
+            f", waited on a robot actor group of {stats.actor_statements} statements "
+            f"in {stats.actor_seconds * 1e3:.1f} ms"
+        )
+    for statement, seconds in stats.queries:
+        lines.append(f"  {seconds * 1e3:8.2f} ms  {' '.join(statement.split())}")
+    if stats.statements > len(stats.queries):
+        lines.append(f"  ... {stats.statements - len(stats.queries)} more statements")
+    logger.warning("\n".join(lines))
+
+
+class RequestStatsMiddleware:
+    """
+    Per-request latency and SQL statements: metrics labelled by route
+    template, a Server-Timing header and a warning, with the request's SQL,
+    for requests over SLOW_REQUEST_SECONDS or SLOW_REQUEST_STATEMENTS.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so the response is not wrapped
+    and streamed bodies are timed to their last chunk. Server-Timing is sent
+    with the response headers, so for a streamed body it covers the time to
+    the first chunk only. WebSockets pass through.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        start = time.perf_counter()
+        status = 500
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+
+        async def send_and_record(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing", server_timing(stats, time.perf_counter() - start)
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            request_db_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            if settings.metrics_enabled:
+                template = route_template(scope)
+                http_request_duration.observe(elapsed, scope["method"], template, str(status))
+                # the request's own SQL only; a robot actor group it waited on is not
+                # observed once per caller
+                db_statements_per_request.observe(stats.statements, template)
+                db_time_per_request.observe(stats.seconds, template)
+            slow_seconds = settings.slow_request_seconds
+            slow_statements = settings.slow_request_statements
+            if (slow_seconds and elapsed > slow_seconds) or (
+                slow_statements and stats.statements > slow_statements
+            ):
+                log_slow_request(scope, status, elapsed, stats)
@@ -0,0 +1,146 @@
+"""
+Response and request bodies for the high-frequency routes.
+
+Those routes build plain dicts (app/schemas/payloads.py) from values the
+service already validated and encode them here with orjson, skipping the
+response model validation and serialization FastAPI would do. Clients that
+send `Accept: application/msgpack` get MessagePack instead, and may send
+MessagePack request bodies with `Content-Type: application/msgpack`. The
+response models still document the routes in OpenAPI.
+
+MessagePack needs the optional msgpack package (`poetry install -E msgpack`);
+without it those clients get JSON, and MessagePack bodies a 415.
+"""
+
+from collections.abc import Callable, Coroutine
+from datetime import datetime
+from typing import Any, Optional
+
+import orjson
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+MSGPACK_TYPES = frozenset(
+    {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+)
+MSGPACK = "application/msgpack"
+
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # datetimes become RFC 3339 strings, as pydantic writes them
+        return orjson.dumps(content)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_msgpack_default)
+
+
+def _media_type(value: Optional[str]) -> str:
+    return (value or "").split(";", 1)[0].strip().lower()
+
+
+def wants_msgpack(headers: Headers) -> bool:
+    """True when Accept prefers MessagePack to JSON and msgpack is installed."""
+    accept = headers.get("accept")
+    if msgpack is None or not accept or "msgpack" not in accept:
+        return False
+
+    msgpack_q = json_q = 0.0
+    for entry in accept.split(","):
+        media_type, *params = entry.split(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, quality)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def representation_etag(etag: str, headers: Headers) -> str:
+    """A strong ETag per representation: the MessagePack one gets its own tag."""
+    return f'{etag[:-1]}-msgpack"' if wants_msgpack(headers) else etag
+
+
+def negotiated_response(
+    request: Request,
+    content: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """content (plain dicts, lists and scalars) as MessagePack or JSON, per the Accept header."""
+    response_class = MsgPackResponse if wants_msgpack(request.headers) else ORJSONResponse
+    response = response_class(content, status_code=status_code, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def decode_body(body: bytes, content_type: Optional[str]) -> Any:
+    """A MessagePack body with msgpack, anything else as JSON with orjson."""
+    if _media_type(content_type) in MSGPACK_TYPES:
+        return msgpack.unpackb(body)
+    return orjson.loads(body)
+
+
+class FastRequest(Request):
+    """Parses JSON bodies with orjson and MessagePack bodies with msgpack."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            self._json = decode_body(body, self.scope.get("original_content_type"))
+        return self._json
+
+
+def _as_json_content_type(scope: dict[str, Any], content_type: str) -> dict[str, Any]:
+    # FastAPI only hands bodies with a JSON content type to request.json(), so a
+    # MessagePack body is presented as JSON and FastRequest decodes it by the original type
+    headers = [(key, value) for key, value in scope["headers"] if key != b"content-type"]
+    headers.append((b"content-type", b"application/json"))
+    return {**scope, "headers": headers, "original_content_type": content_type}
+
+
+class FastRoute(APIRoute):
+    """APIRoute whose request bodies may be JSON (read with orjson) or MessagePack."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            scope = request.scope
+            content_type = request.headers.get("content-type")
+            if _media_type(content_type) in MSGPACK_TYPES:
+                if msgpack is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="MessagePack bodies need the msgpack package on the server",
+                    )
+                scope = _as_json_content_type(scope, content_type)
+            return await handler(FastRequest(scope, request.receive))
+
+        return route_handler
@@ -0,0 +1,127 @@
+import json
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.api.serialization import MSGPACK_TYPES, decode_body
+from app.core.config import get_settings
+from app.schemas.robot_schema import CommandRequest
+from app.services.command_body import (
+    CommandBodyError,
+    CommandBodyTooLarge,
+    UnsupportedEncoding,
+    read_body,
+    read_commands,
+)
+
+_COMMAND_SCHEMA = CommandRequest.model_json_schema()
+
+# request body of the /commands routes, which read it themselves (see command_string)
+COMMAND_BODY = {
+    "openapi_extra": {
+        "requestBody": {
+            "required": True,
+            "description": "a JSON or MessagePack CommandRequest, or the bare command string as "
+            "text/plain; Content-Encoding gzip or zstd",
+            "content": {
+                "application/json": {"schema": _COMMAND_SCHEMA},
+                "application/msgpack": {"schema": _COMMAND_SCHEMA},
+                "text/plain": {
+                    "schema": {"type": "string", "pattern": "^[FBLR]+$"},
+                    "example": "FLFFFRFLB",
+                },
+            },
+        }
+    }
+}
+
+
+def if_none_match(if_none_match: Optional[str] = Header(None)) -> set[str]:
+    """Entity tags from an If-None-Match header (weak tags compare as strong)."""
+    if not if_none_match:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def _is_json(media_type: str) -> bool:
+    return media_type in ("", "application/json") or media_type.endswith("+json")
+
+
+async def command_string(request: Request) -> str:
+    """
+    The command string of a /commands body.
+
+    text/plain bodies are validated as they stream in (app/services/command_body.py);
+    JSON and MessagePack bodies are read the same way, then validated as a
+    CommandRequest with the errors FastAPI would give.
+    """
+    max_bytes = get_settings().command_body_max_bytes
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"body larger than {max_bytes} bytes",
+        )
+
+    # MessagePack bodies arrive relabelled as JSON, see FastRoute
+    content_type = request.scope.get("original_content_type") or request.headers.get("content-type")
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type != "text/plain" and media_type not in MSGPACK_TYPES and not _is_json(media_type):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Type must be application/json, application/msgpack or text/plain",
+        )
+
+    encoding = request.headers.get("content-encoding")
+    try:
+        if media_type == "text/plain":
+            return await read_commands(request.stream(), encoding, max_bytes)
+        body = await read_body(request.stream(), encoding, max_bytes)
+    except CommandBodyTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(e))
+    except UnsupportedEncoding as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    except CommandBodyError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    try:
+        payload = decode_body(body, content_type) if body else None
+    except json.JSONDecodeError as e:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "json_invalid",
+                    "loc": ("body", e.pos),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": e.msg},
+                }
+            ]
+        )
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="There was an error parsing the body"
+        )
+
+    try:
+        return CommandRequest.model_validate(payload).commands
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+
+def compact_response(
+    compact: Optional[bool] = Query(
+        None,
+        description="length, SHA-256 and steps executed instead of echoing the commands "
+        "(default: for strings of COMPACT_RESPONSE_MIN_COMMANDS or more)",
+    ),
+    commands: str = Depends(command_string),
+) -> bool:
+    """Whether a /commands response is a CompactCommandResponse."""
+    if compact is None:
+        return len(commands) >= get_settings().compact_response_min_commands
+    return compact
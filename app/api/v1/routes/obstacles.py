@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import get_db
+from app.schemas.obstacle_schema import ObstacleBulkResponse
+from app.services.obstacle_cache import obstacle_cache
+from app.services.obstacle_import import (
+    FORMATS_BY_CONTENT_TYPE,
+    ObstacleFormat,
+    ObstacleParseError,
+    parse_obstacle_stream,
+)
+from app.services.obstacle_service import import_obstacles
+from app.services.obstacle_tiles import obstacle_tiles
+
+router = APIRouter(prefix="/obstacles", tags=["obstacles"])
+
+_BODY_FORMATS = {
+    "openapi_extra": {
+        "requestBody": {
+            "required": True,
+            "description": "one x,y per line (CSV), one JSON object or pair per line (NDJSON), "
+            "or little-endian int32 x, y pairs (binary)",
+            "content": {content_type: {} for content_type in FORMATS_BY_CONTENT_TYPE},
+        }
+    }
+}
+
+
+def body_format(request: Request) -> ObstacleFormat:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    obstacle_format = FORMATS_BY_CONTENT_TYPE.get(content_type)
+    if obstacle_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be one of {sorted(FORMATS_BY_CONTENT_TYPE)}",
+        )
+    return obstacle_format
+
+
+async def _bulk(request: Request, db: AsyncSession, remove: bool) -> ObstacleBulkResponse:
+    batches = parse_obstacle_stream(
+        request.stream(), body_format(request), get_settings().obstacle_batch_size
+    )
+    try:
+        received, changed = await import_obstacles(db, batches, remove=remove)
+    except ObstacleParseError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    return ObstacleBulkResponse(received=received, changed=changed)
+
+
+@router.post("/bulk", response_model=ObstacleBulkResponse, **_BODY_FORMATS)
+async def upsert_obstacles(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> ObstacleBulkResponse:
+    """Add obstacles from a streamed body; existing ones are kept. All or nothing."""
+    return await _bulk(request, db, remove=False)
+
+
+@router.delete("/bulk", response_model=ObstacleBulkResponse, **_BODY_FORMATS)
+async def delete_obstacles(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> ObstacleBulkResponse:
+    """Remove obstacles listed in a streamed body. All or nothing."""
+    return await _bulk(request, db, remove=True)
+
+
+@router.get("/cache")
+async def obstacle_cache_stats() -> dict[str, dict[str, int]]:
+    """This worker's obstacle snapshot and tile cache counters."""
+    return {"snapshot": obstacle_cache.stats(), "tiles": obstacle_tiles.stats()}
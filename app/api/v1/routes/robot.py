@@ -1,37 +1,177 @@
-from fastapi import APIRouter, Depends
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Optional, Union
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.serialization import FastRoute, negotiated_response, representation_etag
+from app.api.v1.dependencies import (
+    COMMAND_BODY,
+    command_string,
+    compact_response,
+    if_none_match,
+)
 from app.db.session import get_db
-from app.schemas.robot_schema import CommandRequest, CommandResponse, PositionResponse
-from app.services.robot_service import RobotService
+from app.schemas.payloads import (
+    compact_payload,
+    history_page_payload,
+    position_payload,
+    result_payload,
+    simulate_payload,
+)
+from app.schemas.robot_schema import (
+    CommandHistoryPage,
+    CommandResponse,
+    CompactCommandResponse,
+    PlanRequest,
+    PlanResponse,
+    PositionResponse,
+    SimulateRequest,
+    SimulateResponse,
+)
+from app.services.path_planner import NoPathError
+from app.services.robot_service import RobotNotFoundError, RobotService
+from app.services.trajectory import PathFormat, with_path
+from app.utils.enums import Direction
 
-router = APIRouter(prefix="/robot", tags=["robot"])
+router = APIRouter(prefix="/robot", tags=["robot"], route_class=FastRoute)
 
 
-@router.get("/position", response_model=PositionResponse)
-async def get_position(db: AsyncSession = Depends(get_db)) -> PositionResponse:
-    """Get current robot position and direction."""
+@router.get(
+    "/position",
+    response_model=PositionResponse,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "position unchanged since ETag"}},
+)
+async def get_position(
+    http_request: Request,
+    etags: set[str] = Depends(if_none_match),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """Get current robot position and direction (ETag / If-None-Match aware)."""
     service = RobotService(db)
-    x, y, direction = await service.get_position()
+    cached = await service.get_cached_position()
 
-    return PositionResponse(x=x, y=y, direction=direction.value)
+    etag = representation_etag(cached.etag, http_request.headers)
+    if etag in etags or "*" in etags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return negotiated_response(
+        http_request,
+        position_payload(cached.x, cached.y, cached.direction),
+        headers={"ETag": etag},
+    )
 
 
-@router.post("/commands", response_model=CommandResponse)
+@router.post(
+    "/commands", response_model=Union[CommandResponse, CompactCommandResponse], **COMMAND_BODY
+)
 async def execute_commands(
-    request: CommandRequest, db: AsyncSession = Depends(get_db)
-) -> CommandResponse:
-    """Execute a string of commands and return final position."""
+    http_request: Request,
+    commands: str = Depends(command_string),
+    compact: bool = Depends(compact_response),
+    include_path: bool = Query(False, description="also return every visited cell"),
+    path_format: PathFormat = Query("delta", description="path encoding"),
+    db: AsyncSession = Depends(get_db),
+) -> Union[Response, StreamingResponse]:
+    """
+    Execute a string of commands and return final position (and the path, streamed).
+
+    Long strings get a CompactCommandResponse (length, hash and steps executed)
+    instead of being echoed back, see compact_response.
+    """
     service = RobotService(db)
-    x, y, direction, stopped_by_obstacle, obstacle_coordinate = await service.execute_commands(
-        request.commands
+    payload = compact_payload if compact else result_payload
+    if include_path:
+        result, start, path = await service.execute_commands_with_path(commands)
+        head = orjson.dumps(payload(result, commands))
+        return StreamingResponse(
+            with_path(head, path_format, start, path), media_type="application/json"
+        )
+
+    result = await service.execute_commands_result(commands)
+    return negotiated_response(http_request, payload(result, commands))
+
+
+@router.post("/plan", response_model=PlanResponse)
+async def plan_route(request: PlanRequest, db: AsyncSession = Depends(get_db)) -> PlanResponse:
+    """Shortest obstacle-free command string from the current pose to a target (A*)."""
+    service = RobotService(db)
+    direction = Direction(request.direction) if request.direction else None
+    try:
+        start, plan, cached = await service.plan_route(request.x, request.y, direction)
+    except NoPathError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    return PlanResponse(
+        commands=plan.commands,
+        length=len(plan.commands),
+        start=PositionResponse(x=start.x, y=start.y, direction=start.direction.value),
+        nodes_expanded=plan.nodes_expanded,
+        cached=cached,
     )
 
-    return CommandResponse(
-        x=x,
-        y=y,
-        direction=direction.value,
-        commands_executed=request.commands,
-        stopped_by_obstacle=stopped_by_obstacle,
-        obstacle_coordinate=obstacle_coordinate,
+
+@router.post("/simulate", response_model=SimulateResponse)
+async def simulate_commands(
+    http_request: Request, request: SimulateRequest, db: AsyncSession = Depends(get_db)
+) -> Response:
+    """Dry-run many command strings from the current (or a given) pose; nothing is saved."""
+    service = RobotService(db)
+    pose = None
+    if request.direction is not None:
+        pose = (request.x, request.y, Direction(request.direction))
+    (x, y, direction), results = await service.dry_run(request.candidates, pose)
+
+    return negotiated_response(
+        http_request, simulate_payload(position_payload(x, y, direction), results)
     )
+
+
+@router.get("/history", response_model=CommandHistoryPage)
+async def get_history(
+    http_request: Request,
+    robot_id: Optional[int] = Query(None, description="robot id, default robot if omitted"),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=1000),
+    since: Optional[datetime] = Query(None, description="created at or after"),
+    until: Optional[datetime] = Query(None, description="created before"),
+    stopped_by_obstacle: Optional[bool] = Query(None),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """Command history, newest first, keyset-paginated on id."""
+    service = RobotService(db)
+    try:
+        rows, next_cursor = await service.get_history(
+            robot_id, limit, cursor, since, until, stopped_by_obstacle
+        )
+    except RobotNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return negotiated_response(http_request, history_page_payload(rows, next_cursor))
+
+
+async def _ndjson(rows: AsyncIterator[RowMapping]) -> AsyncIterator[bytes]:
+    async for row in rows:
+        yield json.dumps(dict(row), default=datetime.isoformat).encode() + b"\n"
+
+
+@router.get("/history/export")
+async def export_history(
+    robot_id: Optional[int] = Query(None, description="robot id, default robot if omitted"),
+    since: Optional[datetime] = Query(None, description="created at or after"),
+    until: Optional[datetime] = Query(None, description="created before"),
+    stopped_by_obstacle: Optional[bool] = Query(None),
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    """All matching command history as NDJSON, oldest first, streamed from a server-side cursor."""
+    service = RobotService(db)
+    try:
+        rows = await service.export_history(robot_id, since, until, stopped_by_obstacle)
+    except RobotNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
@@ -0,0 +1,81 @@
+import asyncio
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import get_db
+from app.services.command_stream import CommandStream
+from app.services.robot_service import RobotNotFoundError
+
+router = APIRouter(prefix="/robot", tags=["robot"])
+
+_COMMANDS = re.compile(r"[FBLR]+")
+
+
+@router.websocket("/ws")
+async def command_stream(
+    websocket: WebSocket,
+    robot_id: Optional[int] = Query(None, description="robot id, default robot if omitted"),
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    """
+    Stream commands over one connection.
+
+    Send text frames of F/B/L/R commands; each frame is answered with a
+    "position" event, or an "obstacle" event if it stopped at an obstacle
+    (the rest of that frame is dropped, like a POST /commands). A binary
+    frame closes the connection with 1003.
+    """
+    stream = CommandStream(db, robot_id)
+    try:
+        x, y, direction = await stream.open()
+    except RobotNotFoundError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+
+    await websocket.accept()
+    await websocket.send_json({"type": "position", "x": x, "y": y, "direction": direction.value})
+
+    idle_timeout = get_settings().ws_persist_interval
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), idle_timeout)
+            except asyncio.TimeoutError:
+                # quiet connection: persist what we have
+                await stream.flush()
+                continue
+
+            if message["type"] == "websocket.disconnect":
+                break
+            commands = message.get("text")
+            if commands is None:
+                await websocket.close(
+                    code=status.WS_1003_UNSUPPORTED_DATA, reason="commands are sent as text frames"
+                )
+                break
+
+            if not _COMMANDS.fullmatch(commands):
+                await websocket.send_json(
+                    {"type": "error", "detail": "commands must match ^[FBLR]+$"}
+                )
+                continue
+
+            result = await stream.execute(commands)
+            event = {
+                "type": "obstacle" if result.stopped_by_obstacle else "position",
+                "x": result.x,
+                "y": result.y,
+                "direction": result.direction.value,
+                "seq": stream.chunks,
+            }
+            if result.stopped_by_obstacle:
+                event["obstacle_coordinate"] = list(result.obstacle_coordinate)
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.close()
@@ -0,0 +1,153 @@
+from typing import Union
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.serialization import FastRoute, negotiated_response, representation_etag
+from app.api.v1.dependencies import (
+    COMMAND_BODY,
+    command_string,
+    compact_response,
+    if_none_match,
+)
+from app.db.session import get_db
+from app.schemas.payloads import compact_payload, fleet_payload, position_payload, result_payload
+from app.schemas.robot_schema import (
+    CommandResponse,
+    CompactCommandResponse,
+    FleetCommandRequest,
+    FleetCommandResponse,
+    PlanRequest,
+    PlanResponse,
+    PositionResponse,
+    RobotCreateRequest,
+    RobotResponse,
+)
+from app.services.path_planner import NoPathError
+from app.services.robot_service import RobotNotFoundError, RobotService
+from app.services.trajectory import PathFormat, with_path
+from app.utils.enums import Direction
+
+router = APIRouter(prefix="/robots", tags=["robots"], route_class=FastRoute)
+
+
+@router.post("", response_model=RobotResponse, status_code=status.HTTP_201_CREATED)
+async def create_robot(
+    request: RobotCreateRequest, db: AsyncSession = Depends(get_db)
+) -> RobotResponse:
+    """Add a robot to the fleet with its own start pose."""
+    service = RobotService(db)
+    robot = await service.create_robot(request.x, request.y, Direction(request.direction))
+
+    return RobotResponse(id=robot.id, x=robot.x, y=robot.y, direction=robot.direction)
+
+
+@router.post("/commands", response_model=FleetCommandResponse)
+async def execute_fleet_commands(
+    http_request: Request, request: FleetCommandRequest, db: AsyncSession = Depends(get_db)
+) -> Response:
+    """Execute commands for many robots in one request."""
+    service = RobotService(db)
+    try:
+        results = await service.execute_fleet(
+            [(item.robot_id, item.commands) for item in request.items]
+        )
+    except RobotNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return negotiated_response(
+        http_request,
+        fleet_payload(
+            [item.robot_id for item in request.items],
+            [item.commands for item in request.items],
+            results,
+        ),
+    )
+
+
+@router.get(
+    "/{robot_id}/position",
+    response_model=PositionResponse,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "position unchanged since ETag"}},
+)
+async def get_position(
+    robot_id: int,
+    http_request: Request,
+    etags: set[str] = Depends(if_none_match),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """Get a robot's current position and direction (ETag / If-None-Match aware)."""
+    service = RobotService(db)
+    try:
+        cached = await service.get_cached_position(robot_id)
+    except RobotNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    etag = representation_etag(cached.etag, http_request.headers)
+    if etag in etags or "*" in etags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return negotiated_response(
+        http_request,
+        position_payload(cached.x, cached.y, cached.direction),
+        headers={"ETag": etag},
+    )
+
+
+@router.post(
+    "/{robot_id}/commands",
+    response_model=Union[CommandResponse, CompactCommandResponse],
+    **COMMAND_BODY,
+)
+async def execute_commands(
+    robot_id: int,
+    http_request: Request,
+    commands: str = Depends(command_string),
+    compact: bool = Depends(compact_response),
+    include_path: bool = Query(False, description="also return every visited cell"),
+    path_format: PathFormat = Query("delta", description="path encoding"),
+    db: AsyncSession = Depends(get_db),
+) -> Union[Response, StreamingResponse]:
+    """Execute a string of commands on one robot and return its final position."""
+    service = RobotService(db)
+    payload = compact_payload if compact else result_payload
+    if include_path:
+        try:
+            result, start, path = await service.execute_commands_with_path(commands, robot_id)
+        except RobotNotFoundError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        head = orjson.dumps(payload(result, commands))
+        return StreamingResponse(
+            with_path(head, path_format, start, path), media_type="application/json"
+        )
+
+    try:
+        result = await service.execute_commands_result(commands, robot_id)
+    except RobotNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return negotiated_response(http_request, payload(result, commands))
+
+
+@router.post("/{robot_id}/plan", response_model=PlanResponse)
+async def plan_route(
+    robot_id: int, request: PlanRequest, db: AsyncSession = Depends(get_db)
+) -> PlanResponse:
+    """Shortest obstacle-free command string from a robot's current pose to a target (A*)."""
+    service = RobotService(db)
+    direction = Direction(request.direction) if request.direction else None
+    try:
+        start, plan, cached = await service.plan_route(request.x, request.y, direction, robot_id)
+    except RobotNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except NoPathError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    return PlanResponse(
+        commands=plan.commands,
+        length=len(plan.commands),
+        start=PositionResponse(x=start.x, y=start.y, direction=start.direction.value),
+        nodes_expanded=plan.nodes_expanded,
+        cached=cached,
+    )
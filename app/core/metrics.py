@@ -0,0 +1,193 @@
+"""
+Process-local metrics, rendered in the Prometheus text format (0.0.4).
+
+No client library: a counter is a dict of label values to a float and a
+histogram a list of per-bucket counts plus the sum, updated in place. An
+observation is a dict lookup and a bisect, cheap enough to leave on.
+Updates happen on the event loop thread; each worker process exposes its
+own values, so scrape every worker (or aggregate by instance).
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from typing import Union
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+# seconds, for request latency and database time
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# commands per string, 1 to 10M
+SIZE_BUCKETS = tuple(10**power * step for power in range(7) for step in (1, 3)) + (10**7,)
+# statements per request
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self._values.items():
+            yield self.name + "_total", dict(zip(self.labelnames, labels)), value
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Iterable[float],
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # per label values: a count per bucket, one for +Inf, then the sum
+        self._series: dict[LabelValues, list[Union[int, float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def total(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return series[-1] if series else 0.0
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, series in self._series.items():
+            named = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield self.name + "_bucket", {**named, "le": _format_value(bound)}, cumulative
+            yield self.name + "_sum", named, series[-1]
+            yield self.name + "_count", named, cumulative
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+class Gauge:
+    """A value read when scraped, e.g. connection pool occupancy."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def samples(self) -> Iterator[Sample]:
+        yield self.name, {}, self.read()
+
+    def clear(self) -> None:
+        pass
+
+
+Metric = Union[Counter, Histogram, Gauge]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                    name = f"{name}{{{rendered}}}"
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+registry = Registry()
+
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time from request to the end of the response body",
+        LATENCY_BUCKETS,
+        ("method", "route", "status"),
+    )
+)
+command_length = registry.register(
+    Histogram("robot_command_length", "Commands per executed command string", SIZE_BUCKETS)
+)
+commands_executed = registry.register(
+    Histogram(
+        "robot_commands_executed",
+        "Commands run per command string before it finished or hit an obstacle",
+        SIZE_BUCKETS,
+    )
+)
+obstacle_stops = registry.register(
+    Counter("robot_obstacle_stops", "Command strings stopped by an obstacle")
+)
+db_statements = registry.register(Counter("db_statements", "SQL statements executed"))
+db_statements_per_request = registry.register(
+    Histogram(
+        "db_statements_per_request", "SQL statements per HTTP request", COUNT_BUCKETS, ("route",)
+    )
+)
+db_time_per_request = registry.register(
+    Histogram(
+        "db_time_per_request_seconds",
+        "Time spent in SQL statements per HTTP request",
+        LATENCY_BUCKETS,
+        ("route",),
+    )
+)
+db_pool_wait = registry.register(
+    Histogram(
+        "db_pool_wait_seconds",
+        "Time to check a connection out of the pool, opening one included",
+        LATENCY_BUCKETS,
+    )
+)
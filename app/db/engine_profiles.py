@@ -0,0 +1,126 @@
+"""
+Engine settings per ENVIRONMENT.
+
+development mirrors the old fixed engine (5 + 10 connections) and echoes SQL
+when DEBUG is on; test keeps a small pool and fails fast; production sizes
+the pool for a worker serving many concurrent requests, caches more prepared
+statements and never echoes. DB_* settings override single values.
+"""
+
+import uuid
+from dataclasses import dataclass, replace
+from typing import Any
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app.core.config import Settings
+from app.db.instrumentation import TimedQueuePool
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float  # seconds to wait for a connection before raising
+    pool_recycle: int  # seconds; -1 keeps connections forever
+    statement_cache_size: int  # asyncpg prepared statements per connection
+    statement_timeout: float  # seconds; 0 disables
+    echo: bool
+
+
+PROFILES = {
+    "development": EngineProfile(
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=1800,
+        statement_cache_size=100,
+        statement_timeout=30,
+        echo=True,
+    ),
+    "test": EngineProfile(
+        pool_size=2,
+        max_overflow=2,
+        pool_timeout=5,
+        pool_recycle=-1,
+        statement_cache_size=100,
+        statement_timeout=10,
+        echo=False,
+    ),
+    "production": EngineProfile(
+        pool_size=10,
+        max_overflow=10,
+        pool_timeout=10,
+        pool_recycle=1800,
+        statement_cache_size=500,
+        statement_timeout=5,
+        echo=False,
+    ),
+}
+
+
+def resolve_profile(settings: Settings) -> EngineProfile:
+    """The environment's profile with DB_* overrides applied."""
+    profile = PROFILES[settings.environment]
+    overrides = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "statement_cache_size": settings.db_statement_cache_size,
+        "statement_timeout": settings.db_statement_timeout,
+    }
+    profile = replace(
+        profile, **{key: value for key, value in overrides.items() if value is not None}
+    )
+    if settings.environment == "production" or not settings.debug:
+        profile = replace(profile, echo=False)
+    if settings.db_pgbouncer:
+        profile = replace(profile, statement_cache_size=0)
+    return profile
+
+
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def engine_kwargs(settings: Settings, url: str) -> dict[str, Any]:
+    """Keyword arguments for create_async_engine(url, ...) under the settings' profile."""
+    profile = resolve_profile(settings)
+    kwargs: dict[str, Any] = {"echo": profile.echo, "pool_pre_ping": True}
+
+    if settings.db_pgbouncer:
+        # PgBouncer pools the server connections; a second pool here would hold on to
+        # prepared statements of server connections it no longer owns
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=profile.pool_size,
+            max_overflow=profile.max_overflow,
+            pool_timeout=profile.pool_timeout,
+            pool_recycle=profile.pool_recycle,
+        )
+
+    if make_url(url).get_driver_name() != "asyncpg":
+        return kwargs
+
+    connect_args: dict[str, Any] = {
+        # asyncpg's cache of statements it prepared itself, and SQLAlchemy's cache of
+        # statements prepared for its own queries
+        "statement_cache_size": profile.statement_cache_size,
+        "prepared_statement_cache_size": profile.statement_cache_size,
+    }
+    if settings.db_pgbouncer:
+        # a transaction may run on any server connection: never reuse a statement name,
+        # and enforce the timeout client side since PgBouncer rejects startup parameters
+        connect_args["prepared_statement_name_func"] = _prepared_statement_name
+        if profile.statement_timeout:
+            connect_args["command_timeout"] = profile.statement_timeout
+    elif profile.statement_timeout:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(int(profile.statement_timeout * 1000))
+        }
+    kwargs["connect_args"] = connect_args
+    return kwargs
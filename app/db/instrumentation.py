@@ -0,0 +1,103 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, Pool, QueuePool
+
+from app.core.metrics import Gauge, db_pool_wait, db_statements, registry
+
+# statements kept per request for the slow request log; the rest are only counted
+MAX_RECORDED_STATEMENTS = 100
+
+
+@dataclass
+class RequestDbStats:
+    statements: int = 0
+    seconds: float = 0.0
+    # (SQL, seconds) for the first MAX_RECORDED_STATEMENTS statements
+    queries: list[tuple[str, float]] = field(default_factory=list)
+    # SQL a robot actor ran for the group this request waited on; not the request's own
+    actor_statements: int = 0
+    actor_seconds: float = 0.0
+
+
+# set per HTTP request by RequestStatsMiddleware; SQLAlchemy runs the cursor events in a
+# greenlet that shares the awaiting task's context, so they see the request's object.
+# Background tasks must not inherit it (see RobotActor)
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info.setdefault("statement_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    elapsed = time.perf_counter() - conn.info["statement_start"].pop()
+    db_statements.inc()
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+        if len(stats.queries) < MAX_RECORDED_STATEMENTS:
+            stats.queries.append((statement, elapsed))
+
+
+def _handle_error(context: Any) -> None:
+    # a failed statement never reaches after_cursor_execute
+    starts = context.connection.info.get("statement_start") if context.connection else None
+    if starts:
+        starts.pop()
+
+
+_LISTENERS = (
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+    ("handle_error", _handle_error),
+)
+
+
+def install_sql_metrics() -> None:
+    """Count and time every statement on every engine in this process; safe to call twice."""
+    for name, listener in _LISTENERS:
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+
+def uninstall_sql_metrics() -> None:
+    for name, listener in _LISTENERS:
+        if event.contains(Engine, name, listener):
+            event.remove(Engine, name, listener)
+
+
+def register_pool_metrics(pool: Pool) -> None:
+    """Scrape-time gauges for a queue pool; pools without a queue (NullPool) have none."""
+    if not isinstance(pool, QueuePool):
+        return
+    registry.register(Gauge("db_pool_size", "Connections the pool keeps open", pool.size))
+    registry.register(
+        Gauge("db_pool_checked_out", "Connections in use by sessions", pool.checkedout)
+    )
+    registry.register(Gauge("db_pool_checked_in", "Idle connections in the pool", pool.checkedin))
+    registry.register(
+        Gauge(
+            "db_pool_overflow",
+            "Connections above pool_size (negative: not opened yet)",
+            pool.overflow,
+        )
+    )
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The asyncio queue pool, recording how long each checkout waits."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - start)
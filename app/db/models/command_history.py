@@ -1,6 +1,6 @@
 from typing import Optional
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base, TimestampMixin
@@ -8,6 +8,11 @@ from app.db.base import Base, TimestampMixin
 
 class CommandHistory(Base, TimestampMixin):
     __tablename__ = "command_history"
+    __table_args__ = (
+        # keyset pagination per robot
+        Index("ix_command_history_robot_id_id", "robot_id", "id"),
+        Index("ix_command_history_created_at", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     robot_id: Mapped[int] = mapped_column(Integer, ForeignKey("robots.id"), nullable=False)
@@ -4,17 +4,15 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 
 from app.core.config import get_settings
 from app.db.base import Base
+from app.db.engine_profiles import engine_kwargs
+from app.db.instrumentation import register_pool_metrics
 
 settings = get_settings()
 
 engine = create_async_engine(
-    settings.database_url_str,
-    echo=settings.debug,
-    future=True,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+    settings.database_url_str, **engine_kwargs(settings, settings.database_url_str)
 )
+register_pool_metrics(engine.pool)
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
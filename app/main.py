@@ -4,11 +4,16 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1.routes import health, robot
+from app.api.middleware import RequestStatsMiddleware
+from app.api.v1.routes import health, metrics, obstacles, robot, robot_ws, robots
 from app.core.config import get_settings
 from app.core.logging_config import get_logger, setup_logging
+from app.db.instrumentation import install_sql_metrics
 from app.db.session import AsyncSessionLocal, close_db
-from app.services.obstacle_service import initialize_obstacles
+from app.services.history_writer import history_writer
+from app.services.obstacle_service import initialize_obstacles, warm_obstacle_cache
+from app.services.robot_actor import robot_actors
+from app.services.simulation_pool import simulation_pool
 
 setup_logging()
 logger = get_logger(__name__)
@@ -26,10 +31,29 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     async with AsyncSessionLocal() as db:
         await initialize_obstacles(db)
+        await warm_obstacle_cache(db)
+
+    if settings.history_durability == "batched":
+        await history_writer.start(
+            AsyncSessionLocal,
+            batch_size=settings.history_batch_size,
+            flush_interval=settings.history_flush_interval,
+            max_queue=settings.history_queue_size,
+        )
+
+    if settings.command_execution == "actor":
+        robot_actors.start(AsyncSessionLocal, max_group=settings.actor_max_group)
+
+    if settings.simulation_workers:
+        simulation_pool.start(settings.simulation_workers)
 
     yield
 
     logger.info("Shutting down Moon Robot API...")
+    # finish queued commands, then drain queued history, before the engine goes away
+    await robot_actors.stop()
+    await history_writer.stop()
+    await simulation_pool.stop()
     await close_db()
 
 
@@ -52,8 +76,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(RequestStatsMiddleware)
+install_sql_metrics()
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
+
 app.include_router(health.router, prefix="/api/v1")
 app.include_router(robot.router, prefix="/api/v1")
+app.include_router(robot_ws.router, prefix="/api/v1")
+app.include_router(robots.router, prefix="/api/v1")
+app.include_router(obstacles.router, prefix="/api/v1")
 
 
 @app.get("/", tags=["root"])
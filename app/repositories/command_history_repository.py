@@ -1,11 +1,68 @@
-from typing import Optional
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any, Optional
 
+from sqlalchemy import Select, insert, select
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.command_history import CommandHistory
 from app.utils.enums import Direction
 
 
+def history_row(
+    robot_id: int,
+    command_string: str,
+    initial_x: int,
+    initial_y: int,
+    initial_direction: Direction,
+    final_x: int,
+    final_y: int,
+    final_direction: Direction,
+    stopped_by_obstacle: bool = False,
+    obstacle_x: Optional[int] = None,
+    obstacle_y: Optional[int] = None,
+) -> dict[str, Any]:
+    """column values of one command_history row"""
+    return {
+        "robot_id": robot_id,
+        "command_string": command_string,
+        "initial_x": initial_x,
+        "initial_y": initial_y,
+        "initial_direction": initial_direction.value,
+        "final_x": final_x,
+        "final_y": final_y,
+        "final_direction": final_direction.value,
+        "stopped_by_obstacle": stopped_by_obstacle,
+        "obstacle_x": obstacle_x,
+        "obstacle_y": obstacle_y,
+    }
+
+
+# Core INSERT on the table: no ORM bulk-insert processing per row; every history_row has
+# the same keys, so many rows still go out as one statement
+_INSERT_HISTORY = insert(CommandHistory.__table__)
+
+# plain columns: pages and exports never build ORM objects
+HISTORY_COLUMNS = tuple(c for c in CommandHistory.__table__.c if c.name != "updated_at")
+
+
+def filter_history(
+    robot_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    stopped_by_obstacle: Optional[bool] = None,
+) -> Select:
+    stmt = select(*HISTORY_COLUMNS).where(CommandHistory.robot_id == robot_id)
+    if since is not None:
+        stmt = stmt.where(CommandHistory.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(CommandHistory.created_at < until)
+    if stopped_by_obstacle is not None:
+        stmt = stmt.where(CommandHistory.stopped_by_obstacle == stopped_by_obstacle)
+    return stmt
+
+
 class CommandHistoryRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -25,19 +82,67 @@ class CommandHistoryRepository:
         obstacle_y: Optional[int] = None,
     ) -> CommandHistory:
         history = CommandHistory(
-            robot_id=robot_id,
-            command_string=command_string,
-            initial_x=initial_x,
-            initial_y=initial_y,
-            initial_direction=initial_direction.value,
-            final_x=final_x,
-            final_y=final_y,
-            final_direction=final_direction.value,
-            stopped_by_obstacle=stopped_by_obstacle,
-            obstacle_x=obstacle_x,
-            obstacle_y=obstacle_y,
+            **history_row(
+                robot_id=robot_id,
+                command_string=command_string,
+                initial_x=initial_x,
+                initial_y=initial_y,
+                initial_direction=initial_direction,
+                final_x=final_x,
+                final_y=final_y,
+                final_direction=final_direction,
+                stopped_by_obstacle=stopped_by_obstacle,
+                obstacle_x=obstacle_x,
+                obstacle_y=obstacle_y,
+            )
         )
         self.db.add(history)
         await self.db.commit()
         await self.db.refresh(history)
         return history
+
+    async def insert_history_returning(self, row: dict[str, Any]) -> CommandHistory:
+        """INSERT ... RETURNING instead of commit + refresh, committed by the caller"""
+        result = await self.db.execute(insert(CommandHistory).values(row).returning(CommandHistory))
+        return result.scalar_one()
+
+    async def insert_history(self, row: dict[str, Any]) -> None:
+        """Core INSERT without RETURNING, committed by the caller"""
+        await self.db.execute(_INSERT_HISTORY, row)
+
+    async def bulk_insert_history(self, rows: list[dict[str, Any]]) -> None:
+        """one multi-row INSERT, committed by the caller"""
+        if rows:
+            await self.db.execute(_INSERT_HISTORY, rows)
+
+    async def get_page(
+        self,
+        robot_id: int,
+        limit: int,
+        before_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        stopped_by_obstacle: Optional[bool] = None,
+    ) -> list[RowMapping]:
+        """newest first, keyset on id: uses the (robot_id, id) index, no OFFSET"""
+        stmt = filter_history(robot_id, since, until, stopped_by_obstacle)
+        if before_id is not None:
+            stmt = stmt.where(CommandHistory.id < before_id)
+        result = await self.db.execute(stmt.order_by(CommandHistory.id.desc()).limit(limit))
+        return list(result.mappings())
+
+    async def stream_history(
+        self,
+        robot_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        stopped_by_obstacle: Optional[bool] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[RowMapping]:
+        """oldest first, through a server-side cursor fetching batch_size rows at a time"""
+        stmt = filter_history(robot_id, since, until, stopped_by_obstacle).order_by(
+            CommandHistory.id
+        )
+        result = await self.db.stream(stmt.execution_options(yield_per=batch_size))
+        async for row in result.mappings():
+            yield row
@@ -1,8 +1,18 @@
-from sqlalchemy import select
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import and_, bindparam, delete, or_, select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.obstacle import Obstacle
 
+_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+_RANGES_PER_QUERY = 100
+_obstacles = Obstacle.__table__
+_SELECT_COORDINATES = select(_obstacles.c.x, _obstacles.c.y)
+
 
 class ObstacleRepository:
 
@@ -14,8 +24,32 @@ class ObstacleRepository:
         return list(result.scalars().all())
 
     async def get_obstacle_coordinates(self) -> set[tuple[int, int]]:
-        obstacles = await self.get_all_obstacles()
-        return {(obs.x, obs.y) for obs in obstacles}
+        """(x, y) row tuples straight from the cursor, no Obstacle per row"""
+        result = await self.db.execute(_SELECT_COORDINATES)
+        return {(x, y) for x, y in result}
+
+    async def get_obstacle_array(self) -> np.ndarray:
+        """All obstacles as an (n, 2) int64 array, without building ORM objects or tuples."""
+        result = await self.db.execute(_SELECT_COORDINATES)
+        values = np.fromiter(chain.from_iterable(result), dtype=np.int64)
+        return values.reshape(-1, 2)
+
+    async def get_obstacles_in_ranges(self, ranges: list[tuple[int, int, int, int]]) -> np.ndarray:
+        """
+        Obstacles inside any of the inclusive (x_min, x_max, y_min, y_max) boxes.
+
+        Range scans on the (x, y) unique index, up to _RANGES_PER_QUERY boxes
+        OR-ed into one statement. Returns an (n, 2) int64 array.
+        """
+        parts = [np.empty(0, dtype=np.int64)]
+        for start in range(0, len(ranges), _RANGES_PER_QUERY):
+            boxes = [
+                and_(Obstacle.x.between(x_min, x_max), Obstacle.y.between(y_min, y_max))
+                for x_min, x_max, y_min, y_max in ranges[start : start + _RANGES_PER_QUERY]
+            ]
+            result = await self.db.execute(select(Obstacle.x, Obstacle.y).where(or_(*boxes)))
+            parts.append(np.fromiter(chain.from_iterable(result), dtype=np.int64))
+        return np.concatenate(parts).reshape(-1, 2)
 
     async def is_obstacle_at(self, x: int, y: int) -> bool:
         result = await self.db.execute(select(Obstacle).where(Obstacle.x == x, Obstacle.y == y))
@@ -33,3 +67,67 @@ class ObstacleRepository:
         self.db.add_all(obstacles)
         await self.db.commit()
         return obstacles
+
+    async def upsert_obstacles(self, coordinates: np.ndarray) -> int:
+        """
+        Add (n, 2) coordinates that are not obstacles yet; returns rows inserted.
+
+        INSERT ... ON CONFLICT DO NOTHING as one executemany, or COPY into a temp
+        table and one INSERT ... SELECT on asyncpg. Not committed: call
+        commit_changes() after the last batch.
+        """
+        if await self._copy_to_load_table(coordinates):
+            result = await self.db.execute(
+                text(
+                    "INSERT INTO obstacles (x, y) SELECT DISTINCT x, y FROM obstacle_load "
+                    "ON CONFLICT (x, y) DO NOTHING"
+                )
+            )
+            return result.rowcount
+
+        insert = _INSERTS[self.db.get_bind().dialect.name]
+        statement = insert(Obstacle.__table__).on_conflict_do_nothing(index_elements=["x", "y"])
+        result = await self.db.execute(statement, _rows(coordinates))
+        return result.rowcount
+
+    async def delete_obstacles(self, coordinates: np.ndarray) -> int:
+        """Remove obstacles at (n, 2) coordinates; returns rows deleted. Not committed."""
+        if await self._copy_to_load_table(coordinates):
+            result = await self.db.execute(
+                text(
+                    "DELETE FROM obstacles USING obstacle_load "
+                    "WHERE obstacles.x = obstacle_load.x AND obstacles.y = obstacle_load.y"
+                )
+            )
+            return result.rowcount
+
+        table = Obstacle.__table__
+        statement = delete(table).where(table.c.x == bindparam("x"), table.c.y == bindparam("y"))
+        result = await self.db.execute(statement, _rows(coordinates))
+        return result.rowcount
+
+    async def commit_changes(self) -> None:
+        """Commit bulk obstacle writes."""
+        await self.db.commit()
+
+    async def _copy_to_load_table(self, coordinates: np.ndarray) -> bool:
+        """COPY coordinates into a transaction-scoped temp table (asyncpg only)."""
+        if self.db.get_bind().dialect.driver != "asyncpg":
+            return False
+
+        await self.db.execute(
+            text(
+                "CREATE TEMP TABLE IF NOT EXISTS obstacle_load (x integer, y integer) "
+                "ON COMMIT DROP"
+            )
+        )
+        await self.db.execute(text("TRUNCATE obstacle_load"))
+        connection = await (await self.db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            "obstacle_load", records=coordinates.tolist(), columns=["x", "y"]
+        )
+        return True
+
+
+def _rows(coordinates: np.ndarray) -> list[dict[str, int]]:
+    return [{"x": x, "y": y} for x, y in coordinates.tolist()]
@@ -1,6 +1,8 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
 from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
@@ -8,15 +10,52 @@ from app.db.models.robot import Robot
 from app.utils.enums import Direction
 
 
+@dataclass(frozen=True, slots=True)
+class RobotState:
+    """a robot row's position columns as plain values, no ORM identity or tracking"""
+
+    id: int
+    x: int
+    y: int
+    direction: str
+
+
+# Core statements on the table, built once: no ORM entity loading or unit of work, and
+# the compiled SQL comes from the engine's statement cache on every call after the first
+_robots = Robot.__table__
+_SELECT_STATE = select(_robots.c.id, _robots.c.x, _robots.c.y, _robots.c.direction)
+_STATE_BY_ID = _SELECT_STATE.where(_robots.c.id == bindparam("robot_id"))
+_STATES_BY_IDS = _SELECT_STATE.where(_robots.c.id.in_(bindparam("robot_ids", expanding=True)))
+_DEFAULT_STATE = _SELECT_STATE.order_by(_robots.c.id).limit(1)
+# SET columns come from the parameters (x, y, direction)
+_UPDATE_STATE = update(_robots).where(_robots.c.id == bindparam("robot_id"))
+
+
 class RobotRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get_robot(self) -> Optional[Robot]:
-        """singleton - one robot exist"""
-        result = await self.db.execute(select(Robot).limit(1))
+        """default robot - the first one created"""
+        result = await self.db.execute(select(Robot).order_by(Robot.id).limit(1))
         return result.scalar_one_or_none()
 
+    async def get_robot_by_id(self, robot_id: int) -> Optional[Robot]:
+        return await self.db.get(Robot, robot_id)
+
+    async def get_state(self, robot_id: int) -> Optional[RobotState]:
+        row = (await self.db.execute(_STATE_BY_ID, {"robot_id": robot_id})).first()
+        return RobotState(*row) if row is not None else None
+
+    async def get_states_by_ids(self, robot_ids: Iterable[int]) -> dict[int, RobotState]:
+        result = await self.db.execute(_STATES_BY_IDS, {"robot_ids": list(set(robot_ids))})
+        return {row[0]: RobotState(*row) for row in result}
+
+    async def get_default_state(self) -> Optional[RobotState]:
+        """default robot - the first one created"""
+        row = (await self.db.execute(_DEFAULT_STATE)).first()
+        return RobotState(*row) if row is not None else None
+
     async def create_robot(self, x: int, y: int, direction: Direction) -> Robot:
         robot = Robot(x=x, y=y, direction=direction.value)
         self.db.add(robot)
@@ -37,10 +76,49 @@ class RobotRepository:
 
         return robot
 
-    async def update_position(self, robot: Robot, x: int, y: int, direction: Direction) -> Robot:
+    async def get_or_create_state(self) -> RobotState:
+        state = await self.get_default_state()
+        if state is None:
+            robot = await self.get_or_create_robot()
+            state = RobotState(robot.id, robot.x, robot.y, robot.direction)
+        return state
+
+    def set_position(self, robot: Robot, x: int, y: int, direction: Direction) -> None:
+        """stage a position change, flushed by the caller's commit"""
         robot.x = x
         robot.y = y
         robot.direction = direction.value
+
+    async def update_state(self, robot_id: int, x: int, y: int, direction: Direction) -> None:
+        """Core UPDATE without RETURNING (the caller has the values), committed by the caller"""
+        await self.db.execute(
+            _UPDATE_STATE, {"robot_id": robot_id, "x": x, "y": y, "direction": direction.value}
+        )
+
+    async def update_states(self, positions: list[tuple[int, int, int, Direction]]) -> None:
+        """one executemany UPDATE for many (robot_id, x, y, direction), committed by the caller"""
+        await self.db.execute(
+            _UPDATE_STATE,
+            [
+                {"robot_id": robot_id, "x": x, "y": y, "direction": direction.value}
+                for robot_id, x, y, direction in positions
+            ],
+        )
+
+    async def update_position(self, robot: Robot, x: int, y: int, direction: Direction) -> Robot:
+        self.set_position(robot, x, y, direction)
         await self.db.commit()
         await self.db.refresh(robot)
         return robot
+
+    async def update_position_returning(
+        self, robot: Robot, x: int, y: int, direction: Direction
+    ) -> Robot:
+        """UPDATE ... RETURNING instead of commit + refresh, committed by the caller"""
+        result = await self.db.execute(
+            update(Robot)
+            .where(Robot.id == robot.id)
+            .values(x=x, y=y, direction=direction.value)
+            .returning(Robot)
+        )
+        return result.scalar_one()
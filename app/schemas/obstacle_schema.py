@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+
+class ObstacleBulkResponse(BaseModel):
+    received: int = Field(..., description="coordinate rows in the body")
+    changed: int = Field(..., description="obstacles inserted (upsert) or deleted")
+
+    class Config:
+        json_schema_extra = {"example": {"received": 1000000, "changed": 998421}}
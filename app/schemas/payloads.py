@@ -0,0 +1,91 @@
+"""
+Plain-dict response bodies, field for field the same as the response models.
+
+Built from values the services already checked, for routes that encode with
+orjson or msgpack (app/api/serialization.py) instead of validating a model
+per response. tests/test_serialization.py checks each one against its model.
+"""
+
+import hashlib
+from collections.abc import Iterable, Sequence
+from typing import Any, Optional
+
+from sqlalchemy.engine import RowMapping
+
+from app.services.command_engine import ExecutionResult
+from app.utils.enums import Direction
+
+# characters hashed per step, so the hash needs no bytes copy of the whole string
+_HASH_CHUNK = 1 << 22
+
+
+def position_payload(x: int, y: int, direction: Direction) -> dict[str, Any]:
+    """PositionResponse"""
+    return {"x": x, "y": y, "direction": direction.value}
+
+
+def result_payload(result: ExecutionResult, commands: str) -> dict[str, Any]:
+    """CommandResponse"""
+    return {
+        "x": result.x,
+        "y": result.y,
+        "direction": result.direction.value,
+        "commands_executed": commands,
+        "stopped_by_obstacle": result.stopped_by_obstacle,
+        "obstacle_coordinate": result.obstacle_coordinate,
+    }
+
+
+def commands_sha256(commands: str) -> str:
+    digest = hashlib.sha256()
+    for start in range(0, len(commands), _HASH_CHUNK):
+        digest.update(commands[start : start + _HASH_CHUNK].encode("ascii"))
+    return digest.hexdigest()
+
+
+def compact_payload(result: ExecutionResult, commands: str) -> dict[str, Any]:
+    """CompactCommandResponse"""
+    return {
+        "x": result.x,
+        "y": result.y,
+        "direction": result.direction.value,
+        "commands_length": len(commands),
+        "commands_sha256": commands_sha256(commands),
+        "steps_executed": result.steps_executed(commands),
+        "stopped_by_obstacle": result.stopped_by_obstacle,
+        "obstacle_coordinate": result.obstacle_coordinate,
+    }
+
+
+def fleet_payload(
+    robot_ids: Sequence[int], commands: Sequence[str], results: Sequence[ExecutionResult]
+) -> dict[str, Any]:
+    """FleetCommandResponse"""
+    items = []
+    for robot_id, command_string, result in zip(robot_ids, commands, results):
+        item = result_payload(result, command_string)
+        item["robot_id"] = robot_id
+        items.append(item)
+    return {"results": items}
+
+
+def simulate_payload(start: dict[str, Any], results: Iterable[ExecutionResult]) -> dict[str, Any]:
+    """SimulateResponse"""
+    return {
+        "start": start,
+        "results": [
+            {
+                "x": result.x,
+                "y": result.y,
+                "direction": result.direction.value,
+                "stopped_by_obstacle": result.stopped_by_obstacle,
+                "obstacle_coordinate": result.obstacle_coordinate,
+            }
+            for result in results
+        ],
+    }
+
+
+def history_page_payload(rows: Sequence[RowMapping], next_cursor: Optional[int]) -> dict[str, Any]:
+    """CommandHistoryPage; rows hold exactly the CommandHistoryItem columns"""
+    return {"items": [dict(row) for row in rows], "next_cursor": next_cursor}
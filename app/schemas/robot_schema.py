@@ -1,6 +1,7 @@
-from typing import Literal
+from datetime import datetime
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class PositionResponse(BaseModel):
@@ -49,3 +50,184 @@ class CommandResponse(BaseModel):
                 "obstacle_coordinate": None,
             }
         }
+
+
+class CompactCommandResponse(BaseModel):
+    x: int = Field(..., description="final X cord")
+    y: int = Field(..., description="final Y cord")
+    direction: Literal["NORTH", "SOUTH", "EAST", "WEST"] = Field(
+        ..., description="final face direction"
+    )
+    commands_length: int = Field(..., description="number of commands received")
+    commands_sha256: str = Field(..., description="SHA-256 of the command string, hex")
+    steps_executed: int = Field(
+        ..., description="commands run before an obstacle stopped the robot, else all of them"
+    )
+    stopped_by_obstacle: bool = Field(
+        default=False, description="if robot stopped because of obstacle"
+    )
+    obstacle_coordinate: tuple[int, int] | None = Field(
+        default=None, description="if hit by obstacle, its cordinates"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "x": 2,
+                "y": 4,
+                "direction": "WEST",
+                "commands_length": 5,
+                "commands_sha256": "ab9624018073c2636c3ad60a950d6aa26c73577e99e430c78d43e41698d6fec3",
+                "steps_executed": 3,
+                "stopped_by_obstacle": True,
+                "obstacle_coordinate": [1, 4],
+            }
+        }
+
+
+class PlanRequest(BaseModel):
+    x: int = Field(..., description="target X cord")
+    y: int = Field(..., description="target Y cord")
+    direction: Literal["NORTH", "SOUTH", "EAST", "WEST"] | None = Field(
+        default=None, description="target face direction, any if omitted"
+    )
+
+    class Config:
+        json_schema_extra = {"example": {"x": 6, "y": 4, "direction": "NORTH"}}
+
+
+class PlanResponse(BaseModel):
+    commands: str = Field(..., description="shortest command string reaching the target")
+    length: int = Field(..., description="number of commands")
+    start: PositionResponse = Field(..., description="pose the plan starts from")
+    nodes_expanded: int = Field(..., description="search states expanded")
+    cached: bool = Field(..., description="served from the plan cache")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "commands": "RFFLFF",
+                "length": 6,
+                "start": {"x": 4, "y": 2, "direction": "WEST"},
+                "nodes_expanded": 31,
+                "cached": False,
+            }
+        }
+
+
+class SimulateRequest(BaseModel):
+    candidates: list[Annotated[str, Field(pattern="^[FBLR]+$", min_length=1)]] = Field(
+        ...,
+        description="command strings, each run on its own from the same start pose",
+        min_length=1,
+        max_length=100_000,
+    )
+    x: int | None = Field(default=None, description="start X cord, current pose if omitted")
+    y: int | None = Field(default=None, description="start Y cord, current pose if omitted")
+    direction: Literal["NORTH", "SOUTH", "EAST", "WEST"] | None = Field(
+        default=None, description="start face direction, current pose if omitted"
+    )
+
+    @model_validator(mode="after")
+    def check_pose(self) -> "SimulateRequest":
+        given = [value is not None for value in (self.x, self.y, self.direction)]
+        if any(given) and not all(given):
+            raise ValueError("x, y and direction must be given together")
+        return self
+
+    class Config:
+        json_schema_extra = {"example": {"candidates": ["FFRFF", "FLFFB", "RRFF"]}}
+
+
+class SimulationResult(BaseModel):
+    x: int = Field(..., description="final X cord")
+    y: int = Field(..., description="final Y cord")
+    direction: Literal["NORTH", "SOUTH", "EAST", "WEST"] = Field(
+        ..., description="final face direction"
+    )
+    stopped_by_obstacle: bool = Field(
+        default=False, description="if robot stopped because of obstacle"
+    )
+    obstacle_coordinate: tuple[int, int] | None = Field(
+        default=None, description="if hit by obstacle, its cordinates"
+    )
+
+
+class SimulateResponse(BaseModel):
+    start: PositionResponse = Field(..., description="pose every candidate starts from")
+    results: list[SimulationResult] = Field(..., description="one per candidate, in order")
+
+
+class RobotCreateRequest(BaseModel):
+    x: int = Field(..., description="start X cord")
+    y: int = Field(..., description="start Y cord")
+    direction: Literal["NORTH", "SOUTH", "EAST", "WEST"] = Field(
+        ..., description="start face direction"
+    )
+
+    class Config:
+        json_schema_extra = {"example": {"x": 0, "y": 0, "direction": "NORTH"}}
+
+
+class RobotResponse(PositionResponse):
+    id: int = Field(..., description="robot id")
+
+    class Config:
+        json_schema_extra = {"example": {"id": 2, "x": 0, "y": 0, "direction": "NORTH"}}
+
+
+class FleetCommand(CommandRequest):
+    robot_id: int = Field(..., description="robot id")
+
+    class Config:
+        json_schema_extra = {"example": {"robot_id": 2, "commands": "FFRFF"}}
+
+
+class FleetCommandRequest(BaseModel):
+    items: list[FleetCommand] = Field(
+        ...,
+        description="commands per robot, entries for the same robot run in order",
+        min_length=1,
+        max_length=1000,
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"robot_id": 1, "commands": "FLF"},
+                    {"robot_id": 2, "commands": "FFRFF"},
+                ]
+            }
+        }
+
+
+class FleetCommandResult(CommandResponse):
+    robot_id: int = Field(..., description="robot id")
+
+
+class FleetCommandResponse(BaseModel):
+    results: list[FleetCommandResult] = Field(..., description="results in request order")
+
+
+class CommandHistoryItem(BaseModel):
+    id: int = Field(..., description="history id, also the pagination cursor")
+    robot_id: int = Field(..., description="robot id")
+    command_string: str = Field(..., description="commands sent")
+    initial_x: int
+    initial_y: int
+    initial_direction: Literal["NORTH", "SOUTH", "EAST", "WEST"]
+    final_x: int
+    final_y: int
+    final_direction: Literal["NORTH", "SOUTH", "EAST", "WEST"]
+    stopped_by_obstacle: bool
+    obstacle_x: int | None = None
+    obstacle_y: int | None = None
+    created_at: datetime
+
+
+class CommandHistoryPage(BaseModel):
+    items: list[CommandHistoryItem] = Field(..., description="newest first")
+    next_cursor: int | None = Field(
+        default=None, description="pass as cursor to get the next page, null on the last page"
+    )
@@ -0,0 +1,136 @@
+"""
+Request bodies for POST /commands, read as a stream.
+
+Bodies may be compressed (Content-Encoding gzip, or zstd with the optional
+zstandard package) and are refused once they pass max_bytes, compressed or
+decompressed, so a huge or highly compressible body is never held in full.
+
+A text/plain body is the command string itself. Each decompressed chunk is
+checked as it arrives with bytes.translate, which deletes every F, B, L and R:
+anything left is an invalid command. That is one pass in C over the bytes,
+with no JSON string, no regex and no str until the whole body is valid.
+"""
+
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+COMMAND_BYTES = b"FBLR"
+ENCODINGS = ("identity", "gzip", "zstd")
+# decompressed bytes per step, so one small gzip chunk cannot expand all at once
+_OUTPUT_CHUNK = 1 << 20
+
+
+class CommandBodyError(ValueError):
+    """Raised when a command body is malformed."""
+
+
+class CommandBodyTooLarge(CommandBodyError):
+    """Raised when a command body is larger than allowed."""
+
+
+class UnsupportedEncoding(CommandBodyError):
+    """Raised for a Content-Encoding this server cannot decode."""
+
+
+async def _limited(chunks: AsyncIterable[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise CommandBodyTooLarge(f"body larger than {max_bytes} bytes")
+        yield chunk
+
+
+async def _gunzip(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        while True:
+            try:
+                data = decompressor.decompress(chunk, _OUTPUT_CHUNK)
+            except zlib.error as e:
+                raise CommandBodyError(f"invalid gzip body: {e}")
+            if data:
+                yield data
+            chunk = decompressor.unconsumed_tail
+            if not chunk and len(data) < _OUTPUT_CHUNK:
+                break
+    if not decompressor.eof:
+        raise CommandBodyError("truncated gzip body")
+
+
+async def _unzstd(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    async for chunk in chunks:
+        try:
+            data = decompressor.decompress(chunk)
+        except zstandard.ZstdError as e:
+            raise CommandBodyError(f"invalid zstd body: {e}")
+        if data:
+            yield data
+    if not decompressor.eof:
+        raise CommandBodyError("truncated zstd body")
+
+
+def decoded_chunks(
+    chunks: AsyncIterable[bytes], encoding: Optional[str], max_bytes: int
+) -> AsyncIterator[bytes]:
+    """The body's chunks decompressed per Content-Encoding, at most max_bytes either way."""
+    encoding = (encoding or "identity").strip().lower()
+    if encoding not in ENCODINGS:
+        raise UnsupportedEncoding(f"Content-Encoding must be one of {list(ENCODINGS)}")
+    if encoding == "zstd" and zstandard is None:
+        raise UnsupportedEncoding("zstd bodies need the zstandard package on the server")
+
+    chunks = _limited(chunks, max_bytes)
+    if encoding == "gzip":
+        chunks = _limited(_gunzip(chunks), max_bytes)
+    elif encoding == "zstd":
+        chunks = _limited(_unzstd(chunks), max_bytes)
+    return chunks
+
+
+async def read_body(
+    chunks: AsyncIterable[bytes], encoding: Optional[str], max_bytes: int
+) -> bytearray:
+    """The whole decompressed body, in one buffer."""
+    body = bytearray()
+    async for chunk in decoded_chunks(chunks, encoding, max_bytes):
+        body += chunk
+    return body
+
+
+async def read_commands(
+    chunks: AsyncIterable[bytes], encoding: Optional[str], max_bytes: int
+) -> str:
+    """
+    A text/plain command string, validated chunk by chunk.
+
+    Trailing line breaks are allowed, as files and editors add them.
+    """
+    commands = bytearray()
+    ended = False
+    async for chunk in decoded_chunks(chunks, encoding, max_bytes):
+        if ended:
+            if chunk.rstrip(b"\r\n"):
+                raise CommandBodyError(f"commands after a line break at offset {len(commands)}")
+            continue
+        if chunk.translate(None, COMMAND_BYTES):
+            stripped = chunk.rstrip(b"\r\n")
+            offset = len(stripped) - len(stripped.lstrip(COMMAND_BYTES))
+            if offset < len(stripped):
+                raise CommandBodyError(
+                    f"invalid command {chunk[offset : offset + 1]!r} at offset"
+                    f" {len(commands) + offset}, expected F, B, L or R"
+                )
+            chunk, ended = stripped, True
+        commands += chunk
+
+    if not commands:
+        raise CommandBodyError("empty command string")
+    return commands.decode("ascii")
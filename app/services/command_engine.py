@@ -0,0 +1,337 @@
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Literal, Optional
+
+import numpy as np
+
+from app.services.obstacle_store import (
+    StoreKind,
+    build_lines,
+    pack_coordinates,
+    unpack_coordinates,
+)
+from app.utils.enums import Direction
+
+# headings as ints so a turn is just +1 / -1 mod 4
+HEADINGS = (Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST)
+HEADING_INDEX = {direction: index for index, direction in enumerate(HEADINGS)}
+DELTAS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+EngineName = Literal["auto", "stepwise", "segmented", "vectorized"]
+
+# maximal runs of turns or of moves
+_SEGMENT = re.compile(r"[LR]+|[FB]+")
+_STEP = {"F": 1, "B": -1}
+# below this a move run is cheaper to probe cell by cell than to bisect
+_SHORT_RUN = 4
+
+# byte -> turn / move lookup tables for the vectorized engine
+_TURNS = np.zeros(256, dtype=np.int8)
+_TURNS[ord("L")], _TURNS[ord("R")] = -1, 1
+_MOVES = np.zeros(256, dtype=np.int8)
+_MOVES[ord("F")], _MOVES[ord("B")] = 1, -1
+_DX = np.array([dx for dx, _ in DELTAS], dtype=np.int64)
+_DY = np.array([dy for _, dy in DELTAS], dtype=np.int64)
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+# commands simulated per numpy pass, bounds temporary arrays to a few hundred MB
+VECTOR_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class ExecutionResult:
+    x: int
+    y: int
+    direction: Direction
+    stopped_by_obstacle: bool = False
+    obstacle_coordinate: Optional[tuple[int, int]] = None
+    # index of the command that ran into the obstacle, i.e. how many were executed
+    stopped_at: Optional[int] = None
+
+    def steps_executed(self, commands: str) -> int:
+        return self.stopped_at if self.stopped_at is not None else len(commands)
+
+
+class ObstacleIndex:
+    """
+    Compact obstacle map, indexed by column and by row.
+
+    Each direction is either a bitmap of the bounding box or a sorted array of
+    packed int64 keys, whichever is smaller for the map's density (see
+    obstacle_store). Membership, straight-run distances and batch lookups all
+    work on that layout; no Python set or tuples are kept.
+    """
+
+    def __init__(
+        self,
+        coordinates: Iterable[tuple[int, int]] | np.ndarray = (),
+        store: StoreKind = "auto",
+    ):
+        cells = np.asarray(
+            coordinates if isinstance(coordinates, np.ndarray) else list(coordinates),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        if len(cells) and (cells.min() < _INT32_MIN or cells.max() > _INT32_MAX):
+            raise ValueError("obstacle coordinates must fit in 32-bit integers")
+
+        xs, ys = unpack_coordinates(np.unique(pack_coordinates(cells[:, 0], cells[:, 1])))
+        # columns: lines of constant x along y; rows: lines of constant y along x
+        self._columns = build_lines(xs, ys, store)
+        order = np.lexsort((xs, ys))
+        self._rows = build_lines(ys[order], xs[order], store)
+
+    def __contains__(self, coordinate: object) -> bool:
+        x, y = coordinate
+        return self._columns.contains(x, y)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return iter(self._columns)
+
+    @property
+    def store(self) -> str:
+        return self._columns.kind
+
+    @property
+    def nbytes(self) -> int:
+        return self._columns.nbytes + self._rows.nbytes
+
+    def contains_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Boolean mask of which (xs[i], ys[i]) cells are obstacles, any int64 range."""
+        return self._columns.contains_many(xs, ys)
+
+    def nearest(self, x: int, y: int, heading: int) -> tuple[Optional[int], Optional[int]]:
+        """Distance to the closest obstacle ahead of and behind (x, y) along heading."""
+        dx, dy = DELTAS[heading]
+        if dx:
+            up, down = self._rows.neighbours(y, x)
+            sign = dx
+        else:
+            up, down = self._columns.neighbours(x, y)
+            sign = dy
+        return (up, down) if sign > 0 else (down, up)
+
+
+def execute_stepwise(
+    commands: str, x: int, y: int, direction: Direction, obstacles: ObstacleIndex | set
+) -> ExecutionResult:
+    """Reference implementation: one command at a time, one obstacle lookup per move."""
+    heading = HEADING_INDEX[direction]
+
+    for index, command in enumerate(commands):
+        if command == "L":
+            heading = (heading - 1) % 4
+        elif command == "R":
+            heading = (heading + 1) % 4
+        else:
+            dx, dy = DELTAS[heading]
+            if command == "B":
+                dx, dy = -dx, -dy
+            new_x, new_y = x + dx, y + dy
+            if (new_x, new_y) in obstacles:
+                return ExecutionResult(x, y, HEADINGS[heading], True, (new_x, new_y), index)
+            x, y = new_x, new_y
+
+    return ExecutionResult(x, y, HEADINGS[heading])
+
+
+def execute_segmented(
+    commands: str, x: int, y: int, direction: Direction, obstacles: ObstacleIndex
+) -> ExecutionResult:
+    """
+    Compile commands into segments and resolve each one against the obstacle index.
+
+    - a run of turns collapses into its net rotation
+    - a run of moves is a 1D walk along the current heading, so it only needs
+      the nearest obstacle ahead and behind; pure F or B runs never scan the run
+
+    Gives exactly the same result as execute_stepwise.
+    """
+    heading = HEADING_INDEX[direction]
+
+    for match in _SEGMENT.finditer(commands):
+        segment = match.group()
+        if segment[0] in "LR":
+            rights = segment.count("R")
+            heading = (heading + 2 * rights - len(segment)) % 4
+            continue
+
+        dx, dy = DELTAS[heading]
+        if len(segment) < _SHORT_RUN:
+            for offset, command in enumerate(segment):
+                step_x, step_y = (x + dx, y + dy) if command == "F" else (x - dx, y - dy)
+                if (step_x, step_y) in obstacles:
+                    return ExecutionResult(
+                        x, y, HEADINGS[heading], True, (step_x, step_y), match.start() + offset
+                    )
+                x, y = step_x, step_y
+            continue
+
+        ahead, behind = obstacles.nearest(x, y, heading)
+        backwards = segment.count("B")
+
+        if backwards == 0 or backwards == len(segment):
+            # straight run of one command: one nearest() lookup, no scan
+            sign = 1 if backwards == 0 else -1
+            limit = ahead if sign > 0 else behind
+            if limit is not None and limit <= len(segment):
+                x, y = x + sign * (limit - 1) * dx, y + sign * (limit - 1) * dy
+                obstacle = (x + sign * dx, y + sign * dy)
+                stopped_at = match.start() + limit - 1
+                return ExecutionResult(x, y, HEADINGS[heading], True, obstacle, stopped_at)
+            x, y = x + sign * len(segment) * dx, y + sign * len(segment) * dy
+            continue
+
+        # mixed F/B: the walk moves +-1 per step so it must land exactly on a blocked offset
+        offsets = list(accumulate(map(_STEP.__getitem__, segment)))
+        hits = []
+        if ahead is not None and max(offsets) >= ahead:
+            hits.append(offsets.index(ahead))
+        if behind is not None and min(offsets) <= -behind:
+            hits.append(offsets.index(-behind))
+        if (x, y) in obstacles and 0 in offsets:
+            hits.append(offsets.index(0))
+
+        if hits:
+            step = min(hits)
+            moved = offsets[step - 1] if step else 0
+            blocked = offsets[step]
+            obstacle = (x + blocked * dx, y + blocked * dy)
+            x, y = x + moved * dx, y + moved * dy
+            return ExecutionResult(x, y, HEADINGS[heading], True, obstacle, match.start() + step)
+
+        x, y = x + offsets[-1] * dx, y + offsets[-1] * dy
+
+    return ExecutionResult(x, y, HEADINGS[heading])
+
+
+def execute_vectorized(
+    commands: str, x: int, y: int, direction: Direction, obstacles: ObstacleIndex
+) -> ExecutionResult:
+    """
+    Simulate the whole trajectory with numpy and search it for the first collision.
+
+    Headings are a cumulative sum of turns mod 4, per-step deltas come from a
+    lookup table and their cumulative sum is the trajectory; every moved-to cell
+    is looked up in one batch against the obstacle index.
+    Works chunk by chunk so memory stays bounded for huge strings.
+
+    Gives exactly the same result as execute_stepwise.
+    """
+    heading = HEADING_INDEX[direction]
+
+    for start in range(0, len(commands), VECTOR_CHUNK):
+        chunk = commands[start : start + VECTOR_CHUNK]
+        codes = np.frombuffer(chunk.encode("ascii"), dtype=np.uint8)
+
+        headings = (heading + np.cumsum(_TURNS[codes], dtype=np.int64)) % 4
+        moves = _MOVES[codes].astype(np.int64)
+        moved = np.flatnonzero(moves)
+        heading = int(headings[-1])
+        if not len(moved):
+            continue
+
+        dxs = _DX[headings[moved]] * moves[moved]
+        dys = _DY[headings[moved]] * moves[moved]
+        xs = x + np.cumsum(dxs)
+        ys = y + np.cumsum(dys)
+
+        hits = np.flatnonzero(obstacles.contains_many(xs, ys))
+        if len(hits):
+            step = int(hits[0])
+            stop_heading = HEADINGS[int(headings[moved[step]])]
+            obstacle = (int(xs[step]), int(ys[step]))
+            stop_x, stop_y = obstacle[0] - int(dxs[step]), obstacle[1] - int(dys[step])
+            stopped_at = start + int(moved[step])
+            return ExecutionResult(stop_x, stop_y, stop_heading, True, obstacle, stopped_at)
+
+        x, y = int(xs[-1]), int(ys[-1])
+
+    return ExecutionResult(x, y, HEADINGS[heading])
+
+
+def trace_path(
+    commands: str,
+    x: int,
+    y: int,
+    direction: Direction,
+    obstacles: ObstacleIndex,
+    chunk_size: int = VECTOR_CHUNK,
+) -> Iterator[np.ndarray]:
+    """
+    Cells visited by each move, in order, as (n, 2) int64 arrays of (x, y).
+
+    The vectorized engine's trajectory, kept instead of discarded: each chunk of
+    at most chunk_size commands is cumulatively summed straight into a
+    preallocated array, and the last chunk is cut before the first obstacle.
+    Turns visit no cell, so a string of turns yields nothing.
+    """
+    heading = HEADING_INDEX[direction]
+
+    for start in range(0, len(commands), chunk_size):
+        codes = np.frombuffer(commands[start : start + chunk_size].encode("ascii"), dtype=np.uint8)
+        headings = (heading + np.cumsum(_TURNS[codes], dtype=np.int64)) % 4
+        moves = _MOVES[codes].astype(np.int64)
+        moved = np.flatnonzero(moves)
+        heading = int(headings[-1])
+        if not len(moved):
+            continue
+
+        path = np.empty((len(moved), 2), dtype=np.int64)
+        xs, ys = path[:, 0], path[:, 1]
+        np.cumsum(_DX[headings[moved]] * moves[moved], out=xs)
+        np.cumsum(_DY[headings[moved]] * moves[moved], out=ys)
+        xs += x
+        ys += y
+
+        hits = np.flatnonzero(obstacles.contains_many(xs, ys))[:1].tolist()
+        if hits:
+            if hits[0]:
+                yield path[: hits[0]]
+            return
+
+        yield path
+        x, y = int(xs[-1]), int(ys[-1])
+
+
+def mean_run_length(commands: str) -> float:
+    """Average commands per segment, estimated from turns and F/B switches."""
+    breaks = commands.count("L") + commands.count("R") + commands.count("FB") + commands.count("BF")
+    return len(commands) / (breaks + 1)
+
+
+def run_commands(
+    commands: str,
+    x: int,
+    y: int,
+    direction: Direction,
+    obstacles: ObstacleIndex,
+    engine: EngineName = "auto",
+    vectorized_min_commands: int = 300,
+    segmented_min_run_length: int = 24,
+) -> ExecutionResult:
+    """
+    Execute commands with the requested engine.
+
+    "auto" picks segmented for long straight runs, vectorized for long strings
+    that turn often, and the plain stepwise loop for short ones.
+    """
+    if engine == "auto":
+        if mean_run_length(commands) >= segmented_min_run_length:
+            engine = "segmented"
+        elif len(commands) >= vectorized_min_commands:
+            engine = "vectorized"
+        else:
+            engine = "stepwise"
+
+    return ENGINES[engine](commands, x, y, direction, obstacles)
+
+
+ENGINES = {
+    "stepwise": execute_stepwise,
+    "segmented": execute_segmented,
+    "vectorized": execute_vectorized,
+}
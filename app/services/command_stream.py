@@ -0,0 +1,125 @@
+import time
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.repositories.command_history_repository import CommandHistoryRepository, history_row
+from app.repositories.robot_repository import RobotRepository, RobotState
+from app.services.command_engine import ExecutionResult
+from app.services.history_writer import history_writer
+from app.services.obstacle_service import get_obstacles
+from app.services.position_cache import position_cache
+from app.services.robot_actor import robot_actors
+from app.services.robot_service import RobotNotFoundError
+from app.services.simulation import simulate_offloaded
+from app.utils.enums import Direction
+
+
+class CommandStream:
+    """
+    Incremental command execution for one long-lived connection.
+
+    Each chunk runs like a command request (it stops at the first obstacle) but
+    against in-memory state; position and history are written every
+    ws_persist_every chunks or ws_persist_interval seconds, and on close.
+    With robot actors running, each flush hands the pending chunks to the
+    robot's actor instead, which applies them in one group, ordered with the
+    robot's other requests; if another request moved the robot in between,
+    the stream continues from the actor's result.
+    """
+
+    def __init__(self, db: AsyncSession, robot_id: Optional[int] = None):
+        self.db = db
+        self.robot_id = robot_id
+        self.robot_repo = RobotRepository(db)
+        self.history_repo = CommandHistoryRepository(db)
+        self.robot: Optional[RobotState] = None
+        self.x = self.y = 0
+        self.direction = Direction.NORTH
+        self.chunks = 0
+        self._pending: list[dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+
+    async def open(self) -> tuple[int, int, Direction]:
+        if self.robot_id is None:
+            self.robot = await self.robot_repo.get_or_create_state()
+        else:
+            self.robot = await self.robot_repo.get_state(self.robot_id)
+            if self.robot is None:
+                raise RobotNotFoundError([self.robot_id])
+
+        self.x, self.y = self.robot.x, self.robot.y
+        self.direction = Direction(self.robot.direction)
+        self._last_flush = time.monotonic()
+        # the connection may stay open for hours; do not hold a transaction meanwhile
+        await self.db.commit()
+        return self.x, self.y, self.direction
+
+    async def execute(self, commands: str) -> ExecutionResult:
+        """Run one chunk from the current in-memory state."""
+        assert self.robot is not None, "stream not opened"
+        # cache hit unless obstacles changed, so new obstacles are seen mid-stream
+        obstacles = await get_obstacles(self.db, commands, self.x, self.y, self.direction)
+        if self.db.in_transaction():
+            # a cache miss read them; end that transaction, writes wait for flush
+            await self.db.commit()
+        result = await simulate_offloaded(commands, self.x, self.y, self.direction, obstacles)
+
+        obstacle_x, obstacle_y = result.obstacle_coordinate or (None, None)
+        self._pending.append(
+            history_row(
+                robot_id=self.robot.id,
+                command_string=commands,
+                initial_x=self.x,
+                initial_y=self.y,
+                initial_direction=self.direction,
+                final_x=result.x,
+                final_y=result.y,
+                final_direction=result.direction,
+                stopped_by_obstacle=result.stopped_by_obstacle,
+                obstacle_x=obstacle_x,
+                obstacle_y=obstacle_y,
+            )
+        )
+        self.x, self.y, self.direction = result.x, result.y, result.direction
+        self.chunks += 1
+
+        settings = get_settings()
+        if (
+            len(self._pending) >= settings.ws_persist_every
+            or time.monotonic() - self._last_flush >= settings.ws_persist_interval
+        ):
+            await self.flush()
+
+        return result
+
+    async def flush(self) -> None:
+        """Write the current position and the pending history rows in one commit."""
+        if self.robot is None or not self._pending:
+            return
+
+        rows, self._pending = self._pending, []
+        if robot_actors.running:
+            # the actor replays the chunks back to back from the stored pose, so
+            # requests that ran meanwhile are kept; continue from where it ended
+            answers = await robot_actors.execute_many(
+                self.robot.id, [row["command_string"] for row in rows]
+            )
+            _, result = answers[-1]
+            self.x, self.y, self.direction = result.x, result.y, result.direction
+            self._last_flush = time.monotonic()
+            return
+
+        await self.robot_repo.update_state(self.robot.id, self.x, self.y, self.direction)
+        if history_writer.running:
+            await self.db.commit()
+            await history_writer.submit(rows)
+        else:
+            await self.history_repo.bulk_insert_history(rows)
+            await self.db.commit()
+        position_cache.set(self.robot.id, self.x, self.y, self.direction)
+        self._last_flush = time.monotonic()
+
+    async def close(self) -> None:
+        await self.flush()
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logging_config import get_logger
+from app.repositories.command_history_repository import CommandHistoryRepository
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """
+    Write-behind command history.
+
+    Rows go onto a bounded queue and a background task inserts them in batches,
+    flushing when a batch is full or when the oldest queued row has waited
+    flush_interval seconds. A full queue makes submit() wait (backpressure).
+    Rows still queued at stop() are flushed before it returns.
+    """
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue[Any]] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+        self.batch_size = 500
+        self.flush_interval = 0.2
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_queue: int = 10_000,
+    ) -> None:
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._task = asyncio.create_task(self._run(), name="history-writer")
+        logger.info(
+            f"History writer started: batch_size={batch_size}, "
+            f"flush_interval={flush_interval}s, max_queue={max_queue}"
+        )
+
+    async def submit(self, rows: list[dict[str, Any]]) -> None:
+        """Queue history rows, waiting while the queue is full."""
+        assert self._queue is not None, "history writer not started"
+        for row in rows:
+            await self._queue.put(row)
+
+    async def stop(self) -> None:
+        """Drain everything queued so far, then stop the background task."""
+        if not self.running:
+            return
+        assert self._queue is not None and self._task is not None
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info(f"History writer stopped: {self.rows_written} rows in {self.batches} batches")
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await queue.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        row = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    row = queue.get_nowait()
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+
+    async def _flush(self, rows: list[dict[str, Any]]) -> None:
+        assert self._session_factory is not None
+        try:
+            async with self._session_factory() as db:
+                await CommandHistoryRepository(db).bulk_insert_history(rows)
+                await db.commit()
+        except Exception:
+            self.rows_failed += len(rows)
+            logger.exception(f"History writer failed to write {len(rows)} rows")
+            return
+
+        self.rows_written += len(rows)
+        self.batches += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self.queued,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "batches": self.batches,
+        }
+
+
+history_writer = HistoryWriter()
@@ -0,0 +1,75 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Optional
+
+import numpy as np
+
+from app.services.command_engine import ObstacleIndex
+
+
+class ObstacleCache:
+    """
+    Process-wide obstacle snapshot.
+
+    Obstacle writes bump a version counter; a snapshot built for an older
+    version is rebuilt on next access. The counter is per process, so writes
+    made by other workers are not seen until this process writes or restarts.
+    """
+
+    def __init__(self) -> None:
+        self._version = 0
+        self._snapshot: Optional[ObstacleIndex] = None
+        self._snapshot_version = -1
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump_version(self) -> int:
+        """Mark the current snapshot stale (call after obstacle writes commit)."""
+        self._version += 1
+        return self._version
+
+    async def get_snapshot(
+        self, load: Callable[[], Awaitable[Iterable[tuple[int, int]] | np.ndarray]]
+    ) -> ObstacleIndex:
+        """Return the current snapshot, loading obstacles with `load` if it is stale."""
+        snapshot = self._snapshot
+        if snapshot is not None and self._snapshot_version == self._version:
+            self.hits += 1
+            return snapshot
+
+        async with self._lock:
+            # another request may have rebuilt it while we waited
+            if self._snapshot is not None and self._snapshot_version == self._version:
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            version = self._version
+            snapshot = ObstacleIndex(await load())
+            self._snapshot, self._snapshot_version = snapshot, version
+            return snapshot
+
+    def clear(self) -> None:
+        self._snapshot = None
+        self._snapshot_version = -1
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        snapshot = self._snapshot
+        return {
+            "version": self._version,
+            "snapshot_version": self._snapshot_version,
+            "size": len(snapshot) if snapshot is not None else 0,
+            "bytes": snapshot.nbytes if snapshot is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+obstacle_cache = ObstacleCache()
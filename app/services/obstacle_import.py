@@ -0,0 +1,153 @@
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from pathlib import Path
+from typing import Literal, Optional
+
+import numpy as np
+
+ObstacleFormat = Literal["csv", "ndjson", "binary"]
+
+FORMATS_BY_CONTENT_TYPE: dict[str, ObstacleFormat] = {
+    "text/csv": "csv",
+    "text/plain": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/octet-stream": "binary",
+}
+FORMATS_BY_SUFFIX: dict[str, ObstacleFormat] = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".bin": "binary",
+}
+
+# binary bodies are little-endian int32 (x, y) pairs
+_RECORD = np.dtype("<i4")
+_PAIR_BYTES = 2 * _RECORD.itemsize
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+
+
+class ObstacleParseError(ValueError):
+    """Raised when an obstacle body or file is malformed."""
+
+
+def _check_range(coordinates: np.ndarray) -> np.ndarray:
+    if len(coordinates) and (coordinates.min() < _INT32_MIN or coordinates.max() > _INT32_MAX):
+        raise ObstacleParseError("coordinates must fit in 32-bit integers")
+    return coordinates
+
+
+def _parse_csv(data: bytes) -> np.ndarray:
+    lines = [line for line in data.replace(b"\r", b"").split(b"\n") if line.strip()]
+    if not lines:
+        return np.empty((0, 2), dtype=np.int64)
+    if any(line.count(b",") != 1 for line in lines):
+        raise ObstacleParseError("CSV rows must be 'x,y'")
+    try:
+        values = np.array(b",".join(lines).split(b","), dtype=np.bytes_).astype(np.int64)
+    except ValueError as e:
+        raise ObstacleParseError(f"invalid CSV coordinate: {e}")
+    return _check_range(values.reshape(-1, 2))
+
+
+def _parse_ndjson(data: bytes) -> np.ndarray:
+    values = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            x, y = (item["x"], item["y"]) if isinstance(item, dict) else item
+        except (ValueError, KeyError, TypeError) as e:
+            raise ObstacleParseError(f'NDJSON rows must be {{"x": .., "y": ..}} or [x, y]: {e}')
+        if type(x) is not int or type(y) is not int:
+            raise ObstacleParseError(f"NDJSON coordinates must be integers: {line[:80]!r}")
+        values += (x, y)
+    if any(value < _INT32_MIN or value > _INT32_MAX for value in values):
+        raise ObstacleParseError("coordinates must fit in 32-bit integers")
+    return np.array(values, dtype=np.int64).reshape(-1, 2)
+
+
+def _parse_binary(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=_RECORD).reshape(-1, 2).astype(np.int64)
+
+
+_PARSERS: dict[ObstacleFormat, Callable[[bytes], np.ndarray]] = {
+    "csv": _parse_csv,
+    "ndjson": _parse_ndjson,
+    "binary": _parse_binary,
+}
+
+
+def _is_header(line: bytes) -> bool:
+    field = line.split(b",")[0].strip()
+    return bool(field) and not field.lstrip(b"+-").isdigit()
+
+
+async def parse_obstacle_stream(
+    chunks: AsyncIterable[bytes], obstacle_format: ObstacleFormat, batch_size: int = 10_000
+) -> AsyncIterator[np.ndarray]:
+    """
+    Parse a streamed body into (n, 2) int64 coordinate batches of batch_size rows.
+
+    Only complete rows (lines, or 8-byte records) are parsed; the tail of each
+    chunk is carried over to the next one. A CSV header line is skipped.
+    """
+    parse = _PARSERS[obstacle_format]
+    pending: list[np.ndarray] = []
+    pending_rows = 0
+    rest = b""
+    first = obstacle_format == "csv"
+
+    async for chunk in chunks:
+        data = rest + chunk
+        if obstacle_format == "binary":
+            cut = len(data) - len(data) % _PAIR_BYTES
+        else:
+            cut = data.rfind(b"\n") + 1
+        if not cut:
+            rest = data
+            continue
+        complete, rest = data[:cut], data[cut:]
+
+        if first:
+            header, _, body = complete.partition(b"\n")
+            complete = body if _is_header(header) else complete
+            first = False
+
+        coordinates = parse(complete)
+        pending.append(coordinates)
+        pending_rows += len(coordinates)
+        if pending_rows >= batch_size:
+            merged = np.concatenate(pending)
+            full = len(merged) - len(merged) % batch_size
+            for start in range(0, full, batch_size):
+                yield merged[start : start + batch_size]
+            pending, pending_rows = [merged[full:]], len(merged) - full
+
+    if obstacle_format == "binary":
+        if rest:
+            raise ObstacleParseError("binary body is not a whole number of int32 pairs")
+    elif rest.strip():
+        if first and _is_header(rest):
+            rest = b""
+        pending.append(parse(rest))
+    if pending and sum(len(part) for part in pending):
+        yield np.concatenate(pending)
+
+
+async def read_file(path: Path, chunk_size: int = 1 << 20) -> AsyncIterator[bytes]:
+    """A local file as a chunk stream (blocking reads, meant for startup)."""
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def format_for_file(path: Path) -> ObstacleFormat:
+    obstacle_format: Optional[ObstacleFormat] = FORMATS_BY_SUFFIX.get(path.suffix.lower())
+    if obstacle_format is None:
+        raise ObstacleParseError(
+            f"unknown map file type {path.suffix!r}, expected one of {sorted(FORMATS_BY_SUFFIX)}"
+        )
+    return obstacle_format
@@ -1,8 +1,20 @@
+from collections.abc import AsyncIterable
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.core.logging_config import get_logger
+from app.db.models.obstacle import Obstacle
 from app.repositories.obstacle_repository import ObstacleRepository
+from app.services.command_engine import ObstacleIndex
+from app.services.obstacle_cache import obstacle_cache
+from app.services.obstacle_import import format_for_file, parse_obstacle_stream, read_file
+from app.services.obstacle_tiles import obstacle_tiles
+from app.services.path_planner import Bounds
+from app.utils.enums import Direction
 
 logger = get_logger(__name__)
 
@@ -12,6 +24,14 @@ async def initialize_obstacles(db: AsyncSession) -> None:
     settings = get_settings()
     obstacle_repo = ObstacleRepository(db)
 
+    if settings.obstacle_map_file:
+        received, inserted = await load_obstacle_map(db, Path(settings.obstacle_map_file))
+        logger.info(
+            f"Loaded obstacle map {settings.obstacle_map_file}: "
+            f"{received} rows, {inserted} new obstacles"
+        )
+        return
+
     obstacle_coords = settings.parse_obstacles()
 
     if not obstacle_coords:
@@ -24,7 +44,125 @@ async def initialize_obstacles(db: AsyncSession) -> None:
     new_obstacles = obstacle_coords - existing
 
     if new_obstacles:
-        await obstacle_repo.bulk_create_obstacles(new_obstacles)
+        await create_obstacles(db, new_obstacles)
         logger.info(f"Initialized {len(new_obstacles)} obstacles: {new_obstacles}")
     else:
         logger.info(f"Obstacles already initialized: {existing}")
+
+
+async def create_obstacle(db: AsyncSession, x: int, y: int) -> Obstacle:
+    """Add one obstacle; cached snapshots and tiles are rebuilt on next use."""
+    obstacle = await ObstacleRepository(db).create_obstacle(x, y)
+    obstacle_cache.bump_version()
+    return obstacle
+
+
+async def create_obstacles(db: AsyncSession, coordinates: set[tuple[int, int]]) -> list[Obstacle]:
+    """Add obstacles at new coordinates in one commit, then invalidate the caches."""
+    obstacles = await ObstacleRepository(db).bulk_create_obstacles(coordinates)
+    obstacle_cache.bump_version()
+    return obstacles
+
+
+async def get_obstacles(
+    db: AsyncSession, commands: str, x: int, y: int, direction: Direction
+) -> ObstacleIndex:
+    """Obstacles the commands can run into: the whole map, or the tiles along their path."""
+    settings = get_settings()
+    obstacle_repo = ObstacleRepository(db)
+    if settings.obstacle_loading == "tiled":
+        obstacle_tiles.configure(settings.obstacle_tile_size, settings.obstacle_tile_cache_size)
+        return await obstacle_tiles.get_index(
+            obstacle_repo.get_obstacles_in_ranges, commands, x, y, direction
+        )
+    return await obstacle_cache.get_snapshot(obstacle_repo.get_obstacle_array)
+
+
+async def get_obstacle_snapshot(db: AsyncSession) -> Optional[ObstacleIndex]:
+    """The whole-map snapshot, or None when obstacles are loaded by tile."""
+    if get_settings().obstacle_loading == "tiled":
+        return None
+    return await obstacle_cache.get_snapshot(ObstacleRepository(db).get_obstacle_array)
+
+
+async def get_batch_obstacles(
+    db: AsyncSession, candidates: list[str], x: int, y: int, direction: Direction
+) -> ObstacleIndex:
+    """One obstacle snapshot for many command strings run from the same pose."""
+    settings = get_settings()
+    obstacle_repo = ObstacleRepository(db)
+    if settings.obstacle_loading == "tiled":
+        obstacle_tiles.configure(settings.obstacle_tile_size, settings.obstacle_tile_cache_size)
+        return await obstacle_tiles.get_batch_index(
+            obstacle_repo.get_obstacles_in_ranges, candidates, x, y, direction
+        )
+    return await obstacle_cache.get_snapshot(obstacle_repo.get_obstacle_array)
+
+
+async def get_planning_obstacles(
+    db: AsyncSession, start: tuple[int, int], target: tuple[int, int]
+) -> tuple[ObstacleIndex, Optional[Bounds]]:
+    """
+    Obstacles for a route search, and the region it must stay in.
+
+    With tiled loading that region is the box around start and target plus
+    one tile on each side, so detours further out are not found.
+    """
+    settings = get_settings()
+    obstacle_repo = ObstacleRepository(db)
+    if settings.obstacle_loading != "tiled":
+        return await obstacle_cache.get_snapshot(obstacle_repo.get_obstacle_array), None
+
+    obstacle_tiles.configure(settings.obstacle_tile_size, settings.obstacle_tile_cache_size)
+    margin = settings.obstacle_tile_size
+    bounds = (
+        min(start[0], target[0]) - margin,
+        min(start[1], target[1]) - margin,
+        max(start[0], target[0]) + margin,
+        max(start[1], target[1]) + margin,
+    )
+    obstacles = await obstacle_tiles.get_box_index(obstacle_repo.get_obstacles_in_ranges, *bounds)
+    return obstacles, bounds
+
+
+async def warm_obstacle_cache(db: AsyncSession) -> None:
+    """build the process-wide obstacle snapshot"""
+    if get_settings().obstacle_loading == "tiled":
+        logger.info("Obstacles are loaded lazily by tile")
+        return
+    obstacle_repo = ObstacleRepository(db)
+    snapshot = await obstacle_cache.get_snapshot(obstacle_repo.get_obstacle_array)
+    logger.info(f"Obstacle snapshot ready: {len(snapshot)} obstacles")
+
+
+async def import_obstacles(
+    db: AsyncSession, batches: AsyncIterable[np.ndarray], remove: bool = False
+) -> tuple[int, int]:
+    """
+    Upsert (or delete) streamed coordinate batches in one transaction.
+
+    Returns:
+        Tuple of (rows received, obstacles inserted or deleted)
+    """
+    obstacle_repo = ObstacleRepository(db)
+    write = obstacle_repo.delete_obstacles if remove else obstacle_repo.upsert_obstacles
+    received = changed = 0
+    try:
+        async for batch in batches:
+            received += len(batch)
+            changed += await write(batch)
+    except BaseException:
+        await db.rollback()
+        raise
+
+    await obstacle_repo.commit_changes()
+    obstacle_cache.bump_version()
+    return received, changed
+
+
+async def load_obstacle_map(db: AsyncSession, path: Path) -> tuple[int, int]:
+    """Upsert every obstacle in a local map file, format chosen by extension."""
+    batches = parse_obstacle_stream(
+        read_file(path), format_for_file(path), get_settings().obstacle_batch_size
+    )
+    return await import_obstacles(db, batches)
@@ -0,0 +1,257 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from typing import Literal, Optional
+
+import numpy as np
+
+StoreKind = Literal["auto", "bitmap", "sorted"]
+
+_INT32_MIN, _INT32_MAX = -(2**31), 2**31 - 1
+_MINOR_OFFSET = 2**31
+_LOW_32 = 0xFFFFFFFF
+# a sorted key costs 64 bits, a bitmap cell 1: use the bitmap while it is no bigger
+BITMAP_MAX_CELLS_PER_OBSTACLE = 64
+_NONZERO = re.compile(rb"[^\x00]")
+# above this many keys, batch lookups sort their cells first
+_CACHED_KEYS = 1 << 17
+# keys or bitmap bytes decoded per step when iterating
+_ITER_CHUNK = 1 << 20
+
+
+def pack_coordinates(majors: np.ndarray, minors: np.ndarray) -> np.ndarray:
+    """
+    Pack int32-range pairs into one int64 key each.
+
+    The minor value is offset to unsigned, so keys sort like (major, minor)
+    tuples and every line (one major value) is a contiguous key range.
+    """
+    return (majors << 32) | (minors + _MINOR_OFFSET)
+
+
+def unpack_coordinates(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return keys >> 32, (keys & _LOW_32) - _MINOR_OFFSET
+
+
+def _in_int32(*values: np.ndarray) -> np.ndarray:
+    inside = np.ones(len(values[0]), dtype=bool)
+    for value in values:
+        inside &= (value >= _INT32_MIN) & (value <= _INT32_MAX)
+    return inside
+
+
+class SortedLines:
+    """
+    Obstacles as one sorted int64 array of packed (major, minor) keys.
+
+    The keys live in an array.array so scalar lookups bisect it directly (no
+    numpy call per cell); batches use np.searchsorted on a view of the same
+    buffer. 8 bytes per obstacle.
+    """
+
+    kind = "sorted"
+
+    def __init__(self, keys: np.ndarray):
+        self._view = array("q", keys.astype(np.int64).tobytes())
+        self._keys = np.frombuffer(self._view, dtype=np.int64)
+
+    def __getstate__(self) -> array:
+        # the numpy view is rebuilt on load instead of pickled as a second copy
+        return self._view
+
+    def __setstate__(self, view: array) -> None:
+        self._view = view
+        self._keys = np.frombuffer(self._view, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def nbytes(self) -> int:
+        return self._keys.nbytes
+
+    def contains(self, major: int, minor: int) -> bool:
+        if not (_INT32_MIN <= major <= _INT32_MAX and _INT32_MIN <= minor <= _INT32_MAX):
+            return False
+        key = (major << 32) | (minor + _MINOR_OFFSET)
+        index = bisect_left(self._view, key)
+        return index < len(self._view) and self._view[index] == key
+
+    def contains_many(self, majors: np.ndarray, minors: np.ndarray) -> np.ndarray:
+        if not len(self._keys):
+            return np.zeros(len(majors), dtype=bool)
+        inside = _in_int32(majors, minors)
+        packed = pack_coordinates(
+            majors.clip(_INT32_MIN, _INT32_MAX), minors.clip(_INT32_MIN, _INT32_MAX)
+        )
+        if len(self._keys) > _CACHED_KEYS:
+            # sorted needles let each search start where the previous one ended,
+            # instead of a cache miss per bisection step
+            order = np.argsort(packed)
+            found = np.empty_like(order)
+            found[order] = np.searchsorted(self._keys, packed[order])
+        else:
+            found = np.searchsorted(self._keys, packed)
+        found = found.clip(max=len(self._keys) - 1)
+        return inside & (self._keys[found] == packed)
+
+    def neighbours(self, major: int, minor: int) -> tuple[Optional[int], Optional[int]]:
+        """Distance to the closest obstacle above and below minor on line major."""
+        if not _INT32_MIN <= major <= _INT32_MAX:
+            return None, None
+        first = major << 32
+        end = first + (1 << 32)
+        key = first + minor + _MINOR_OFFSET
+        view = self._view
+
+        after = bisect_right(view, key)
+        before = bisect_left(view, key) - 1
+        up = view[after] - key if after < len(view) and view[after] < end else None
+        down = key - view[before] if before >= 0 and view[before] >= first else None
+        return up, down
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for start in range(0, len(self._keys), _ITER_CHUNK):
+            majors, minors = unpack_coordinates(self._keys[start : start + _ITER_CHUNK])
+            yield from zip(majors.tolist(), minors.tolist())
+
+
+class BitmapLines:
+    """
+    Obstacles as one bit per cell of their bounding box, line by line.
+
+    Each line (one major value) is padded to whole bytes, so scanning along a
+    line is a byte search: a regex over the bytes forwards, growing windows
+    backwards. 1 bit per cell of the bounding box.
+    """
+
+    kind = "bitmap"
+
+    def __init__(self, majors: np.ndarray, minors: np.ndarray):
+        self._count = len(majors)
+        self._major0 = int(majors.min())
+        self._minor0 = int(minors.min())
+        self._lines = int(majors.max()) - self._major0 + 1
+        self._line_bits = int(minors.max()) - self._minor0 + 1
+        self._line_bytes = (self._line_bits + 7) // 8
+
+        # cells come sorted by (major, minor) and are distinct, so the bits of
+        # one byte can be summed instead of or-ed
+        offsets = (majors - self._major0) * self._line_bytes * 8 + (minors - self._minor0)
+        byte_index = offsets >> 3
+        bits = np.left_shift(1, offsets & 7).astype(np.uint8)
+        starts = np.flatnonzero(np.diff(byte_index, prepend=-1))
+        buffer = np.zeros(self._lines * self._line_bytes, dtype=np.uint8)
+        buffer[byte_index[starts]] = np.add.reduceat(bits, starts)
+
+        self._bits = buffer.tobytes()
+        self._array = np.frombuffer(self._bits, dtype=np.uint8)
+
+    def __getstate__(self) -> dict:
+        return {key: value for key, value in self.__dict__.items() if key != "_array"}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._array = np.frombuffer(self._bits, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+    def contains(self, major: int, minor: int) -> bool:
+        line = major - self._major0
+        position = minor - self._minor0
+        if 0 <= line < self._lines and 0 <= position < self._line_bits:
+            return bool(self._bits[line * self._line_bytes + (position >> 3)] >> (position & 7) & 1)
+        return False
+
+    def contains_many(self, majors: np.ndarray, minors: np.ndarray) -> np.ndarray:
+        lines = majors - self._major0
+        positions = minors - self._minor0
+        inside = (lines >= 0) & (lines < self._lines) & (positions >= 0)
+        inside &= positions < self._line_bits
+        index = np.where(inside, lines * self._line_bytes + (positions >> 3), 0)
+        return inside & ((self._array[index] >> (positions & 7)) & 1).astype(bool)
+
+    def neighbours(self, major: int, minor: int) -> tuple[Optional[int], Optional[int]]:
+        """Distance to the closest obstacle above and below minor on line major."""
+        line = major - self._major0
+        if not 0 <= line < self._lines:
+            return None, None
+        base = line * self._line_bytes
+        position = minor - self._minor0
+
+        up = down = None
+        start = max(position + 1, 0)
+        if start < self._line_bits:
+            found = self._next_bit(base, start)
+            up = found - position if found is not None else None
+        end = min(position - 1, self._line_bits - 1)
+        if end >= 0:
+            found = self._previous_bit(base, end)
+            down = position - found if found is not None else None
+        return up, down
+
+    def _next_bit(self, base: int, start: int) -> Optional[int]:
+        """First set bit at or after start on the line at byte offset base."""
+        index = base + (start >> 3)
+        first = self._bits[index] >> (start & 7)
+        if first:
+            return start + ((first & -first).bit_length() - 1)
+        match = _NONZERO.search(self._bits, index + 1, base + self._line_bytes)
+        if match is None:
+            return None
+        index = match.start()
+        value = self._bits[index]
+        return (index - base) * 8 + (value & -value).bit_length() - 1
+
+    def _previous_bit(self, base: int, end: int) -> Optional[int]:
+        """Last set bit at or before end on the line at byte offset base."""
+        index = base + (end >> 3)
+        first = self._bits[index] & ((2 << (end & 7)) - 1)
+        if first:
+            return (end & ~7) + first.bit_length() - 1
+        # doubling windows keep the cost proportional to the distance found
+        high, window = index, 64
+        while high > base:
+            low = max(base, high - window)
+            chunk = self._bits[low:high].rstrip(b"\x00")
+            if chunk:
+                index = low + len(chunk) - 1
+                return (index - base) * 8 + self._bits[index].bit_length() - 1
+            high, window = low, window * 2
+        return None
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        line_bits = self._line_bytes * 8
+        step = max(1, _ITER_CHUNK // self._line_bytes) * self._line_bytes
+        for start in range(0, len(self._array), step):
+            cells = np.flatnonzero(
+                np.unpackbits(self._array[start : start + step], bitorder="little")
+            )
+            cells += start * 8
+            majors = cells // line_bits + self._major0
+            minors = cells % line_bits + self._minor0
+            yield from zip(majors.tolist(), minors.tolist())
+
+
+def build_lines(majors: np.ndarray, minors: np.ndarray, kind: StoreKind = "auto"):
+    """
+    The smaller of the two layouts for these obstacles, or the one asked for.
+
+    majors and minors must be distinct pairs sorted by (major, minor).
+    """
+    if kind == "auto":
+        kind = "sorted"
+        if len(majors):
+            lines = int(majors.max() - majors.min()) + 1
+            line_bytes = (int(minors.max() - minors.min()) + 8) // 8
+            if lines * line_bytes * 8 <= BITMAP_MAX_CELLS_PER_OBSTACLE * len(majors):
+                kind = "bitmap"
+    if kind == "bitmap" and len(majors):
+        return BitmapLines(majors, minors)
+    return SortedLines(pack_coordinates(majors, minors))
@@ -0,0 +1,217 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+import numpy as np
+
+from app.services.command_engine import ObstacleIndex, trace_path
+from app.services.obstacle_cache import obstacle_cache
+from app.services.obstacle_store import pack_coordinates, unpack_coordinates
+from app.utils.enums import Direction
+
+TileKey = tuple[int, int]
+# inclusive (x_min, x_max, y_min, y_max) boxes
+CellRange = tuple[int, int, int, int]
+
+_NO_OBSTACLES = ObstacleIndex()
+# region indexes kept for repeated requests over the same tiles
+_REGIONS = 16
+
+
+def tiles_on_path(
+    commands: str, x: int, y: int, direction: Direction, tile_size: int
+) -> list[TileKey]:
+    """
+    Tiles of every cell the commands visit when nothing is in the way.
+
+    A real run follows the same cells until its first collision and stops,
+    so these tiles hold every obstacle the commands can run into.
+    """
+    tiles = {(x // tile_size, y // tile_size)}
+    for path in trace_path(commands, x, y, direction, _NO_OBSTACLES):
+        keys = np.unique(pack_coordinates(path[:, 0] // tile_size, path[:, 1] // tile_size))
+        tile_xs, tile_ys = unpack_coordinates(keys)
+        tiles.update(zip(tile_xs.tolist(), tile_ys.tolist()))
+    return sorted(tiles, key=lambda tile: (tile[1], tile[0]))
+
+
+def tile_ranges(tiles: list[TileKey], tile_size: int) -> list[CellRange]:
+    """Cell boxes covering tiles, neighbours in a tile row merged into one box."""
+    ranges: list[CellRange] = []
+    run_start = previous = None
+    for tile in sorted(tiles, key=lambda tile: (tile[1], tile[0])):
+        if previous is None or tile != (previous[0] + 1, previous[1]):
+            if previous is not None:
+                ranges.append(_box(run_start, previous, tile_size))
+            run_start = tile
+        previous = tile
+    if previous is not None:
+        ranges.append(_box(run_start, previous, tile_size))
+    return ranges
+
+
+def _box(first: TileKey, last: TileKey, tile_size: int) -> CellRange:
+    return (
+        first[0] * tile_size,
+        (last[0] + 1) * tile_size - 1,
+        first[1] * tile_size,
+        (first[1] + 1) * tile_size - 1,
+    )
+
+
+class TileCache:
+    """
+    Obstacles loaded tile by tile, on first touch, into an LRU of tiles.
+
+    A request gets an ObstacleIndex over just the tiles on its path, so
+    memory and query cost follow the region robots visit, not the map size.
+    Like ObstacleCache, every tile is dropped when the obstacle version moves.
+    """
+
+    def __init__(self, tile_size: int = 256, capacity: int = 4096) -> None:
+        self.tile_size = tile_size
+        self.capacity = capacity
+        self._tiles: OrderedDict[TileKey, np.ndarray] = OrderedDict()
+        self._regions: OrderedDict[frozenset[TileKey], ObstacleIndex] = OrderedDict()
+        self._version = obstacle_cache.version
+        # bumped whenever every tile is dropped
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+
+    def configure(self, tile_size: int, capacity: int) -> None:
+        if tile_size != self.tile_size:
+            self._drop_tiles()
+        self.tile_size, self.capacity = tile_size, capacity
+
+    async def get_index(
+        self,
+        load: Callable[[list[CellRange]], Awaitable[np.ndarray]],
+        commands: str,
+        x: int,
+        y: int,
+        direction: Direction,
+    ) -> ObstacleIndex:
+        """Obstacles on the tiles the commands can reach from (x, y), loading missing tiles."""
+        if self._version != obstacle_cache.version:
+            self._drop_tiles()
+        return await self._region(load, tiles_on_path(commands, x, y, direction, self.tile_size))
+
+    async def get_batch_index(
+        self,
+        load: Callable[[list[CellRange]], Awaitable[np.ndarray]],
+        candidates: list[str],
+        x: int,
+        y: int,
+        direction: Direction,
+    ) -> ObstacleIndex:
+        """One index over the tiles any of the candidates can reach from (x, y)."""
+        if self._version != obstacle_cache.version:
+            self._drop_tiles()
+        tiles: set[TileKey] = set()
+        for commands in candidates:
+            tiles.update(tiles_on_path(commands, x, y, direction, self.tile_size))
+        return await self._region(load, sorted(tiles, key=lambda tile: (tile[1], tile[0])))
+
+    async def get_box_index(
+        self,
+        load: Callable[[list[CellRange]], Awaitable[np.ndarray]],
+        x_min: int,
+        y_min: int,
+        x_max: int,
+        y_max: int,
+    ) -> ObstacleIndex:
+        """Obstacles on every tile overlapping the box, loading missing tiles."""
+        if self._version != obstacle_cache.version:
+            self._drop_tiles()
+        size = self.tile_size
+        tiles = [
+            (tile_x, tile_y)
+            for tile_y in range(y_min // size, y_max // size + 1)
+            for tile_x in range(x_min // size, x_max // size + 1)
+        ]
+        return await self._region(load, tiles)
+
+    async def _region(
+        self, load: Callable[[list[CellRange]], Awaitable[np.ndarray]], tiles: list[TileKey]
+    ) -> ObstacleIndex:
+        # other requests may evict or drop tiles while this one waits, so the
+        # arrays it uses are taken as soon as they are seen
+        generation = self._generation
+        found = {tile: self._tiles[tile] for tile in tiles if tile in self._tiles}
+        missing = [tile for tile in tiles if tile not in found]
+        if missing:
+            async with self._lock:
+                # another request may have loaded them while we waited
+                found.update((tile, self._tiles[tile]) for tile in missing if tile in self._tiles)
+                missing = [tile for tile in missing if tile not in found]
+                if missing:
+                    self.loads += 1
+                    cells = await load(tile_ranges(missing, self.tile_size))
+                    found.update(self._split_tiles(missing, cells))
+        self.misses += len(missing)
+        self.hits += len(tiles) - len(missing)
+
+        if generation != self._generation:
+            # the tiles were dropped meanwhile: answer this request, cache nothing
+            return ObstacleIndex(np.concatenate([found[tile] for tile in tiles]))
+
+        for tile in tiles:
+            self._tiles[tile] = found[tile]
+            self._tiles.move_to_end(tile)
+        key = frozenset(tiles)
+        region = self._regions.get(key)
+        if region is None:
+            region = ObstacleIndex(np.concatenate([found[tile] for tile in tiles]))
+            self._regions[key] = region
+            if len(self._regions) > _REGIONS:
+                self._regions.popitem(last=False)
+        else:
+            self._regions.move_to_end(key)
+
+        while len(self._tiles) > self.capacity:
+            self._tiles.popitem(last=False)
+            self.evictions += 1
+        return region
+
+    def _split_tiles(self, tiles: list[TileKey], cells: np.ndarray) -> dict[TileKey, np.ndarray]:
+        keys = pack_coordinates(cells[:, 0] // self.tile_size, cells[:, 1] // self.tile_size)
+        order = np.argsort(keys, kind="stable")
+        keys, cells = keys[order], cells[order].astype(np.int32)
+        unique, starts = np.unique(keys, return_index=True)
+        by_tile = dict(zip(unique.tolist(), np.split(cells, starts[1:]) if len(cells) else []))
+
+        empty = np.empty((0, 2), dtype=np.int32)
+        return {
+            tile: by_tile.get(int(pack_coordinates(np.int64(tile[0]), np.int64(tile[1]))), empty)
+            for tile in tiles
+        }
+
+    def _drop_tiles(self) -> None:
+        self._generation += 1
+        self._tiles.clear()
+        self._regions.clear()
+        self._version = obstacle_cache.version
+
+    def clear(self) -> None:
+        self._drop_tiles()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "tiles": len(self._tiles),
+            "obstacles": sum(len(cells) for cells in self._tiles.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "loads": self.loads,
+        }
+
+
+obstacle_tiles = TileCache()
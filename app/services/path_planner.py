@@ -0,0 +1,124 @@
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.services.command_engine import DELTAS, HEADING_INDEX, ObstacleIndex
+from app.utils.enums import Direction
+
+# inclusive (x_min, y_min, x_max, y_max) the search may not leave
+Bounds = tuple[int, int, int, int]
+
+# time.perf_counter is checked once per this many expansions
+_CLOCK_EVERY = 1024
+
+
+class NoPathError(Exception):
+    """Raised when no command string reaches the target within the search limits."""
+
+
+@dataclass(frozen=True)
+class Plan:
+    commands: str
+    nodes_expanded: int
+
+
+def _turns(a: int, b: int) -> int:
+    return min((a - b) % 4, (b - a) % 4)
+
+
+def _heuristic(
+    x: int, y: int, heading: int, target_x: int, target_y: int, target_heading: Optional[int]
+) -> int:
+    """Moves left plus the fewest turns still needed; never overestimates."""
+    dx, dy = target_x - x, target_y - y
+    # F and B both move along the heading's axis, leaving the axis needs a turn
+    off_axis = dy != 0 if heading % 2 else dx != 0
+    turns = 1 if off_axis else 0
+    if target_heading is not None:
+        # turning off the axis and back costs at least two
+        back = off_axis and target_heading % 2 == heading % 2
+        turns = max(2 if back else turns, _turns(heading, target_heading))
+    return abs(dx) + abs(dy) + turns
+
+
+def plan_path(
+    obstacles: ObstacleIndex,
+    x: int,
+    y: int,
+    direction: Direction,
+    target_x: int,
+    target_y: int,
+    target_direction: Optional[Direction] = None,
+    max_nodes: int = 200_000,
+    time_limit: float = 2.0,
+    bounds: Optional[Bounds] = None,
+) -> Plan:
+    """
+    Shortest F/B/L/R string from a pose to a target cell (and heading), by A*.
+
+    States are (x, y, heading) and every command costs one, so turns count
+    like moves and the result is the shortest command string. The heuristic
+    is the Manhattan distance plus a lower bound on the turns left.
+    Raises NoPathError when the target is blocked or out of bounds, the open
+    set runs out, or max_nodes / time_limit is reached.
+    """
+    target_heading = HEADING_INDEX[target_direction] if target_direction is not None else None
+    if (target_x, target_y) in obstacles:
+        raise NoPathError(f"target ({target_x}, {target_y}) is an obstacle")
+    if bounds is not None:
+        x_min, y_min, x_max, y_max = bounds
+        if not (x_min <= target_x <= x_max and y_min <= target_y <= y_max):
+            raise NoPathError("target is outside the searchable region")
+
+    start = (x, y, HEADING_INDEX[direction])
+    best = {start: 0}
+    came_from: dict[tuple[int, int, int], tuple[tuple[int, int, int], str]] = {}
+    # ties on the estimate go to the deepest state, which runs straight at the target
+    open_set = [(_heuristic(*start, target_x, target_y, target_heading), 0, start)]
+    deadline = time.perf_counter() + time_limit
+    expanded = 0
+
+    while open_set:
+        _, depth, state = heapq.heappop(open_set)
+        cost = -depth
+        if cost > best[state]:
+            continue
+        x, y, heading = state
+        if x == target_x and y == target_y and target_heading in (None, heading):
+            return Plan(_commands(came_from, state), expanded)
+
+        expanded += 1
+        if expanded > max_nodes:
+            raise NoPathError(f"no path found within {max_nodes} search nodes")
+        if expanded % _CLOCK_EVERY == 0 and time.perf_counter() > deadline:
+            raise NoPathError(f"no path found within {time_limit}s")
+
+        dx, dy = DELTAS[heading]
+        for command, nx, ny, nh in (
+            ("F", x + dx, y + dy, heading),
+            ("B", x - dx, y - dy, heading),
+            ("L", x, y, (heading - 1) % 4),
+            ("R", x, y, (heading + 1) % 4),
+        ):
+            if command in "FB":
+                if (nx, ny) in obstacles:
+                    continue
+                if bounds is not None and not (x_min <= nx <= x_max and y_min <= ny <= y_max):
+                    continue
+            neighbour = (nx, ny, nh)
+            if cost + 1 < best.get(neighbour, cost + 2):
+                best[neighbour] = cost + 1
+                came_from[neighbour] = (state, command)
+                estimate = cost + 1 + _heuristic(nx, ny, nh, target_x, target_y, target_heading)
+                heapq.heappush(open_set, (estimate, -cost - 1, neighbour))
+
+    raise NoPathError(f"target ({target_x}, {target_y}) is unreachable")
+
+
+def _commands(came_from: dict, state: tuple[int, int, int]) -> str:
+    commands = []
+    while state in came_from:
+        state, command = came_from[state]
+        commands.append(command)
+    return "".join(reversed(commands))
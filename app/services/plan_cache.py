@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from typing import Optional
+
+from app.services.path_planner import Plan
+
+# (x, y, direction, target_x, target_y, target_direction, obstacle version)
+PlanKey = tuple[int, int, str, int, int, Optional[str], int]
+
+
+class PlanCache:
+    """
+    LRU of planned routes.
+
+    Keys carry the obstacle version, so a plan is never served after the
+    obstacles it was searched on changed. Failed searches are not cached.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self._plans: OrderedDict[PlanKey, Plan] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: PlanKey) -> Optional[Plan]:
+        plan = self._plans.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        self._plans.move_to_end(key)
+        self.hits += 1
+        return plan
+
+    def put(self, key: PlanKey, plan: Plan) -> None:
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.capacity:
+            self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        self._plans.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._plans), "hits": self.hits, "misses": self.misses}
+
+
+plan_cache = PlanCache()
@@ -0,0 +1,82 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from app.utils.enums import Direction
+
+
+@dataclass(frozen=True)
+class CachedPosition:
+    robot_id: int
+    x: int
+    y: int
+    direction: Direction
+    version: int
+    etag: str
+
+
+class PositionCache:
+    """
+    Process-wide last committed position of each robot.
+
+    Every command path stores the position right after its commit, so reads are
+    served from memory; the database is only read for robots not seen yet
+    (cold start). Each store takes the next value of one monotonically
+    increasing counter, which together with a per-process epoch forms the
+    ETag. Like the obstacle cache this is per process: with several workers,
+    writes made by another worker are not seen here.
+    """
+
+    def __init__(self) -> None:
+        self._positions: dict[int, CachedPosition] = {}
+        self._version = 0
+        # a restarted process must not reuse the ETags of the previous one
+        self.epoch = os.urandom(4).hex()
+        self.default_robot_id: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, robot_id: Optional[int]) -> Optional[CachedPosition]:
+        """Cached position of a robot (the default robot when id is None)."""
+        if robot_id is None:
+            robot_id = self.default_robot_id
+        cached = self._positions.get(robot_id) if robot_id is not None else None
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    def set(self, robot_id: int, x: int, y: int, direction: Direction) -> CachedPosition:
+        """Store a position (call after the write commits)."""
+        self._version += 1
+        cached = CachedPosition(
+            robot_id, x, y, direction, self._version, f'"{self.epoch}-{self._version}"'
+        )
+        self._positions[robot_id] = cached
+        return cached
+
+    def fill(self, robot_id: int, x: int, y: int, direction: Direction) -> CachedPosition:
+        """
+        Store a position read from the database, unless a command stored a newer
+        one while the read was in flight.
+        """
+        cached = self._positions.get(robot_id)
+        return cached if cached is not None else self.set(robot_id, x, y, direction)
+
+    def clear(self) -> None:
+        self._positions.clear()
+        self.default_robot_id = None
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "version": self._version,
+            "robots": len(self._positions),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+position_cache = PositionCache()
@@ -0,0 +1,233 @@
+import asyncio
+import contextvars
+from functools import partial
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logging_config import get_logger
+from app.db.instrumentation import RequestDbStats, request_db_stats
+from app.repositories.command_history_repository import CommandHistoryRepository, history_row
+from app.repositories.robot_repository import RobotRepository
+from app.services.command_engine import ExecutionResult
+from app.services.history_writer import history_writer
+from app.services.obstacle_service import get_obstacles
+from app.services.position_cache import position_cache
+from app.services.simulation import simulate_sequence
+from app.utils.enums import Direction
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+# robot pose before a request's commands ran
+Pose = tuple[int, int, Direction]
+
+
+class RobotActor:
+    """
+    Serializes command requests for one robot.
+
+    Requests queue up and a single task applies them in arrival order. Whatever
+    is queued when the task picks up work (up to max_group requests) runs as one
+    group: the robot row is read once, the commands run back to back, and the
+    position and every history row are written in one commit. Each caller gets
+    its start pose and result, or the group's exception if the commit fails.
+
+    The task runs in a context of its own, so the group's SQL is not counted on
+    whichever request created the actor; it is reported to every waiting
+    caller as actor_statements / actor_seconds instead.
+    """
+
+    def __init__(
+        self,
+        robot_id: int,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_group: int = 100,
+    ):
+        self.robot_id = robot_id
+        self.max_group = max_group
+        self.requests = 0
+        self.groups = 0
+        self._session_factory = session_factory
+        self._queue: asyncio.Queue[Any] = asyncio.Queue()
+        self._task = asyncio.create_task(
+            self._run(), name=f"robot-actor-{robot_id}", context=contextvars.Context()
+        )
+
+    async def execute(self, commands: str) -> tuple[Pose, ExecutionResult]:
+        return (await self.execute_many([commands]))[0]
+
+    async def execute_many(self, commands: list[str]) -> list[tuple[Pose, ExecutionResult]]:
+        """Queue several command strings back to back; no other request runs between them."""
+        loop = asyncio.get_running_loop()
+        caller_stats = request_db_stats.get()
+        futures: list[asyncio.Future[tuple[Pose, ExecutionResult]]] = []
+        for command_string in commands:
+            future = loop.create_future()
+            self._queue.put_nowait((command_string, future, caller_stats))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def stop(self) -> None:
+        """Finish everything queued so far, then stop."""
+        await self._queue.put(_STOP)
+        await self._task
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+
+            group = [first]
+            while len(group) < self.max_group and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                    break
+                group.append(item)
+
+            await self._apply(group)
+
+    async def _apply(
+        self, group: list[tuple[str, asyncio.Future[Any], Optional[RequestDbStats]]]
+    ) -> None:
+        group_stats = RequestDbStats()
+        token = request_db_stats.set(group_stats)
+        try:
+            async with self._session_factory() as db:
+                results = await self._commit_group(db, [commands for commands, _, _ in group])
+        except Exception as e:
+            logger.exception(f"Robot {self.robot_id}: group of {len(group)} requests failed")
+            self._charge(group, group_stats)
+            for _, future, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            request_db_stats.reset(token)
+
+        self.requests += len(group)
+        self.groups += 1
+        self._charge(group, group_stats)
+        for (_, future, _), result in zip(group, results):
+            # a caller that went away still had its commands applied
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _charge(
+        group: list[tuple[str, Any, Optional[RequestDbStats]]], spent: RequestDbStats
+    ) -> None:
+        # once per request, even when it queued several entries (a fleet batch)
+        callers = {id(stats): stats for _, _, stats in group if stats is not None}
+        for stats in callers.values():
+            stats.actor_statements += spent.statements
+            stats.actor_seconds += spent.seconds
+
+    async def _commit_group(
+        self, db: AsyncSession, commands: list[str]
+    ) -> list[tuple[Pose, ExecutionResult]]:
+        robot_repo = RobotRepository(db)
+        robot = await robot_repo.get_state(self.robot_id)
+        if robot is None:
+            raise LookupError(f"Robot not found: {self.robot_id}")
+
+        x, y, direction = robot.x, robot.y, Direction(robot.direction)
+        results = await simulate_sequence(commands, x, y, direction, partial(get_obstacles, db))
+
+        rows = []
+        answers = []
+        for command_string, result in zip(commands, results):
+            answers.append(((x, y, direction), result))
+            obstacle_x, obstacle_y = result.obstacle_coordinate or (None, None)
+            rows.append(
+                history_row(
+                    robot_id=robot.id,
+                    command_string=command_string,
+                    initial_x=x,
+                    initial_y=y,
+                    initial_direction=direction,
+                    final_x=result.x,
+                    final_y=result.y,
+                    final_direction=result.direction,
+                    stopped_by_obstacle=result.stopped_by_obstacle,
+                    obstacle_x=obstacle_x,
+                    obstacle_y=obstacle_y,
+                )
+            )
+            x, y, direction = result.x, result.y, result.direction
+
+        await robot_repo.update_state(robot.id, x, y, direction)
+        if history_writer.running:
+            await db.commit()
+            await history_writer.submit(rows)
+        else:
+            await CommandHistoryRepository(db).bulk_insert_history(rows)
+            await db.commit()
+        position_cache.set(robot.id, x, y, direction)
+        return answers
+
+
+class RobotActors:
+    """
+    One RobotActor per robot, created on first use.
+
+    This replaces read-modify-write races between concurrent requests with
+    in-process ordering, so it only holds within a single worker process.
+    """
+
+    def __init__(self) -> None:
+        self._actors: dict[int, RobotActor] = {}
+        self._session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+        self.max_group = 100
+
+    @property
+    def running(self) -> bool:
+        return self._session_factory is not None
+
+    def start(
+        self, session_factory: async_sessionmaker[AsyncSession], max_group: int = 100
+    ) -> None:
+        self._session_factory = session_factory
+        self.max_group = max_group
+        logger.info(f"Robot actors started: max_group={max_group}")
+
+    def _actor(self, robot_id: int) -> RobotActor:
+        assert self._session_factory is not None, "robot actors not started"
+        actor = self._actors.get(robot_id)
+        if actor is None:
+            actor = RobotActor(robot_id, self._session_factory, self.max_group)
+            self._actors[robot_id] = actor
+        return actor
+
+    async def execute(self, robot_id: int, commands: str) -> tuple[Pose, ExecutionResult]:
+        """Queue commands for a robot; returns its pose before them and the result."""
+        return await self._actor(robot_id).execute(commands)
+
+    async def execute_many(
+        self, robot_id: int, commands: list[str]
+    ) -> list[tuple[Pose, ExecutionResult]]:
+        """Queue several command strings for a robot, applied back to back."""
+        return await self._actor(robot_id).execute_many(commands)
+
+    async def stop(self) -> None:
+        """Finish queued requests of every robot."""
+        if not self.running:
+            return
+        actors, self._actors = self._actors, {}
+        self._session_factory = None
+        await asyncio.gather(*(actor.stop() for actor in actors.values()))
+        logger.info(f"Robot actors stopped: {len(actors)} actors")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "actors": len(self._actors),
+            "requests": sum(actor.requests for actor in self._actors.values()),
+            "groups": sum(actor.groups for actor in self._actors.values()),
+        }
+
+
+robot_actors = RobotActors()
@@ -1,28 +1,211 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from functools import partial
 from typing import Optional
 
+import numpy as np
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repositories.command_history_repository import CommandHistoryRepository
-from app.repositories.obstacle_repository import ObstacleRepository
-from app.repositories.robot_repository import RobotRepository
+from app.core.config import get_settings
+from app.db.models.robot import Robot
+from app.repositories.command_history_repository import CommandHistoryRepository, history_row
+from app.repositories.robot_repository import RobotRepository, RobotState
+from app.services.command_engine import ExecutionResult, ObstacleIndex, trace_path
+from app.services.history_writer import history_writer
+from app.services.obstacle_cache import obstacle_cache
+from app.services.obstacle_service import (
+    get_batch_obstacles,
+    get_obstacle_snapshot,
+    get_obstacles,
+    get_planning_obstacles,
+)
+from app.services.path_planner import Plan, plan_path
+from app.services.plan_cache import plan_cache
+from app.services.position_cache import CachedPosition, position_cache
+from app.services.robot_actor import Pose, robot_actors
+from app.services.simulation import (
+    engine_options,
+    simulate_candidates,
+    simulate_fleet,
+    simulate_offloaded,
+    simulate_sequence,
+)
+from app.services.simulation_pool import simulation_pool
 from app.utils.enums import Direction
 
 
+class RobotNotFoundError(LookupError):
+    """Raised when a robot id does not exist."""
+
+    def __init__(self, robot_ids: list[int]):
+        self.robot_ids = robot_ids
+        super().__init__(f"Robot(s) not found: {robot_ids}")
+
+
 class RobotService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
         self.robot_repo = RobotRepository(db)
         self.history_repo = CommandHistoryRepository(db)
-        self.obstacle_repo = ObstacleRepository(db)
 
-    async def get_position(self) -> tuple[int, int, Direction]:
+    async def _get_robot(self, robot_id: Optional[int]) -> Robot:
+        """Robot by id, or the default robot (created on first use) when id is None."""
+        if robot_id is None:
+            return await self.robot_repo.get_or_create_robot()
+
+        robot = await self.robot_repo.get_robot_by_id(robot_id)
+        if robot is None:
+            raise RobotNotFoundError([robot_id])
+        return robot
+
+    async def _get_state(self, robot_id: Optional[int]) -> RobotState:
+        """Like _get_robot, as plain values read with a Core select."""
+        if robot_id is None:
+            return await self.robot_repo.get_or_create_state()
+
+        state = await self.robot_repo.get_state(robot_id)
+        if state is None:
+            raise RobotNotFoundError([robot_id])
+        return state
+
+    async def get_position(self, robot_id: Optional[int] = None) -> tuple[int, int, Direction]:
         """Get current robot position."""
-        robot = await self.robot_repo.get_or_create_robot()
+        robot = await self._get_state(robot_id)
         return robot.x, robot.y, Direction(robot.direction)
 
+    async def get_cached_position(self, robot_id: Optional[int] = None) -> CachedPosition:
+        """Position from memory; the database is read only for robots not cached yet."""
+        cached = position_cache.get(robot_id)
+        if cached is not None:
+            return cached
+
+        robot = await self._get_state(robot_id)
+        if robot_id is None:
+            position_cache.default_robot_id = robot.id
+        return position_cache.fill(robot.id, robot.x, robot.y, Direction(robot.direction))
+
+    async def plan_route(
+        self,
+        target_x: int,
+        target_y: int,
+        target_direction: Optional[Direction] = None,
+        robot_id: Optional[int] = None,
+    ) -> tuple[CachedPosition, Plan, bool]:
+        """
+        Shortest obstacle-free command string from the robot's current pose.
+
+        Returns:
+            Tuple of (start pose, plan, served from the plan cache); raises
+            NoPathError when the search finds nothing within its limits
+        """
+        settings = get_settings()
+        start = await self.get_cached_position(robot_id)
+        key = (
+            start.x,
+            start.y,
+            start.direction.value,
+            target_x,
+            target_y,
+            target_direction.value if target_direction is not None else None,
+            obstacle_cache.version,
+        )
+        plan_cache.capacity = settings.plan_cache_size
+        plan = plan_cache.get(key)
+        if plan is not None:
+            return start, plan, True
+
+        obstacles, bounds = await get_planning_obstacles(
+            self.db, (start.x, start.y), (target_x, target_y)
+        )
+        plan = await asyncio.to_thread(
+            plan_path,
+            obstacles,
+            start.x,
+            start.y,
+            start.direction,
+            target_x,
+            target_y,
+            target_direction,
+            max_nodes=settings.plan_max_nodes,
+            time_limit=settings.plan_time_limit,
+            bounds=bounds,
+        )
+        plan_cache.put(key, plan)
+        return start, plan, False
+
+    async def dry_run(
+        self, candidates: list[str], pose: Optional[Pose] = None, robot_id: Optional[int] = None
+    ) -> tuple[Pose, list[ExecutionResult]]:
+        """
+        Run each command string from one pose against one obstacle snapshot.
+
+        Nothing is written and the robot does not move. Batches with at least
+        simulation_pool_min_commands commands go to the process pool when it
+        is running, smaller ones to a thread.
+
+        Returns:
+            Tuple of (start pose, results in candidate order)
+        """
+        if pose is None:
+            cached = await self.get_cached_position(robot_id)
+            pose = (cached.x, cached.y, cached.direction)
+        obstacles = await get_batch_obstacles(self.db, candidates, *pose)
+
+        options = engine_options()
+        total = sum(len(commands) for commands in candidates)
+        if simulation_pool.running and total >= get_settings().simulation_pool_min_commands:
+            results = await simulation_pool.run(candidates, *pose, obstacles, options)
+        else:
+            results = await asyncio.to_thread(
+                simulate_candidates, candidates, *pose, obstacles, options
+            )
+        return pose, results
+
+    async def create_robot(self, x: int, y: int, direction: Direction) -> Robot:
+        """Add a robot to the fleet at its own start pose."""
+        robot = await self.robot_repo.create_robot(x=x, y=y, direction=direction)
+        position_cache.set(robot.id, x, y, direction)
+        return robot
+
+    async def get_history(
+        self,
+        robot_id: Optional[int] = None,
+        limit: int = 50,
+        cursor: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        stopped_by_obstacle: Optional[bool] = None,
+    ) -> tuple[list[RowMapping], Optional[int]]:
+        """
+        One page of command history, newest first.
+
+        Returns:
+            Tuple of (rows, next_cursor); next_cursor is None on the last page
+        """
+        robot = await self._get_state(robot_id)
+        rows = await self.history_repo.get_page(
+            robot.id, limit + 1, cursor, since, until, stopped_by_obstacle
+        )
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1]["id"]
+        return rows, None
+
+    async def export_history(
+        self,
+        robot_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        stopped_by_obstacle: Optional[bool] = None,
+    ) -> AsyncIterator[RowMapping]:
+        """All matching command history, oldest first, streamed from the database."""
+        robot = await self._get_state(robot_id)
+        return self.history_repo.stream_history(robot.id, since, until, stopped_by_obstacle)
+
     async def execute_commands(
-        self, commands: str
+        self, commands: str, robot_id: Optional[int] = None
     ) -> tuple[int, int, Direction, bool, Optional[tuple[int, int]]]:
         """
         Execute a string of commands and return final position.
@@ -36,61 +219,67 @@ class RobotService:
         Returns:
             Tuple of (x, y, direction, stopped_by_obstacle, obstacle_coordinate)
         """
-        robot = await self.robot_repo.get_or_create_robot()
-
-        # get all obstacles
-        obstacles = await self.obstacle_repo.get_obstacle_coordinates()
-
-        # initial state
-        initial_x, initial_y = robot.x, robot.y
-        initial_direction = Direction(robot.direction)
-
-        # current state
-        x, y = robot.x, robot.y
-        direction = Direction(robot.direction)
-
-        # if hit an obstacle
-        stopped_by_obstacle = False
-        obstacle_coordinate: Optional[tuple[int, int]] = None
+        _, result = await self._execute(commands, robot_id)
+        return (
+            result.x,
+            result.y,
+            result.direction,
+            result.stopped_by_obstacle,
+            result.obstacle_coordinate,
+        )
 
-        # process commands 1 by 1
-        for command in commands:
-            if command == "F":
-                # new position (forward)
-                dx, dy = direction.get_delta()
-                new_x, new_y = x + dx, y + dy
+    async def execute_commands_result(
+        self, commands: str, robot_id: Optional[int] = None
+    ) -> ExecutionResult:
+        """Execute commands; the whole ExecutionResult, including how many of them ran."""
+        _, result = await self._execute(commands, robot_id)
+        return result
 
-                # check obstacle
-                if (new_x, new_y) in obstacles:
-                    stopped_by_obstacle = True
-                    obstacle_coordinate = (new_x, new_y)
-                    break
+    async def execute_commands_with_path(
+        self, commands: str, robot_id: Optional[int] = None
+    ) -> tuple[ExecutionResult, tuple[int, int], Iterator[np.ndarray]]:
+        """
+        Execute commands and trace the cells they visited.
 
-                x, y = new_x, new_y
+        Returns:
+            Tuple of (result, start cell, path chunks); the path is traced lazily
+            from the start pose, so iterate it off the event loop for long strings
+        """
+        (x, y, direction), result = await self._execute(commands, robot_id)
+        # the commands that ran, on an empty map: exactly the cells the execution
+        # visited, whatever obstacles changed since
+        executed = commands[: result.steps_executed(commands)]
+        return result, (x, y), trace_path(executed, x, y, direction, ObstacleIndex())
 
-            elif command == "B":
-                # new position (backward)
-                dx, dy = direction.get_delta()
-                new_x, new_y = x - dx, y - dy
+    async def _execute(
+        self, commands: str, robot_id: Optional[int]
+    ) -> tuple[Pose, ExecutionResult]:
+        """Run and persist commands; returns the pose they started from and the result."""
+        mode = get_settings().persistence_mode
+        # the ORM entity only for the mode that commits + refreshes it
+        robot = await (
+            self._get_robot(robot_id) if mode == "per_statement" else self._get_state(robot_id)
+        )
 
-                # check obstacle
-                if (new_x, new_y) in obstacles:
-                    stopped_by_obstacle = True
-                    obstacle_coordinate = (new_x, new_y)
-                    break
+        if robot_actors.running:
+            # release the connection while queued; the actor re-reads the row
+            await self.db.commit()
+            return await robot_actors.execute(robot.id, commands)
 
-                x, y = new_x, new_y
+        # initial state
+        initial_x, initial_y = robot.x, robot.y
+        initial_direction = Direction(robot.direction)
 
-            elif command == "L":
-                direction = direction.turn_left()
-            elif command == "R":
-                direction = direction.turn_right()
+        # obstacle snapshot (or tiles on the path), shared across requests
+        obstacles = await get_obstacles(self.db, commands, initial_x, initial_y, initial_direction)
 
-        # update position
-        await self.robot_repo.update_position(robot, x, y, direction)
+        result = await simulate_offloaded(
+            commands, initial_x, initial_y, initial_direction, obstacles
+        )
+        x, y, direction = result.x, result.y, result.direction
+        obstacle_coordinate = result.obstacle_coordinate
 
-        # save command history
-        await self.history_repo.create_history(
+        history = dict(
             robot_id=robot.id,
             command_string=commands,
             initial_x=initial_x,
@@ -99,9 +288,131 @@ class RobotService:
             final_x=x,
             final_y=y,
             final_direction=direction,
-            stopped_by_obstacle=stopped_by_obstacle,
+            stopped_by_obstacle=result.stopped_by_obstacle,
             obstacle_x=obstacle_coordinate[0] if obstacle_coordinate else None,
             obstacle_y=obstacle_coordinate[1] if obstacle_coordinate else None,
         )
 
-        return x, y, direction, stopped_by_obstacle, obstacle_coordinate
+        if history_writer.running:
+            # write-behind: only the position is written in the request
+            await self.robot_repo.update_state(robot.id, x, y, direction)
+            await self.db.commit()
+            await history_writer.submit([history_row(**history)])
+        elif mode == "core":
+            # Core UPDATE + INSERT without RETURNING, one commit
+            await self.robot_repo.update_state(robot.id, x, y, direction)
+            await self.history_repo.insert_history(history_row(**history))
+            await self.db.commit()
+        elif mode == "single_commit":
+            # UPDATE ... RETURNING + INSERT ... RETURNING, one commit
+            await self.robot_repo.update_position_returning(robot, x, y, direction)
+            await self.history_repo.insert_history_returning(history_row(**history))
+            await self.db.commit()
+        else:
+            await self.robot_repo.update_position(robot, x, y, direction)
+            await self.history_repo.create_history(**history)
+        position_cache.set(robot.id, x, y, direction)
+
+        return (initial_x, initial_y, initial_direction), result
+
+    async def execute_fleet(self, batch: list[tuple[int, str]]) -> list[ExecutionResult]:
+        """
+        Execute commands for many robots, results in request order.
+
+        Entries for the same robot run in order, each from where the previous one
+        stopped. With the whole-map snapshot the batch is simulated in one go,
+        in a worker thread once it is large (see simulate_fleet); tiled loading
+        fetches tiles per string, so there each string runs like a single
+        request (long ones off the event loop, see simulate_offloaded).
+        All positions and history rows are written in a single commit, except
+        with robot actors running: then each robot's entries are queued back to
+        back on its actor, so they are ordered with that robot's other requests.
+        """
+        robots = await self.robot_repo.get_states_by_ids(robot_id for robot_id, _ in batch)
+        missing = sorted({robot_id for robot_id, _ in batch} - robots.keys())
+        if missing:
+            raise RobotNotFoundError(missing)
+
+        # group by robot, keeping each robot's entries in request order
+        per_robot: dict[int, list[int]] = {}
+        for position, (robot_id, _) in enumerate(batch):
+            per_robot.setdefault(robot_id, []).append(position)
+
+        if robot_actors.running:
+            # release the connection while queued, as in _execute
+            await self.db.commit()
+            return await self._execute_fleet_on_actors(batch, per_robot)
+
+        sequences = [
+            (
+                [batch[position][1] for position in positions],
+                robots[robot_id].x,
+                robots[robot_id].y,
+                Direction(robots[robot_id].direction),
+            )
+            for robot_id, positions in per_robot.items()
+        ]
+        snapshot = await get_obstacle_snapshot(self.db)
+        if snapshot is not None:
+            outcomes = await simulate_fleet(sequences, snapshot)
+        else:
+            obstacles = partial(get_obstacles, self.db)
+            outcomes = [
+                await simulate_sequence(commands, x, y, direction, obstacles)
+                for commands, x, y, direction in sequences
+            ]
+
+        results: list[Optional[ExecutionResult]] = [None] * len(batch)
+        positions_out = []
+        history_rows = []
+        for (robot_id, positions), robot_results in zip(per_robot.items(), outcomes):
+            robot = robots[robot_id]
+            x, y, direction = robot.x, robot.y, Direction(robot.direction)
+            for position, result in zip(positions, robot_results):
+                obstacle_x, obstacle_y = result.obstacle_coordinate or (None, None)
+                history_rows.append(
+                    history_row(
+                        robot_id=robot_id,
+                        command_string=batch[position][1],
+                        initial_x=x,
+                        initial_y=y,
+                        initial_direction=direction,
+                        final_x=result.x,
+                        final_y=result.y,
+                        final_direction=result.direction,
+                        stopped_by_obstacle=result.stopped_by_obstacle,
+                        obstacle_x=obstacle_x,
+                        obstacle_y=obstacle_y,
+                    )
+                )
+                x, y, direction = result.x, result.y, result.direction
+                results[position] = result
+            positions_out.append((robot_id, x, y, direction))
+
+        # one executemany UPDATE for the robots, one multi-row INSERT for the history
+        await self.robot_repo.update_states(positions_out)
+        if history_writer.running:
+            await self.db.commit()
+            await history_writer.submit(history_rows)
+        else:
+            await self.history_repo.bulk_insert_history(history_rows)
+            await self.db.commit()
+        for robot_id, x, y, direction in positions_out:
+            position_cache.set(robot_id, x, y, direction)
+
+        return results  # type: ignore[return-value]
+
+    async def _execute_fleet_on_actors(
+        self, batch: list[tuple[int, str]], per_robot: dict[int, list[int]]
+    ) -> list[ExecutionResult]:
+        outcomes = await asyncio.gather(
+            *(
+                robot_actors.execute_many(robot_id, [batch[position][1] for position in positions])
+                for robot_id, positions in per_robot.items()
+            )
+        )
+        results: list[Optional[ExecutionResult]] = [None] * len(batch)
+        for positions, answers in zip(per_robot.values(), outcomes):
+            for position, (_, result) in zip(positions, answers):
+                results[position] = result
+        return results  # type: ignore[return-value]
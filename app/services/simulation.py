@@ -0,0 +1,143 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.core.config import get_settings
+from app.core.metrics import command_length, commands_executed, obstacle_stops
+from app.services.command_engine import ExecutionResult, ObstacleIndex, run_commands
+from app.services.simulation_pool import simulation_pool
+from app.utils.enums import Direction
+
+# obstacles for (commands, x, y, direction), see obstacle_service.get_obstacles
+ObstacleLoader = Callable[[str, int, int, Direction], Awaitable[ObstacleIndex]]
+
+
+def engine_options() -> dict[str, Any]:
+    """run_commands keyword arguments from Settings, passed as-is to worker processes."""
+    settings = get_settings()
+    return {
+        "engine": settings.command_engine,
+        "vectorized_min_commands": settings.vectorized_min_commands,
+        "segmented_min_run_length": settings.segmented_min_run_length,
+    }
+
+
+def simulate(
+    commands: str, x: int, y: int, direction: Direction, obstacles: ObstacleIndex
+) -> ExecutionResult:
+    """Run commands with the engine configured in Settings."""
+    return run_commands(commands, x, y, direction, obstacles, **engine_options())
+
+
+def simulate_candidates(
+    candidates: list[str],
+    x: int,
+    y: int,
+    direction: Direction,
+    obstacles: ObstacleIndex,
+    options: dict[str, Any],
+) -> list[ExecutionResult]:
+    """Run every command string from the same pose, independently of each other."""
+    return [
+        run_commands(commands, x, y, direction, obstacles, **options) for commands in candidates
+    ]
+
+
+async def simulate_offloaded(
+    commands: str, x: int, y: int, direction: Direction, obstacles: ObstacleIndex
+) -> ExecutionResult:
+    """
+    simulate(), moved off the event loop for long strings.
+
+    Strings of offload_min_commands or more go to the simulation process pool
+    (or a thread, see offload_executor) so one huge string does not stall
+    every other request on the worker; shorter ones run inline. Every call is
+    a real execution, so it feeds the command metrics.
+    """
+    settings = get_settings()
+    if len(commands) < settings.offload_min_commands:
+        result = simulate(commands, x, y, direction, obstacles)
+    elif settings.offload_executor == "process" and simulation_pool.running:
+        results = await simulation_pool.run(
+            [commands], x, y, direction, obstacles, engine_options()
+        )
+        result = results[0]
+    else:
+        result = await asyncio.to_thread(simulate, commands, x, y, direction, obstacles)
+
+    if settings.metrics_enabled:
+        _record(commands, result)
+    return result
+
+
+def simulate_sequences(
+    sequences: list[tuple[list[str], int, int, Direction]],
+    obstacles: ObstacleIndex,
+    options: dict[str, Any],
+) -> list[list[ExecutionResult]]:
+    """Run each robot's command strings back to back from its pose, over one obstacle map."""
+    outcomes = []
+    for commands, x, y, direction in sequences:
+        results = []
+        for command_string in commands:
+            result = run_commands(command_string, x, y, direction, obstacles, **options)
+            x, y, direction = result.x, result.y, result.direction
+            results.append(result)
+        outcomes.append(results)
+    return outcomes
+
+
+async def simulate_fleet(
+    sequences: list[tuple[list[str], int, int, Direction]], obstacles: ObstacleIndex
+) -> list[list[ExecutionResult]]:
+    """
+    simulate_sequences(), off the event loop for large batches.
+
+    A batch of offload_min_commands commands or more, counted over every
+    robot, runs in one worker thread; smaller ones run inline, where a thread
+    hop would cost more than the simulation.
+    """
+    settings = get_settings()
+    total = sum(len(command_string) for commands, *_ in sequences for command_string in commands)
+    if total < settings.offload_min_commands:
+        outcomes = simulate_sequences(sequences, obstacles, engine_options())
+    else:
+        outcomes = await asyncio.to_thread(
+            simulate_sequences, sequences, obstacles, engine_options()
+        )
+
+    if settings.metrics_enabled:
+        for (commands, *_), results in zip(sequences, outcomes):
+            for command_string, result in zip(commands, results):
+                _record(command_string, result)
+    return outcomes
+
+
+def _record(commands: str, result: ExecutionResult) -> None:
+    command_length.observe(len(commands))
+    commands_executed.observe(result.steps_executed(commands))
+    if result.stopped_by_obstacle:
+        obstacle_stops.inc()
+
+
+async def simulate_sequence(
+    commands: list[str],
+    x: int,
+    y: int,
+    direction: Direction,
+    obstacles: ObstacleLoader,
+) -> list[ExecutionResult]:
+    """
+    Run several command strings back to back, each starting where the last ended.
+
+    Obstacles are fetched per string for the pose it starts from, so tiled
+    loading sees the region each string reaches. Long strings are offloaded,
+    see simulate_offloaded.
+    """
+    results = []
+    for command_string in commands:
+        index = await obstacles(command_string, x, y, direction)
+        result = await simulate_offloaded(command_string, x, y, direction, index)
+        x, y, direction = result.x, result.y, result.direction
+        results.append(result)
+    return results
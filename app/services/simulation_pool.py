@@ -0,0 +1,159 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, count
+from typing import Any, Optional
+from weakref import WeakKeyDictionary
+
+from app.core.logging_config import get_logger
+from app.services.command_engine import ExecutionResult, ObstacleIndex, run_commands
+from app.utils.enums import Direction
+
+logger = get_logger(__name__)
+
+# chunks per worker, so one slow chunk does not leave the other workers idle
+_CHUNKS_PER_WORKER = 2
+# snapshots each worker process keeps, the current one and the one before a change
+_WORKER_SNAPSHOTS = 2
+
+# worker process side: snapshot token -> obstacle index
+_snapshots: OrderedDict[int, ObstacleIndex] = OrderedDict()
+
+
+def split_by_length(candidates: list[str], chunks: int) -> list[list[str]]:
+    """Contiguous slices of candidates with about the same number of commands each."""
+    ends = list(accumulate(len(commands) for commands in candidates))
+    total = ends[-1] if ends else 0
+    bounds = [0]
+    for chunk in range(1, chunks):
+        end = min(len(candidates), bisect_left(ends, total * chunk / chunks) + 1)
+        bounds.append(max(bounds[-1], end))
+    bounds.append(len(candidates))
+    return [candidates[start:end] for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _run_chunk(
+    token: int,
+    snapshot: Optional[bytes],
+    candidates: list[str],
+    x: int,
+    y: int,
+    direction: Direction,
+    options: dict[str, Any],
+) -> Optional[list[ExecutionResult]]:
+    """Runs in a worker; None asks the parent to resend with the snapshot attached."""
+    obstacles = _snapshots.get(token)
+    if obstacles is None:
+        if snapshot is None:
+            return None
+        obstacles = _snapshots[token] = pickle.loads(snapshot)
+        while len(_snapshots) > _WORKER_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return [
+        run_commands(commands, x, y, direction, obstacles, **options) for commands in candidates
+    ]
+
+
+class SimulationPool:
+    """
+    Worker processes for CPU-heavy simulation: dry-run batches and long strings.
+
+    Tasks name their obstacle snapshot by a token instead of carrying it.
+    A worker that has not seen the token yet answers None and gets the task
+    again with the pickled snapshot, which it keeps; so each snapshot crosses
+    to each worker about once, not once per call. Batches are split into
+    contiguous chunks of about equal command count. Workers are spawned, not
+    forked, since the parent runs an event loop.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tokens: WeakKeyDictionary[ObstacleIndex, int] = WeakKeyDictionary()
+        self._next_token = count()
+        # the last snapshot pickled, reused while workers are catching up on it
+        self._pickled: tuple[int, bytes] = (-1, b"")
+        self.workers = 0
+        self.tasks = 0
+        self.snapshots_sent = 0
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self, workers: Optional[int] = None) -> None:
+        """Create the pool; processes start on first use. None means one per CPU."""
+        if self.running:
+            return
+        self.workers = workers or os.cpu_count() or 1
+        self.tasks = self.snapshots_sent = 0
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Simulation pool started: {self.workers} workers")
+
+    async def stop(self) -> None:
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown)
+        self._tokens = WeakKeyDictionary()
+        self._pickled = (-1, b"")
+        logger.info(
+            f"Simulation pool stopped: {self.tasks} tasks, {self.snapshots_sent} snapshots sent"
+        )
+
+    async def run(
+        self,
+        candidates: list[str],
+        x: int,
+        y: int,
+        direction: Direction,
+        obstacles: ObstacleIndex,
+        options: dict[str, Any],
+    ) -> list[ExecutionResult]:
+        """Simulate every candidate from (x, y, direction); results in candidate order."""
+        chunks = split_by_length(candidates, self.workers * _CHUNKS_PER_WORKER)
+        outcomes = await asyncio.gather(
+            *(self._run_chunk(chunk, x, y, direction, obstacles, options) for chunk in chunks)
+        )
+        return [result for outcome in outcomes for result in outcome]
+
+    async def _run_chunk(
+        self,
+        chunk: list[str],
+        x: int,
+        y: int,
+        direction: Direction,
+        obstacles: ObstacleIndex,
+        options: dict[str, Any],
+    ) -> list[ExecutionResult]:
+        assert self._executor is not None, "simulation pool not started"
+        loop = asyncio.get_running_loop()
+        token = self._tokens.get(obstacles)
+        if token is None:
+            token = self._tokens[obstacles] = next(self._next_token)
+
+        self.tasks += 1
+        results = await loop.run_in_executor(
+            self._executor, _run_chunk, token, None, chunk, x, y, direction, options
+        )
+        if results is None:
+            snapshot = await self._pickle(token, obstacles)
+            self.snapshots_sent += 1
+            results = await loop.run_in_executor(
+                self._executor, _run_chunk, token, snapshot, chunk, x, y, direction, options
+            )
+        return results
+
+    async def _pickle(self, token: int, obstacles: ObstacleIndex) -> bytes:
+        if self._pickled[0] != token:
+            snapshot = await asyncio.to_thread(pickle.dumps, obstacles, pickle.HIGHEST_PROTOCOL)
+            self._pickled = (token, snapshot)
+        return self._pickled[1]
+
+
+simulation_pool = SimulationPool()
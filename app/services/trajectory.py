@@ -0,0 +1,79 @@
+import base64
+import json
+from collections.abc import Iterable, Iterator
+from typing import Literal
+
+import numpy as np
+
+# "delta": flat JSON int array dx0, dy0, dx1, dy1, ... (each -1, 0 or 1)
+# "base64": the same deltas as int8 pairs, base64 encoded (decode with Int8Array / np.int8)
+# "json": [[x, y], ...] visited cells, the plain fallback
+PathFormat = Literal["delta", "base64", "json"]
+
+_COMPACT = {"separators": (",", ":")}
+# "dx,dy," for (dx + 1) * 3 + (dy + 1)
+_DELTA_TEXT = np.array(
+    [f"{dx},{dy},".encode() for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype="S6"
+)
+
+
+def _delta_chunks(start: tuple[int, int], chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+    previous = np.array([start], dtype=np.int64)
+    for chunk in chunks:
+        yield np.diff(chunk, axis=0, prepend=previous).astype(np.int8)
+        previous = chunk[-1:]
+
+
+def _encode_data(
+    path_format: PathFormat, start: tuple[int, int], chunks: Iterable[np.ndarray]
+) -> Iterator[bytes]:
+    if path_format == "base64":
+        # base64 works on 3-byte groups, carry the remainder to the next chunk
+        carry = b""
+        for deltas in _delta_chunks(start, chunks):
+            buffer = carry + deltas.tobytes()
+            cut = len(buffer) - len(buffer) % 3
+            carry = buffer[cut:]
+            yield base64.b64encode(buffer[:cut])
+        yield base64.b64encode(carry)
+        return
+
+    first = True
+    if path_format == "delta":
+        for deltas in _delta_chunks(start, chunks):
+            # one "dx,dy," per step from a table of all nine pairs, NUL padding removed
+            codes = (deltas[:, 0] + 1) * 3 + (deltas[:, 1] + 1)
+            text = _DELTA_TEXT[codes].tobytes().replace(b"\x00", b"")[:-1]
+            yield text if first else b"," + text
+            first = False
+        return
+
+    for chunk in chunks:
+        # each chunk is a JSON array, strip its brackets and join with commas
+        text = json.dumps(chunk.tolist(), **_COMPACT)[1:-1].encode()
+        yield text if first else b"," + text
+        first = False
+
+
+def encode_path(
+    path_format: PathFormat, start: tuple[int, int], chunks: Iterable[np.ndarray]
+) -> Iterator[bytes]:
+    """{"format": ..., "start": [x, y], "data": ...} streamed chunk by chunk."""
+    quote = b'"' if path_format == "base64" else b"["
+    yield b'{"format":"%s","start":[%d,%d],"data":%s' % (
+        path_format.encode(),
+        start[0],
+        start[1],
+        quote,
+    )
+    yield from _encode_data(path_format, start, chunks)
+    yield (b'"' if path_format == "base64" else b"]") + b"}"
+
+
+def with_path(
+    document: bytes, path_format: PathFormat, start: tuple[int, int], chunks: Iterable[np.ndarray]
+) -> Iterator[bytes]:
+    """A serialized JSON object with a streamed "path" member appended."""
+    yield document.rstrip()[:-1] + b',"path":'
+    yield from encode_path(path_format, start, chunks)
+    yield b"}"
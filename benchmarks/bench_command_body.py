@@ -0,0 +1,160 @@
+"""
+Latency and peak memory of huge POST /commands bodies, by body format.
+
+Each row sends one command string of --sizes megabytes (random F/B/L/R) in
+64 KiB chunks, as an ASGI server would deliver it. The "parse" columns time a
+route that only reads the command string: the CommandRequest body parameter
+FastAPI reads and validates (how /commands worked before), and the
+command_string dependency with a JSON, text/plain and gzipped text/plain body.
+The "request" columns time the whole POST /robot/commands against a temporary
+SQLite file, response (which echoes the string) included. Peak is the
+tracemalloc high-water mark over a separate, untimed run.
+
+Usage:
+    python -m benchmarks.bench_command_body [--sizes 1 10 100] [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import AsyncGenerator, AsyncIterator
+
+import numpy as np
+import orjson
+from fastapi import APIRouter, Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.v1.dependencies import command_string
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.models import Robot
+from app.db.session import get_db
+from app.main import app
+from app.schemas.robot_schema import CommandRequest
+
+CHUNK = 64 * 1024
+MB = 1024 * 1024
+
+parse_router = APIRouter()
+
+
+@parse_router.post("/legacy")
+async def parse_legacy(request: CommandRequest) -> int:
+    return len(request.commands)
+
+
+@parse_router.post("/current")
+async def parse_current(commands: str = Depends(command_string)) -> int:
+    return len(commands)
+
+
+def bodies(commands: bytes) -> dict[str, tuple[bytes, dict[str, str]]]:
+    json_body = orjson.dumps({"commands": commands.decode("ascii")})
+    return {
+        "json": (json_body, {"content-type": "application/json"}),
+        "text": (commands, {"content-type": "text/plain"}),
+        "text+gzip": (
+            gzip.compress(commands, compresslevel=1),
+            {"content-type": "text/plain", "content-encoding": "gzip"},
+        ),
+    }
+
+
+async def chunks(body: bytes) -> AsyncIterator[bytes]:
+    view = memoryview(body)
+    for start in range(0, len(body), CHUNK):
+        yield bytes(view[start : start + CHUNK])
+
+
+async def post(client: AsyncClient, url: str, body: bytes, headers: dict[str, str]) -> None:
+    response = await client.post(
+        url, content=chunks(body), headers={**headers, "content-length": str(len(body))}
+    )
+    assert response.status_code == 200, response.text[:200]
+
+
+async def measure(
+    client: AsyncClient, url: str, body: bytes, headers: dict[str, str], rounds: int
+) -> tuple[float, float]:
+    """(median seconds, peak bytes)"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await post(client, url, body, headers)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    await post(client, url, body, headers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="MB")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request
+    settings = get_settings()
+    settings.debug = False  # no SQL echo
+    settings.slow_request_seconds = settings.slow_request_statements = 0  # nor slow-request log
+    settings.command_body_max_bytes = max(args.sizes) * 2 * MB
+
+    parse_app = FastAPI()
+    parse_app.include_router(parse_router)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(Robot.__table__.insert(), [{"x": 0, "y": 0, "direction": "NORTH"}])
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        rng = np.random.default_rng(0)
+        parse_client = AsyncClient(transport=ASGITransport(app=parse_app), base_url="http://bench")
+        app_client = AsyncClient(transport=ASGITransport(app=app), base_url="http://bench")
+
+        print(
+            f"{'MB':>4} {'body':<16} {'parse ms':>9} {'peak MB':>8}"
+            f" {'request ms':>11} {'peak MB':>8}"
+        )
+        for size in args.sizes:
+            commands = np.frombuffer(b"FBLR", dtype=np.uint8)[
+                rng.integers(0, 4, size * MB)
+            ].tobytes()
+            cases = bodies(commands)
+            legacy = await measure(parse_client, "/legacy", *cases["json"], args.rounds)
+            print(
+                f"{size:>4} {'json (FastAPI)':<16} {legacy[0] * 1e3:>9.1f}"
+                f" {legacy[1] / MB:>8.1f} {'-':>11} {'-':>8}"
+            )
+            for name, (body, headers) in cases.items():
+                parse = await measure(parse_client, "/current", body, headers, args.rounds)
+                request = await measure(app_client, "/api/v1/robot/commands", body, headers, 1)
+                print(
+                    f"{size:>4} {name:<16} {parse[0] * 1e3:>9.1f} {parse[1] / MB:>8.1f}"
+                    f" {request[0] * 1e3:>11.1f} {request[1] / MB:>8.1f}"
+                )
+
+        await parse_client.aclose()
+        await app_client.aclose()
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""
+Command engine benchmark: original per-character loop vs the stepwise, segmented
+and vectorized engines, plus the crossover sweep behind the Settings defaults.
+
+Usage:
+    python -m benchmarks.bench_command_engine [--sizes 100000 1000000 10000000]
+    python -m benchmarks.bench_command_engine --crossover
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from app.services.command_engine import (
+    ENGINES,
+    ObstacleIndex,
+    execute_segmented,
+    execute_stepwise,
+    execute_vectorized,
+    mean_run_length,
+)
+from app.utils.enums import Direction
+
+
+def direction_loop(commands: str, x: int, y: int, direction: Direction, obstacles: set) -> tuple:
+    """The loop RobotService.execute_commands used before the engine existed."""
+    for command in commands:
+        if command == "F":
+            dx, dy = direction.get_delta()
+            if (x + dx, y + dy) in obstacles:
+                return x, y, direction, True, (x + dx, y + dy)
+            x, y = x + dx, y + dy
+        elif command == "B":
+            dx, dy = direction.get_delta()
+            if (x - dx, y - dy) in obstacles:
+                return x, y, direction, True, (x - dx, y - dy)
+            x, y = x - dx, y - dy
+        elif command == "L":
+            direction = direction.turn_left()
+        elif command == "R":
+            direction = direction.turn_right()
+    return x, y, direction, False, None
+
+
+def patrol(size: int, rng: random.Random) -> str:
+    """Long straight legs with occasional turns, like real patrol routes."""
+    parts, total = [], 0
+    while total < size:
+        leg = rng.choice("FB") * rng.randint(50, 500) + rng.choice(["L", "R", "LL", "RRR"])
+        parts.append(leg)
+        total += len(leg)
+    return "".join(parts)[:size]
+
+
+def noise(size: int, rng: random.Random) -> str:
+    """Uniformly random commands, the worst case for segment compilation."""
+    return "".join(rng.choices("FBLR", k=size))
+
+
+def runs(size: int, rng: random.Random, run_length: int) -> str:
+    """Move runs of about run_length commands separated by single turns."""
+    parts, total = [], 0
+    while total < size:
+        leg = rng.choice("FB") * rng.randint(1, 2 * run_length - 1) + rng.choice("LR")
+        parts.append(leg)
+        total += len(leg)
+    return "".join(parts)[:size]
+
+
+def timed(fn: Callable[[], object], repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def crossover(index: ObstacleIndex, rng: random.Random) -> None:
+    """Where each engine starts winning: by string length and by run length."""
+    print("by length, uniformly random commands (microseconds per call)")
+    print(f"{'size':>8} {'stepwise':>10} {'segmented':>10} {'vectorized':>10}")
+    for size in (10, 30, 100, 300, 1_000, 3_000, 10_000):
+        commands = noise(size, rng)
+        repeat = max(1, 100_000 // size)
+        times = [
+            timed(lambda: fn(commands, 4, 2, Direction.WEST, index), repeat)
+            for fn in ENGINES.values()
+        ]
+        print(f"{size:>8}" + "".join(f" {t * 1e6:>10.1f}" for t in times))
+
+    print("\nby mean run length, 100000 commands (milliseconds per call)")
+    print(f"{'run':>8} {'measured':>10} {'segmented':>10} {'vectorized':>10}")
+    for run_length in (1, 2, 4, 8, 16, 32, 64):
+        commands = runs(100_000, rng, run_length)
+        seg = timed(lambda: execute_segmented(commands, 4, 2, Direction.WEST, index))
+        vec = timed(lambda: execute_vectorized(commands, 4, 2, Direction.WEST, index))
+        measured = mean_run_length(commands)
+        print(f"{run_length:>8} {measured:>10.1f} {seg * 1e3:>10.1f} {vec * 1e3:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**5, 10**6, 10**7])
+    parser.add_argument("--obstacles", type=int, default=10_000)
+    parser.add_argument("--crossover", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    # obstacles far from the origin so the runs execute in full
+    cells = {
+        (rng.randint(10**8, 2 * 10**8), rng.randint(-(10**8), 10**8)) for _ in range(args.obstacles)
+    }
+    index = ObstacleIndex(cells)
+
+    if args.crossover:
+        crossover(index, rng)
+        return
+
+    print(
+        f"{'input':<8} {'size':>10} {'original':>10} {'stepwise':>10}"
+        f" {'segmented':>10} {'vectorized':>10} {'best':>8}"
+    )
+    for name, make in (("patrol", patrol), ("noise", noise)):
+        for size in args.sizes:
+            commands = make(size, rng)
+            original = timed(lambda: direction_loop(commands, 4, 2, Direction.WEST, cells))
+            stepwise = timed(lambda: execute_stepwise(commands, 4, 2, Direction.WEST, index))
+            segmented = timed(lambda: execute_segmented(commands, 4, 2, Direction.WEST, index))
+            vectorized = timed(lambda: execute_vectorized(commands, 4, 2, Direction.WEST, index))
+            print(
+                f"{name:<8} {size:>10} {original:>9.3f}s {stepwise:>9.3f}s {segmented:>9.3f}s"
+                f" {vectorized:>9.3f}s {original / min(segmented, vectorized):>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Echoed vs compact POST /commands responses, by command string length.
+
+The encode columns time building and encoding one body: the CommandResponse
+payload that echoes the string, and the CompactCommandResponse one with its
+length, SHA-256 and steps executed. The request columns time the whole
+POST /robot/commands (text/plain body, ?compact=false / true) over ASGI
+against a temporary SQLite file, median of --requests.
+
+Usage:
+    python -m benchmarks.bench_compact_response [--lengths 1000 10000 100000 1000000] [--requests 20]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+import timeit
+from collections.abc import AsyncGenerator
+
+import numpy as np
+import orjson
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.models import Robot
+from app.db.session import get_db
+from app.main import app
+from app.schemas.payloads import compact_payload, result_payload
+from app.services.command_engine import ExecutionResult
+from app.utils.enums import Direction
+
+URL = "/api/v1/robot/commands"
+
+
+def encode_seconds(payload, result: ExecutionResult, commands: str) -> float:
+    number = max(1, 1_000_000 // len(commands))
+    timings = timeit.repeat(
+        lambda: orjson.dumps(payload(result, commands)), number=number, repeat=5
+    )
+    return min(timings) / number
+
+
+async def measure(
+    client: AsyncClient, body: bytes, compact: bool, requests: int
+) -> tuple[float, int]:
+    """(median seconds, response bytes)"""
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.post(
+            URL,
+            params={"compact": str(compact).lower()},
+            content=body,
+            headers={"content-type": "text/plain"},
+        )
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text[:200]
+    return statistics.median(timings), len(response.content)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--lengths", type=int, nargs="+", default=[1000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request
+    settings = get_settings()
+    settings.debug = False  # no SQL echo
+    settings.slow_request_seconds = settings.slow_request_statements = 0  # nor slow-request log
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(Robot.__table__.insert(), [{"x": 0, "y": 0, "direction": "NORTH"}])
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        rng = np.random.default_rng(0)
+        print(
+            f"{'commands':>9} {'echo us':>9} {'compact us':>11} {'echo ms':>9} {'compact ms':>11}"
+            f" {'echo bytes':>11} {'compact bytes':>14}"
+        )
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for length in args.lengths:
+                body = np.frombuffer(b"FBLR", dtype=np.uint8)[rng.integers(0, 4, length)].tobytes()
+                commands = body.decode("ascii")
+                result = ExecutionResult(3, 4, Direction.EAST)
+                echo_encode = encode_seconds(result_payload, result, commands)
+                compact_encode = encode_seconds(compact_payload, result, commands)
+                echo, echo_bytes = await measure(client, body, False, args.requests)
+                compact, compact_bytes = await measure(client, body, True, args.requests)
+                print(
+                    f"{length:>9} {echo_encode * 1e6:>9.1f} {compact_encode * 1e6:>11.1f}"
+                    f" {echo * 1e3:>9.2f} {compact * 1e3:>11.2f}"
+                    f" {echo_bytes:>11} {compact_bytes:>14}"
+                )
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Cost of the Prometheus metrics: per update, and per HTTP request.
+
+The update rows time one Histogram.observe / Counter.inc call. The request
+rows compare the API routers mounted on a bare app (no RequestStatsMiddleware, SQL
+listeners removed) with app.main.app, over ASGI against a temporary SQLite
+file; the two are interleaved so drift hits both equally.
+
+Usage:
+    python -m benchmarks.bench_metrics [--requests 2000] [--rounds 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import timeit
+from collections.abc import AsyncGenerator
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.v1.routes import health, obstacles, robot, robots
+from app.core.metrics import LATENCY_BUCKETS, Counter, Histogram
+from app.db.base import Base
+from app.db.instrumentation import install_sql_metrics, uninstall_sql_metrics
+from app.db.session import get_db
+from app.main import app
+
+REQUESTS = {
+    "GET position": ("GET", "/api/v1/robot/position", None),
+    "POST commands": ("POST", "/api/v1/robot/commands", {"commands": "FLFFFRFLB"}),
+}
+
+
+def update_costs() -> None:
+    histogram = Histogram("h", "", LATENCY_BUCKETS, ("method", "route", "status"))
+    counter = Counter("c", "")
+    for name, call in (
+        ("Histogram.observe", lambda: histogram.observe(0.004, "GET", "/api/v1/health", "200")),
+        ("Counter.inc", counter.inc),
+    ):
+        seconds = min(timeit.repeat(call, number=100_000, repeat=5)) / 100_000
+        print(f"{name:<18} {seconds * 1e9:>8.0f} ns")
+
+
+async def measure(client: AsyncClient, method: str, url: str, body: dict, requests: int) -> float:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    update_costs()
+
+    plain = FastAPI()
+    for module in (health, robot, robots, obstacles):
+        plain.include_router(module.router, prefix="/api/v1")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        clients = {}
+        for name, target in (("plain", plain), ("metrics", app)):
+            target.dependency_overrides[get_db] = override_get_db
+            clients[name] = AsyncClient(transport=ASGITransport(app=target), base_url="http://b")
+
+        print(
+            f"sqlite+aiosqlite, {args.requests} requests x {args.rounds} rounds, median of rounds"
+        )
+        print(f"{'request':<14} {'plain ms':>9} {'metrics ms':>11} {'overhead us':>12}")
+        for label, (method, url, body) in REQUESTS.items():
+            medians: dict[str, list[float]] = {"plain": [], "metrics": []}
+            for _ in range(args.rounds):
+                for name, client in clients.items():
+                    (install_sql_metrics if name == "metrics" else uninstall_sql_metrics)()
+                    medians[name].append(await measure(client, method, url, body, args.requests))
+            plain_ms, metrics_ms = (statistics.median(medians[name]) for name in clients)
+            overhead_us = (metrics_ms - plain_ms) * 1e6
+            print(
+                f"{label:<14} {plain_ms * 1e3:>9.3f} {metrics_ms * 1e3:>11.3f} {overhead_us:>12.1f}"
+            )
+
+        for client in clients.values():
+            await client.aclose()
+        app.dependency_overrides.clear()
+        install_sql_metrics()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+A* route planning on large random maps: plan length, states expanded and
+time per plan, for growing distances and obstacle densities.
+
+Obstacles fill a square around the start at the given density; targets are
+random free cells at the given Manhattan distance. Plans that run out of
+nodes or time are counted as failures.
+
+Usage:
+    python -m benchmarks.bench_path_planner [--distances 100 300 1000] [--densities 0.1 0.3]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from app.services.command_engine import ObstacleIndex, run_commands
+from app.services.path_planner import NoPathError, plan_path
+from app.utils.enums import Direction
+
+
+def random_map(side: int, density: float, rng: np.random.Generator) -> np.ndarray:
+    count = int(side * side * density)
+    cells = rng.choice(side * side, count, replace=False)
+    coordinates = np.stack([cells % side, cells // side], axis=1) - side // 2
+    # keep the start free
+    return coordinates[(coordinates[:, 0] != 0) | (coordinates[:, 1] != 0)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--distances", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.1, 0.3])
+    parser.add_argument("--plans", type=int, default=5)
+    parser.add_argument("--max-nodes", type=int, default=2_000_000)
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pick = random.Random(0)
+    print(
+        f"{'density':>7} {'distance':>9} {'obstacles':>10} {'length':>8}"
+        f" {'nodes':>9} {'ms':>9} {'failed':>7}"
+    )
+    for density in args.densities:
+        for distance in args.distances:
+            index = ObstacleIndex(random_map(2 * distance + 64, density, rng))
+            lengths, nodes, timings, failed = [], [], [], 0
+            for _ in range(args.plans):
+                while True:
+                    target_x = pick.randint(-distance, distance)
+                    target_y = pick.choice((-1, 1)) * (distance - abs(target_x))
+                    if (target_x, target_y) not in index:
+                        break
+                start = time.perf_counter()
+                try:
+                    plan = plan_path(
+                        index,
+                        0,
+                        0,
+                        Direction.NORTH,
+                        target_x,
+                        target_y,
+                        max_nodes=args.max_nodes,
+                        time_limit=args.time_limit,
+                    )
+                except NoPathError:
+                    failed += 1
+                    continue
+                timings.append(time.perf_counter() - start)
+                result = run_commands(plan.commands, 0, 0, Direction.NORTH, index)
+                assert (result.x, result.y) == (target_x, target_y)
+                lengths.append(len(plan.commands))
+                nodes.append(plan.nodes_expanded)
+
+            if timings:
+                print(
+                    f"{density:>7} {distance:>9} {len(index):>10}"
+                    f" {statistics.mean(lengths):>8.0f} {statistics.mean(nodes):>9.0f}"
+                    f" {statistics.mean(timings) * 1e3:>9.1f} {failed:>7}"
+                )
+            else:
+                print(f"{density:>7} {distance:>9} {len(index):>10} {'-':>37} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
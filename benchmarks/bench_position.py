@@ -0,0 +1,78 @@
+"""
+p50/p99 latency of GET /api/v1/robot/position.
+
+"database" clears the position cache before every request, which is the
+previous behaviour (one robot SELECT per poll); "cached" is served from
+memory; "not_modified" sends the current ETag and gets a 304.
+
+Usage:
+    python -m benchmarks.bench_position [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import AsyncGenerator
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+from app.services.position_cache import position_cache
+
+URL = "/api/v1/robot/position"
+
+
+async def measure(client: AsyncClient, mode: str, requests: int) -> list[float]:
+    headers = {}
+    if mode == "not_modified":
+        headers["If-None-Match"] = (await client.get(URL)).headers["etag"]
+
+    timings = []
+    for _ in range(requests):
+        if mode == "database":
+            position_cache.clear()
+        start = time.perf_counter()
+        response = await client.get(URL, headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == (304 if mode == "not_modified" else 200)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get(URL)  # create the robot
+            print(f"sqlite+aiosqlite, {args.requests} requests")
+            print(f"{'mode':<13} {'p50 ms':>8} {'p99 ms':>8}")
+            for mode in ("database", "cached", "not_modified"):
+                timings = await measure(client, mode, args.requests)
+                percentiles = statistics.quantiles(timings, n=100)
+                print(f"{mode:<13} {percentiles[49] * 1e3:>8.3f} {percentiles[98] * 1e3:>8.3f}")
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
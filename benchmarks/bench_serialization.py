@@ -0,0 +1,154 @@
+"""
+Cost of encoding response bodies: response models vs orjson payload dicts.
+
+The encode rows time one body for a CommandResponse and for a 1000-item
+CommandHistoryPage, built four ways: the response model dumped to JSON, the
+validate-then-dump FastAPI does for a response_model route, the payload dict
+through orjson (what the routes now do), and the payload through msgpack when
+it is installed. The request rows time the app routes over ASGI against a
+temporary SQLite file, as JSON and, when available, as MessagePack.
+
+Usage:
+    python -m benchmarks.bench_serialization [--requests 1000] [--history 1000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+import timeit
+from collections.abc import AsyncGenerator, Callable
+from datetime import datetime, timezone
+
+import orjson
+from httpx import ASGITransport, AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api import serialization
+from app.db.base import Base
+from app.db.models import CommandHistory, Robot
+from app.db.session import get_db
+from app.main import app
+from app.schemas.payloads import result_payload
+from app.schemas.robot_schema import CommandHistoryPage, CommandResponse
+from app.services.command_engine import ExecutionResult
+from app.utils.enums import Direction
+
+
+def history_rows(count: int) -> list[dict]:
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": index,
+            "robot_id": 1,
+            "command_string": "FFRFFLB",
+            "initial_x": index,
+            "initial_y": 0,
+            "initial_direction": "NORTH",
+            "final_x": index + 1,
+            "final_y": 2,
+            "final_direction": "EAST",
+            "stopped_by_obstacle": False,
+            "obstacle_x": None,
+            "obstacle_y": None,
+            "created_at": created_at,
+        }
+        for index in range(count, 0, -1)
+    ]
+
+
+def encode_costs(history: int) -> None:
+    bodies = {
+        "command": (
+            CommandResponse,
+            result_payload(ExecutionResult(3, 4, Direction.EAST, True, (3, 5), 4), "FFRFFLB"),
+        ),
+        f"history {history}": (
+            CommandHistoryPage,
+            {"items": history_rows(history), "next_cursor": None},
+        ),
+    }
+    print(f"{'encode':<46} {'us':>10}")
+    for label, (model, payload) in bodies.items():
+        adapter = TypeAdapter(model)
+        instance = model.model_validate(payload)
+        ways: dict[str, Callable[[], bytes]] = {
+            "model_dump_json": instance.model_dump_json,
+            "validate + dump (response_model)": lambda: adapter.dump_json(
+                adapter.validate_python(payload)
+            ),
+            "orjson payload": lambda: orjson.dumps(payload),
+        }
+        if serialization.msgpack is not None:
+            response = serialization.MsgPackResponse(payload)
+            ways["msgpack payload"] = lambda: response.render(payload)
+        number = max(1, 20_000 // history) if label.startswith("history") else 20_000
+        for name, encode in ways.items():
+            seconds = min(timeit.repeat(encode, number=number, repeat=5)) / number
+            print(f"{label + ' ' + name:<46} {seconds * 1e6:>10.2f}")
+
+
+async def measure(client: AsyncClient, method: str, url: str, requests: int, **kwargs) -> float:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request
+    encode_costs(args.history)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(Robot.__table__.insert(), [{"x": 0, "y": 0, "direction": "NORTH"}])
+            await conn.execute(CommandHistory.__table__.insert(), history_rows(args.history))
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        accepts = {"json": "application/json"}
+        if serialization.msgpack is not None:
+            accepts["msgpack"] = serialization.MSGPACK
+        requests = {
+            "GET position": ("GET", "/api/v1/robot/position", {}),
+            "POST commands": ("POST", "/api/v1/robot/commands", {"json": {"commands": "FLFFRB"}}),
+            f"GET history limit={args.history}": (
+                "GET",
+                "/api/v1/robot/history",
+                {"params": {"limit": args.history}},
+            ),
+        }
+
+        print(f"\n{'request':<30} {'accept':>8} {'median ms':>10}")
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, (method, url, kwargs) in requests.items():
+                for label, accept in accepts.items():
+                    median = await measure(
+                        client, method, url, args.requests, headers={"accept": accept}, **kwargs
+                    )
+                    print(f"{name:<30} {label:>8} {median * 1e3:>10.3f}")
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
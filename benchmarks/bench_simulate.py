@@ -0,0 +1,75 @@
+"""
+Batch dry runs (POST /robot/simulate): one thread vs the process pool.
+
+Each batch is --candidates random command strings of a given length, run
+from one pose against a 100k-obstacle snapshot. The pool column includes
+pickling the snapshot and shipping it with every chunk. Scaling needs as
+many cores as workers; the machine's CPU count is printed first.
+
+Usage:
+    python -m benchmarks.bench_simulate [--candidates 10000] [--lengths 10 100 1000] [--workers 1 2 4]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import numpy as np
+
+from app.services.command_engine import ObstacleIndex
+from app.services.simulation import simulate_candidates
+from app.services.simulation_pool import SimulationPool
+from app.utils.enums import Direction
+
+OPTIONS = {"engine": "auto", "vectorized_min_commands": 300, "segmented_min_run_length": 24}
+
+
+def candidates(count: int, length: int, rng: random.Random) -> list[str]:
+    return ["".join(rng.choices("FFFFBLR", k=length)) for _ in range(count)]
+
+
+async def timed_pool(pool: SimulationPool, batch: list[str], obstacles: ObstacleIndex) -> float:
+    start = time.perf_counter()
+    await pool.run(batch, 0, 0, Direction.NORTH, obstacles, OPTIONS)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=10_000)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cells = np.random.default_rng(0).integers(-1000, 1000, size=(100_000, 2))
+    obstacles = ObstacleIndex(cells[(cells[:, 0] != 0) | (cells[:, 1] != 0)])
+    print(f"cpus: {os.cpu_count()}, obstacles: {len(obstacles)}")
+
+    pools = {}
+    for workers in args.workers:
+        pools[workers] = SimulationPool()
+        pools[workers].start(workers)
+        # spawn the processes before timing
+        await timed_pool(pools[workers], ["F"] * workers * 4, obstacles)
+
+    header = f"{'length':>7} {'commands':>10} {'thread ms':>10}"
+    header += "".join(f" {f'pool({workers}) ms':>13}" for workers in args.workers)
+    print(header)
+    for length in args.lengths:
+        batch = candidates(args.candidates, length, rng)
+        start = time.perf_counter()
+        simulate_candidates(batch, 0, 0, Direction.NORTH, obstacles, OPTIONS)
+        row = f"{length:>7} {length * len(batch):>10} {(time.perf_counter() - start) * 1e3:>10.1f}"
+        for workers, pool in pools.items():
+            row += f" {await timed_pool(pool, batch, obstacles) * 1e3:>13.1f}"
+        print(row)
+
+    for pool in pools.values():
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
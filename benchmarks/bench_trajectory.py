@@ -0,0 +1,80 @@
+"""
+Time, peak memory and size of trajectory output: each path encoding vs a
+list of per-step (x, y) tuples dumped with json.
+
+Usage:
+    python -m benchmarks.bench_trajectory [--sizes 100000 1000000 10000000]
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from app.services.command_engine import DELTAS, ObstacleIndex, trace_path
+from app.services.trajectory import encode_path
+from app.utils.enums import Direction
+
+START = (0, 0, Direction.NORTH)
+
+
+def tuple_list(commands: str) -> int:
+    """The per-step Python objects approach."""
+    x, y, heading = 0, 0, 0
+    path = []
+    for command in commands:
+        if command == "L":
+            heading = (heading - 1) % 4
+        elif command == "R":
+            heading = (heading + 1) % 4
+        else:
+            dx, dy = DELTAS[heading]
+            step = 1 if command == "F" else -1
+            x, y = x + dx * step, y + dy * step
+            path.append((x, y))
+    return len(json.dumps(path).encode())
+
+
+def streamed(path_format: str) -> Callable[[str], int]:
+    def run(commands: str) -> int:
+        chunks = trace_path(commands, *START, ObstacleIndex(()))
+        return sum(len(part) for part in encode_path(path_format, START[:2], chunks))
+
+    return run
+
+
+def measure(run: Callable[[str], int], commands: str) -> tuple[float, float, int]:
+    # timed without tracemalloc, which slows down object-heavy code many times over
+    start = time.perf_counter()
+    size = run(commands)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run(commands)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    methods = {"tuples+json": tuple_list} | {
+        name: streamed(name) for name in ("json", "delta", "base64")
+    }
+    rng = random.Random(0)
+    print(f"{'commands':>10} {'method':<12} {'seconds':>8} {'peak MB':>8} {'bytes/step':>10}")
+    for size in args.sizes:
+        commands = "".join(rng.choices("FFFBLR", k=size))
+        moves = size - commands.count("L") - commands.count("R")
+        for name, run in methods.items():
+            elapsed, peak, out = measure(run, commands)
+            print(f"{size:>10} {name:<12} {elapsed:>8.2f} {peak:>8.1f} {out / moves:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
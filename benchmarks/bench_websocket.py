@@ -0,0 +1,99 @@
+"""
+Throughput of the WebSocket command stream vs repeated POST /commands.
+
+Runs the ASGI app in-process on an aiosqlite file database, with a lifespan
+of its own (obstacles are not seeded), once per COMMAND_EXECUTION mode:
+"actor" (the default: requests and stream flushes go through the robot's
+actor) and "direct".
+
+Usage:
+    python -m benchmarks.bench_websocket [--chunks 2000] [--chunk "FFRFFLB"] [--modes actor direct]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+from app.services.robot_actor import robot_actors
+
+
+def use_database(path: str, mode: str) -> None:
+    """Serve requests from one engine, with robot actors in actor mode."""
+
+    @asynccontextmanager
+    async def lifespan(_app) -> AsyncGenerator[None, None]:
+        # the real lifespan connects to the configured database
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        if mode == "actor":
+            robot_actors.start(session_factory, max_group=get_settings().actor_max_group)
+        yield
+        await robot_actors.stop()
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    app.router.lifespan_context = lifespan
+
+
+def bench_post(client: TestClient, chunks: int, chunk: str) -> float:
+    start = time.perf_counter()
+    for _ in range(chunks):
+        response = client.post("/api/v1/robot/commands", json={"commands": chunk})
+        assert response.status_code == 200
+    return time.perf_counter() - start
+
+
+def bench_websocket(client: TestClient, chunks: int, chunk: str) -> float:
+    start = time.perf_counter()
+    with client.websocket_connect("/api/v1/robot/ws") as ws:
+        ws.receive_json()
+        for _ in range(chunks):
+            ws.send_text(chunk)
+            ws.receive_json()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk", default="FFRFFLB")
+    parser.add_argument("--modes", nargs="+", default=["actor", "direct"])
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request
+    settings = get_settings()
+    settings.debug = False  # no SQL echo
+    settings.slow_request_seconds = settings.slow_request_statements = 0  # nor slow-request log
+
+    print(f"{args.chunks} chunks of {args.chunk!r}")
+    print(f"{'mode':<7} {'transport':<10} {'seconds':>8} {'chunks/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            settings.command_execution = mode
+            for name, bench in (("post", bench_post), ("websocket", bench_websocket)):
+                use_database(os.path.join(tmp, f"{mode}-{name}.db"), mode)
+                with TestClient(app) as client:
+                    elapsed = bench(client, args.chunks, args.chunk)
+                print(f"{mode:<7} {name:<10} {elapsed:>8.2f} {args.chunks / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Benchmark suite: pytest tests that time the hot paths and compare with a baseline.
+
+Each test gets a `bench` fixture that calibrates how many calls fill one
+round, times --bench-rounds rounds with the garbage collector paused and
+records seconds per call. Every run also times a fixed pure-Python
+reference workload, and each result is recorded relative to it as well.
+With --bench-baseline, a test fails when its fastest round, relative to the
+reference, is more than --bench-max-regression percent above the stored
+ratio; the fastest round moves least between runs, the median and stdev
+are recorded for reading. Comparing ratios rather than seconds lets a
+baseline recorded on one machine gate runs on faster or slower ones.
+
+Usage:
+    pytest benchmarks/suite --bench-json results.json
+    pytest benchmarks/suite --bench-baseline benchmarks/suite/baseline.json
+    pytest benchmarks/suite --bench-baseline benchmarks/suite/baseline.json --bench-max-regression 50
+    pytest benchmarks/suite --bench-json benchmarks/suite/baseline.json  # re-record
+
+Ratios still shift somewhat across CPU generations and Python builds; re-record after
+changing either. On shared or throttled machines runs differ by more than the default 25%,
+raise the limit.
+"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+
+# the functional suite's fixtures: database, ASGI client, settings, cache resets
+from tests.conftest import (  # noqa: F401
+    client,
+    event_loop,
+    reset_caches,
+    settings,
+    test_db_session,
+    test_engine,
+)
+
+# one round runs the benchmarked call this long, at least once
+ROUND_SECONDS = 0.05
+# name of the reference workload in the results
+REFERENCE = "reference"
+
+_results: dict[str, dict[str, Any]] = {}
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("bench", "benchmark suite")
+    group.addoption("--bench-json", default=None, help="write results to this JSON file")
+    group.addoption("--bench-baseline", default=None, help="JSON results to compare against")
+    group.addoption(
+        "--bench-max-regression",
+        type=float,
+        default=25.0,
+        help="percent slower than the baseline before a benchmark fails",
+    )
+    group.addoption("--bench-rounds", type=int, default=7, help="timed rounds per benchmark")
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # like timeit: a collection landing in one round is noise, not the code's cost
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def _reference_workload() -> int:
+    # interpreter-bound like the engines' Python loops: arithmetic, a dict, a list
+    counts: dict[int, int] = {}
+    cells = []
+    for i in range(2_000):
+        key = (i * 7919) % 101
+        counts[key] = counts.get(key, 0) + 1
+        cells.append((i, key))
+    return len(cells) + sum(counts.values())
+
+
+class Bench:
+    """Times one callable per test; see the module docstring."""
+
+    def __init__(
+        self,
+        name: str,
+        rounds: int,
+        baseline: Optional[dict],
+        max_regression: float,
+        reference: float = 0.0,
+    ):
+        self.name = name
+        self.rounds = rounds
+        self.baseline = baseline
+        self.max_regression = max_regression
+        # seconds per reference workload call in this run
+        self.reference = reference
+
+    def __call__(self, function: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        function()
+        number = self._calls_per_round(time.perf_counter() - start)
+        timings = []
+        for _ in range(self.rounds):
+            with _gc_paused():
+                start = time.perf_counter()
+                for _ in range(number):
+                    function()
+                timings.append((time.perf_counter() - start) / number)
+        self._record(timings, number)
+
+    async def run_async(self, function: Callable[[], Awaitable[Any]]) -> None:
+        start = time.perf_counter()
+        await function()
+        number = self._calls_per_round(time.perf_counter() - start)
+        timings = []
+        for _ in range(self.rounds):
+            with _gc_paused():
+                start = time.perf_counter()
+                for _ in range(number):
+                    await function()
+                timings.append((time.perf_counter() - start) / number)
+        self._record(timings, number)
+
+    @staticmethod
+    def _calls_per_round(first_call: float) -> int:
+        return max(1, int(ROUND_SECONDS / max(first_call, 1e-9)))
+
+    def _record(self, timings: list[float], number: int) -> None:
+        fastest = min(timings)
+        _results[self.name] = {
+            "min": fastest,
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+            "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "rounds": len(timings),
+            "calls_per_round": number,
+        }
+        if self.reference:
+            _results[self.name]["relative"] = fastest / self.reference
+        if self.baseline is None or "relative" not in self.baseline.get(self.name, {}):
+            return
+        relative = fastest / self.reference
+        base = self.baseline[self.name]["relative"]
+        change = (relative / base - 1) * 100
+        if change > self.max_regression:
+            pytest.fail(
+                f"{self.name}: {relative:.3g}x the reference vs {base:.3g}x in the baseline "
+                f"(+{change:.0f}%, limit {self.max_regression:.0f}%; "
+                f"{fastest * 1e6:.1f} us, reference {self.reference * 1e6:.1f} us)"
+            )
+
+
+@pytest.fixture(scope="session")
+def bench_baseline(pytestconfig: pytest.Config) -> Optional[dict]:
+    path = pytestconfig.getoption("bench_baseline")
+    if not path:
+        return None
+    return json.loads(Path(path).read_text())["benchmarks"]
+
+
+@pytest.fixture(scope="session")
+def bench_reference(pytestconfig: pytest.Config) -> float:
+    """Seconds per reference workload call on this machine, timed like any benchmark."""
+    # every ratio divides by this one number, so give its minimum more rounds to settle
+    reference = Bench(REFERENCE, 3 * pytestconfig.getoption("bench_rounds"), None, 0.0)
+    reference(_reference_workload)
+    return _results[REFERENCE]["min"]
+
+
+@pytest.fixture
+def bench(
+    request: pytest.FixtureRequest, bench_baseline: Optional[dict], bench_reference: float
+) -> Bench:
+    return Bench(
+        request.node.name,
+        request.config.getoption("bench_rounds"),
+        bench_baseline,
+        request.config.getoption("bench_max_regression"),
+        bench_reference,
+    )
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    path = session.config.getoption("bench_json")
+    if not path or not _results:
+        return
+    document = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "unit": "seconds per call; relative: min / the reference workload's min",
+        "benchmarks": dict(sorted(_results.items())),
+    }
+    Path(path).write_text(json.dumps(document, indent=2) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    if not _results:
+        return
+    terminalreporter.section("benchmarks (per call)")
+    width = max(len(name) for name in _results)
+    terminalreporter.write_line(
+        f"{'':<{width}} {'min us':>12} {'median us':>12} {'stdev':>10} {'x reference':>12}"
+    )
+    for name, result in sorted(_results.items()):
+        terminalreporter.write_line(
+            f"{name:<{width}} {result['min'] * 1e6:>12.2f} {result['median'] * 1e6:>12.2f}"
+            f" {result['stdev'] * 1e6:>10.2f} {result.get('relative', 1.0):>12.3g}"
+        )
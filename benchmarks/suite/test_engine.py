@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.services.command_engine import ENGINES, ObstacleIndex, run_commands
+from app.services.path_planner import plan_path
+from app.utils.enums import Direction
+
+from .conftest import Bench
+
+
+def commands(length: int, alphabet: str = "FFFFBLR", seed: int = 0) -> str:
+    return "".join(random.Random(seed).choices(alphabet, k=length))
+
+
+def random_map(count: int, seed: int = 0, offset: int = 0) -> np.ndarray:
+    """About count obstacles at 10% density around (offset, 0), never on the origin."""
+    side = int((count * 10) ** 0.5)
+    cells = np.random.default_rng(seed).integers(-side // 2, side // 2, size=(count, 2))
+    cells = cells[(cells[:, 0] != 0) | (cells[:, 1] != 0)]
+    return cells + (offset, 0)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("length", [100, 10_000])
+def test_command_loop(bench: Bench, engine: str, length: int) -> None:
+    string = commands(length)
+    # on the rows the path crosses, but a million cells away: every command runs
+    obstacles = ObstacleIndex(random_map(10_000, offset=1_000_000))
+    bench(lambda: ENGINES[engine](string, 0, 0, Direction.NORTH, obstacles))
+
+
+def test_auto_engine_long_runs(bench: Bench) -> None:
+    string = commands(100_000, "F" * 30 + "LR")
+    obstacles = ObstacleIndex(random_map(10_000, offset=1_000_000))
+    bench(lambda: run_commands(string, 0, 0, Direction.NORTH, obstacles))
+
+
+def test_direction_transitions(bench: Bench) -> None:
+    def turn_and_move() -> None:
+        direction = Direction.NORTH
+        for _ in range(250):
+            direction = direction.turn_left()
+            direction.get_delta()
+            direction = direction.turn_right().turn_right()
+            direction.get_delta()
+
+    bench(turn_and_move)
+
+
+@pytest.mark.parametrize("store", ["bitmap", "sorted"])
+@pytest.mark.parametrize("size", [1_000, 100_000, 1_000_000])
+def test_obstacle_lookup(bench: Bench, size: int, store: str) -> None:
+    obstacles = ObstacleIndex(random_map(size), store=store)
+    probes = list(map(tuple, random_map(1_000, seed=1).tolist()))
+
+    def lookup() -> None:
+        for probe in probes:
+            probe in obstacles
+
+    bench(lookup)
+
+
+@pytest.mark.parametrize("size", [1_000, 100_000, 1_000_000])
+def test_obstacle_batch_lookup(bench: Bench, size: int) -> None:
+    obstacles = ObstacleIndex(random_map(size))
+    probes = random_map(100_000, seed=1)
+    bench(lambda: obstacles.contains_many(probes[:, 0], probes[:, 1]))
+
+
+def test_plan_path(bench: Bench) -> None:
+    obstacles = ObstacleIndex(random_map(4_000))
+    bench(lambda: plan_path(obstacles, 0, 0, Direction.NORTH, 40, 40))
@@ -0,0 +1,45 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.services.robot_service import RobotService
+
+from .conftest import Bench
+
+
+@pytest.fixture
+async def obstacles(test_db_session: AsyncSession) -> None:
+    await ObstacleRepository(test_db_session).bulk_create_obstacles({(1, 4), (3, 5), (7, 4)})
+
+
+@pytest.mark.parametrize(
+    "commands", ["FLFFFRFLB", "FFRFFLBBRRFFLL" * 100], ids=["9-commands", "1400-commands"]
+)
+async def test_execute_commands(
+    bench: Bench, test_db_session: AsyncSession, obstacles: None, commands: str
+) -> None:
+    """RobotService end to end on aiosqlite: read, simulate, UPDATE + INSERT, commit."""
+    service = RobotService(test_db_session)
+    await bench.run_async(lambda: service.execute_commands(commands))
+
+
+async def test_http_get_position(bench: Bench, client: AsyncClient) -> None:
+    await bench.run_async(lambda: client.get("/api/v1/robot/position"))
+
+
+async def test_http_post_commands(bench: Bench, client: AsyncClient, obstacles: None) -> None:
+    await bench.run_async(
+        lambda: client.post("/api/v1/robot/commands", json={"commands": "FLFFFRFLB"})
+    )
+
+
+async def test_http_simulate(bench: Bench, client: AsyncClient, obstacles: None) -> None:
+    candidates = ["FFRFF", "FLFFB", "RRFF", "LFFFFR"] * 25
+    await bench.run_async(
+        lambda: client.post("/api/v1/robot/simulate", json={"candidates": candidates})
+    )
+
+
+async def test_http_health(bench: Bench, client: AsyncClient) -> None:
+    await bench.run_async(lambda: client.get("/api/v1/health"))
@@ -8,9 +8,14 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import get_settings
+from app.core.metrics import registry
 from app.db.base import Base
 from app.db.session import get_db
 from app.main import app
+from app.services.obstacle_cache import obstacle_cache
+from app.services.obstacle_tiles import obstacle_tiles
+from app.services.plan_cache import plan_cache
+from app.services.position_cache import position_cache
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -23,6 +28,16 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_caches() -> None:
+    # every test gets a fresh database, so drop the process-wide state
+    obstacle_cache.clear()
+    obstacle_tiles.clear()
+    plan_cache.clear()
+    position_cache.clear()
+    registry.clear()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def test_engine():
     engine = create_async_engine(
@@ -0,0 +1,145 @@
+import gzip
+
+import pytest
+from httpx import AsyncClient
+
+from app.services import command_body
+from app.services.command_body import (
+    CommandBodyError,
+    CommandBodyTooLarge,
+    UnsupportedEncoding,
+    read_commands,
+)
+
+URL = "/api/v1/robot/commands"
+TEXT = {"content-type": "text/plain"}
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 1000])
+@pytest.mark.parametrize("body", [b"FFRBL", b"FFRBL\n", b"FFRBL\r\n\r\n"])
+async def test_read_commands(size: int, body: bytes) -> None:
+    """GIVEN: a command string, with or without trailing line breaks, in chunks."""
+    # WHEN
+    commands = await read_commands(chunked(body, size), None, 100)
+
+    # THEN
+    assert commands == "FFRBL"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 1000])
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b"FFXRR", "b'X' at offset 2"),
+        (b"FF RR", "b' ' at offset 2"),
+        (b"FF\nRR", "offset 2"),
+        (b"ff", "b'f' at offset 0"),
+        (b"", "empty"),
+        (b"\n", "empty"),
+    ],
+)
+async def test_invalid_commands(size: int, body: bytes, message: str) -> None:
+    """GIVEN: bodies that are not a command string."""
+    # WHEN / THEN: the offset is counted across chunks
+    with pytest.raises(CommandBodyError, match=message):
+        await read_commands(chunked(body, size), None, 100)
+
+
+@pytest.mark.asyncio
+async def test_gzip_limits() -> None:
+    """GIVEN: a gzip body that is small compressed but large decompressed."""
+    body = gzip.compress(b"F" * 10_000)
+
+    # WHEN / THEN: the decompressed size counts, and the stream must be complete
+    assert len(await read_commands(chunked(body, 7), "gzip", 10_000)) == 10_000
+    with pytest.raises(CommandBodyTooLarge):
+        await read_commands(chunked(body, 7), "gzip", 9_999)
+    with pytest.raises(CommandBodyError, match="truncated"):
+        await read_commands(chunked(body[:-4], 7), "gzip", 10_000)
+    with pytest.raises(CommandBodyError, match="invalid gzip"):
+        await read_commands(chunked(b"FFFF", 7), "gzip", 10_000)
+
+
+@pytest.mark.asyncio
+async def test_unsupported_encodings(monkeypatch) -> None:
+    """GIVEN: a server without the zstandard package."""
+    monkeypatch.setattr(command_body, "zstandard", None)
+
+    # WHEN / THEN
+    with pytest.raises(UnsupportedEncoding, match="zstandard"):
+        await read_commands(chunked(b"F", 1), "zstd", 100)
+    with pytest.raises(UnsupportedEncoding, match="Content-Encoding"):
+        await read_commands(chunked(b"F", 1), "br", 100)
+
+
+@pytest.mark.asyncio
+async def test_zstd_body(client: AsyncClient) -> None:
+    """GIVEN: a zstd encoded text body."""
+    zstandard = pytest.importorskip("zstandard")
+    body = zstandard.ZstdCompressor().compress(b"FFRFF")
+
+    # WHEN
+    response = await client.post(URL, content=body, headers={**TEXT, "content-encoding": "zstd"})
+
+    # THEN
+    assert response.status_code == 200
+    assert response.json()["commands_executed"] == "FFRFF"
+
+
+@pytest.mark.asyncio
+async def test_text_gzip_and_json_bodies_agree(client: AsyncClient) -> None:
+    """GIVEN: the same commands sent as JSON, text/plain and gzipped text/plain."""
+    # WHEN
+    as_json = await client.post(URL, json={"commands": "FFRFF"})
+    as_text = await client.post(URL, content=b"BBLBB\n", headers=TEXT)
+    as_gzip = await client.post(
+        URL,
+        content=gzip.compress(b"FFRFF"),
+        headers={**TEXT, "content-encoding": "gzip"},
+    )
+    as_robot = await client.post("/api/v1/robots/1/commands", content=b"BBLBB", headers=TEXT)
+
+    # THEN: the first and third move the robot the same way, the second undoes the first
+    assert as_json.status_code == as_text.status_code == as_gzip.status_code == 200
+    assert as_json.json()["commands_executed"] == "FFRFF"
+    assert as_text.json()["commands_executed"] == "BBLBB"
+    assert {key: as_json.json()[key] for key in ("x", "y", "direction")} == {
+        key: as_gzip.json()[key] for key in ("x", "y", "direction")
+    }
+    assert as_robot.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_body_errors(client: AsyncClient, settings, monkeypatch) -> None:
+    """GIVEN: a 50 byte limit on command bodies."""
+    monkeypatch.setattr(settings, "command_body_max_bytes", 50)
+
+    # WHEN
+    declared = await client.post(URL, content=b"F" * 51, headers=TEXT)
+    chunked_body = await client.post(URL, content=chunked(b"F" * 51, 4), headers=TEXT)
+    bomb = await client.post(
+        URL,
+        content=gzip.compress(b"F" * 1000),
+        headers={**TEXT, "content-encoding": "gzip"},
+    )
+    invalid = await client.post(URL, content=b"FFX", headers=TEXT)
+    csv = await client.post(URL, content=b"F", headers={"content-type": "text/csv"})
+    brotli = await client.post(URL, content=b"F", headers={**TEXT, "content-encoding": "br"})
+    pattern = await client.post(URL, json={"commands": "FX"})
+
+    # THEN: too large from Content-Length, while streaming, or after decompression
+    assert declared.status_code == 413
+    assert chunked_body.status_code == 413
+    assert bomb.status_code == 413
+    assert invalid.status_code == 422
+    assert "b'X' at offset 2" in invalid.json()["detail"]
+    assert csv.status_code == brotli.status_code == 415
+    assert pattern.status_code == 422
+    assert pattern.json()["detail"][0]["loc"] == ["body", "commands"]
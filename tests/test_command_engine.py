@@ -0,0 +1,203 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.services import command_engine
+from app.services.command_engine import (
+    ObstacleIndex,
+    execute_segmented,
+    execute_stepwise,
+    execute_vectorized,
+    run_commands,
+    trace_path,
+)
+from app.utils.enums import Direction
+
+
+def direction_loop(
+    commands: str, x: int, y: int, direction: Direction, obstacles: set[tuple[int, int]]
+) -> tuple:
+    """The original per-character loop built on the Direction helpers."""
+    for index, command in enumerate(commands):
+        if command in "FB":
+            dx, dy = direction.get_delta()
+            if command == "B":
+                dx, dy = -dx, -dy
+            if (x + dx, y + dy) in obstacles:
+                return x, y, direction, True, (x + dx, y + dy), index
+            x, y = x + dx, y + dy
+        elif command == "L":
+            direction = direction.turn_left()
+        else:
+            direction = direction.turn_right()
+    return x, y, direction, False, None, None
+
+
+def as_tuple(result) -> tuple:
+    return (
+        result.x,
+        result.y,
+        result.direction,
+        result.stopped_by_obstacle,
+        result.obstacle_coordinate,
+        result.stopped_at,
+    )
+
+
+@pytest.mark.parametrize("store", ["bitmap", "sorted"])
+def test_obstacle_index_nearest(store: str) -> None:
+    """GIVEN: obstacles on the robot's row and column."""
+    index = ObstacleIndex({(1, 2), (7, 2), (4, 5), (4, -3)}, store=store)
+
+    # THEN: distances are measured along the heading, ahead and behind
+    assert index.nearest(4, 2, 3) == (3, 3)  # WEST
+    assert index.nearest(4, 2, 1) == (3, 3)  # EAST
+    assert index.nearest(4, 2, 0) == (3, 5)  # NORTH
+    assert index.nearest(4, 2, 2) == (5, 3)  # SOUTH
+    assert index.nearest(0, 0, 0) == (None, None)
+    assert (1, 2) in index
+    assert (2, 2) not in index
+
+
+@pytest.mark.parametrize("store", ["bitmap", "sorted"])
+@pytest.mark.parametrize("seed", range(40))
+def test_segmented_matches_original_loop(seed: int, store: str) -> None:
+    """GIVEN: random command strings on a dense random map, in either layout."""
+    rng = random.Random(seed)
+    obstacles = {(rng.randint(-8, 8), rng.randint(-8, 8)) for _ in range(rng.randint(0, 40))}
+    index = ObstacleIndex(obstacles, store=store)
+    alphabet = rng.choice(["FBLR", "FFFFLR", "FB", "FFFBBBR"])
+    commands = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 300)))
+    direction = rng.choice(list(Direction))
+    # start anywhere, even on an obstacle: moving back onto it must still stop the robot
+    x, y = rng.randint(-8, 8), rng.randint(-8, 8)
+
+    # WHEN
+    expected = direction_loop(commands, x, y, direction, obstacles)
+
+    # THEN
+    assert as_tuple(execute_stepwise(commands, x, y, direction, index)) == expected
+    assert as_tuple(execute_segmented(commands, x, y, direction, index)) == expected
+    assert as_tuple(execute_vectorized(commands, x, y, direction, index)) == expected
+
+
+@pytest.mark.parametrize("store", ["bitmap", "sorted"])
+@pytest.mark.parametrize("seed", range(5))
+def test_nearest_on_long_lines(seed: int, store: str) -> None:
+    """GIVEN: a few obstacles on lines thousands of cells long."""
+    rng = random.Random(seed)
+    cells = {(rng.randint(-3000, 3000), rng.randint(-3, 3)) for _ in range(40)}
+    cells |= {(rng.randint(-3, 3), rng.randint(-3000, 3000)) for _ in range(40)}
+    index = ObstacleIndex(cells, store=store)
+
+    for _ in range(200):
+        x, y = rng.randint(-3100, 3100), rng.randint(-4, 4)
+        if rng.random() < 0.5:
+            x, y = y, x
+        # brute force: distances along +x and -x, +y and -y
+        east = [cx - x for cx, cy in cells if cy == y and cx > x]
+        west = [x - cx for cx, cy in cells if cy == y and cx < x]
+        north = [cy - y for cx, cy in cells if cx == x and cy > y]
+        south = [y - cy for cx, cy in cells if cx == x and cy < y]
+
+        # THEN
+        assert index.nearest(x, y, 1) == (min(east, default=None), min(west, default=None))
+        assert index.nearest(x, y, 0) == (min(north, default=None), min(south, default=None))
+
+
+@pytest.mark.parametrize("store", ["bitmap", "sorted"])
+def test_obstacle_index_round_trip(store: str) -> None:
+    """GIVEN: obstacles with duplicates, negative and int32 edge coordinates."""
+    cells = [(0, 0), (0, 0), (-1, 5), (3, -(2**31)), (2**31 - 1, 9), (-(2**31), 2**31 - 1)]
+    if store == "bitmap":
+        cells = [(x % 50 - 25, y % 40 - 20) for x, y in cells]
+    index = ObstacleIndex(cells, store=store)
+
+    # THEN: same cells back, and batch lookups agree with `in`
+    assert index.store == store
+    assert sorted(index) == sorted(set(cells))
+    assert len(index) == len(set(cells))
+    xs = np.array([x for x, _ in cells] + [2**40, -(2**33), 1], dtype=np.int64)
+    ys = np.array([y for _, y in cells] + [0, 0, 1], dtype=np.int64)
+    assert index.contains_many(xs, ys).tolist() == [True] * len(cells) + [False] * 3
+    assert (2**32, 0) not in index
+
+
+def test_obstacle_index_picks_layout_by_density() -> None:
+    """GIVEN: a dense square and the same number of obstacles spread out."""
+    rng = random.Random(0)
+    dense = ObstacleIndex([(x, y) for x in range(100) for y in range(100) if rng.random() < 0.5])
+    sparse = ObstacleIndex([(rng.randint(-(10**6), 10**6), 0) for _ in range(5000)])
+
+    # THEN
+    assert dense.store == "bitmap"
+    assert dense.nbytes < 8 * 2 * len(dense)
+    assert sparse.store == "sorted"
+    assert sparse.nbytes == 8 * 2 * len(sparse)
+    assert ObstacleIndex().store == "sorted"
+    with pytest.raises(ValueError):
+        ObstacleIndex([(2**31, 0)])
+
+
+def test_segmented_long_straight_run() -> None:
+    """GIVEN: a long straight run ending at an obstacle far away."""
+    index = ObstacleIndex({(-99_996, 2)})
+
+    # WHEN: robot at (4, 2, WEST) drives forward
+    result = execute_segmented("F" * 200_000, 4, 2, Direction.WEST, index)
+
+    # THEN: stops on the cell right before the obstacle
+    assert as_tuple(result) == (-99_995, 2, Direction.WEST, True, (-99_996, 2), 99_999)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_across_chunks(seed: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    """GIVEN: a command string spanning many numpy chunks."""
+    monkeypatch.setattr(command_engine, "VECTOR_CHUNK", 7)
+    rng = random.Random(seed)
+    obstacles = {(rng.randint(-10, 10), rng.randint(-10, 10)) for _ in range(30)}
+    commands = "".join(rng.choice("FFBLR") for _ in range(500))
+
+    # WHEN
+    expected = direction_loop(commands, 0, 0, Direction.NORTH, obstacles)
+    result = execute_vectorized(commands, 0, 0, Direction.NORTH, ObstacleIndex(obstacles))
+
+    # THEN: state is carried over chunk boundaries exactly
+    assert as_tuple(result) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_trace_path_matches_original_loop(seed: int) -> None:
+    """GIVEN: random command strings, traced in chunks of a few commands."""
+    rng = random.Random(seed)
+    obstacles = {(rng.randint(-8, 8), rng.randint(-8, 8)) for _ in range(rng.randint(0, 30))}
+    commands = "".join(rng.choice("FFBLR") for _ in range(rng.randint(1, 300)))
+    x, y = rng.randint(-8, 8), rng.randint(-8, 8)
+
+    # WHEN
+    chunks = trace_path(commands, x, y, Direction.EAST, ObstacleIndex(obstacles), chunk_size=7)
+    path = [tuple(cell) for chunk in chunks for cell in chunk.tolist()]
+
+    # THEN: one cell per move, ending where the original loop stops
+    expected = []
+    for end in range(1, len(commands) + 1):
+        step = direction_loop(commands[:end], x, y, Direction.EAST, obstacles)
+        if step[3]:
+            break
+        if commands[end - 1] in "FB":
+            expected.append(step[:2])
+    assert path == expected
+    final = direction_loop(commands, x, y, Direction.EAST, obstacles)
+    assert (path[-1] if path else (x, y)) == final[:2]
+
+
+@pytest.mark.parametrize("engine", ["auto", "stepwise", "segmented", "vectorized"])
+@pytest.mark.parametrize("commands", ["FFRFF" * 100, "F" * 1000 + "R" + "F" * 1000, "FLB"])
+def test_run_commands_engines_agree(engine: str, commands: str) -> None:
+    """GIVEN: each engine, including automatic selection."""
+    index = ObstacleIndex({(-500, 2), (3, 40)})
+
+    # THEN
+    expected = direction_loop(commands, 4, 2, Direction.WEST, {(-500, 2), (3, 40)})
+    assert as_tuple(run_commands(commands, 4, 2, Direction.WEST, index, engine=engine)) == expected
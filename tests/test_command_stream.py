@@ -0,0 +1,139 @@
+import sqlite3
+from collections.abc import AsyncGenerator, Iterator
+from pathlib import Path
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.models.command_history import CommandHistory
+from app.db.session import get_db
+from app.main import app
+from app.services.command_stream import CommandStream
+from app.services.obstacle_service import create_obstacle
+from app.services.robot_service import RobotService
+from app.utils.enums import Direction
+
+
+@pytest.mark.asyncio
+async def test_stream_persists_every_n_chunks(
+    test_db_session: AsyncSession, settings, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """GIVEN: a stream that persists every 3 chunks."""
+    monkeypatch.setattr(settings, "ws_persist_every", 3)
+    monkeypatch.setattr(settings, "ws_persist_interval", 3600)
+    stream = CommandStream(test_db_session)
+    assert await stream.open() == (4, 2, Direction.WEST)
+    assert not test_db_session.in_transaction()
+
+    # WHEN: two chunks
+    await stream.execute("F")
+    await stream.execute("F")
+
+    # THEN: nothing written yet, and no transaction held between chunks
+    assert not test_db_session.in_transaction()
+    count = select(func.count(CommandHistory.id))
+    assert await test_db_session.scalar(count) == 0
+
+    # WHEN: third chunk
+    result = await stream.execute("LF")
+
+    # THEN: position and all three history rows written together
+    assert (result.x, result.y, result.direction) == (2, 1, Direction.SOUTH)
+    assert await test_db_session.scalar(count) == 3
+    assert await RobotService(test_db_session).get_position() == (2, 1, Direction.SOUTH)
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_chunk_at_obstacle(test_db_session: AsyncSession) -> None:
+    """GIVEN: an obstacle added while the stream is open."""
+    stream = CommandStream(test_db_session)
+    await stream.open()
+    await stream.execute("F")
+    await create_obstacle(test_db_session, 1, 2)
+
+    # WHEN: (3, 2, WEST) drives west
+    blocked = await stream.execute("FFFF")
+    after = await stream.execute("R")
+
+    # THEN: the chunk stops before (1, 2), the next chunk continues from there
+    assert blocked.stopped_by_obstacle is True
+    assert blocked.obstacle_coordinate == (1, 2)
+    assert (blocked.x, blocked.y) == (2, 2)
+    assert (after.x, after.y, after.direction) == (2, 2, Direction.NORTH)
+
+    # WHEN: the stream closes
+    await stream.close()
+
+    # THEN
+    assert await RobotService(test_db_session).get_position() == (2, 2, Direction.NORTH)
+
+
+@pytest.fixture
+def file_db(tmp_path) -> Iterator[Path]:
+    # the test client runs its own event loop, so the app gets a file database
+    path = tmp_path / "ws.db"
+
+    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            yield session
+        await engine.dispose()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield path
+    app.dependency_overrides.clear()
+
+
+def test_websocket_endpoint(file_db: Path, settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    """GIVEN: the app on a file database."""
+    # the test client cancels the handler on exit, so persist every chunk here
+    monkeypatch.setattr(settings, "ws_persist_every", 1)
+
+    # WHEN
+    with TestClient(app).websocket_connect("/api/v1/robot/ws") as ws:
+        hello = ws.receive_json()
+        ws.send_text("FF")
+        moved = ws.receive_json()
+        ws.send_text("nope")
+        error = ws.receive_json()
+        ws.send_text("R")
+        turned = ws.receive_json()
+
+    # THEN
+    assert hello == {"type": "position", "x": 4, "y": 2, "direction": "WEST"}
+    assert moved == {"type": "position", "x": 2, "y": 2, "direction": "WEST", "seq": 1}
+    assert error["type"] == "error"
+    assert turned["direction"] == "NORTH"
+
+    # position and history persisted
+    with sqlite3.connect(file_db) as conn:
+        assert conn.execute("SELECT x, y, direction FROM robots").fetchall() == [(2, 2, "NORTH")]
+        assert conn.execute("SELECT command_string FROM command_history").fetchall() == [
+            ("FF",),
+            ("R",),
+        ]
+
+
+def test_websocket_binary_frame(file_db: Path, settings, monkeypatch: pytest.MonkeyPatch) -> None:
+    """GIVEN: a client sending a binary frame after a text one."""
+    monkeypatch.setattr(settings, "ws_persist_every", 1)
+
+    # WHEN
+    with TestClient(app).websocket_connect("/api/v1/robot/ws") as ws:
+        ws.receive_json()
+        ws.send_text("F")
+        ws.receive_json()
+        ws.send_bytes(b"FF")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+
+    # THEN: closed as unsupported data, the text chunk kept
+    assert closed.value.code == 1003
+    with sqlite3.connect(file_db) as conn:
+        assert conn.execute("SELECT x, y FROM robots").fetchall() == [(3, 2)]
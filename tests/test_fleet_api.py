@@ -0,0 +1,158 @@
+import threading
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.command_history import CommandHistory
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.services import simulation
+
+
+async def create_robot(client: AsyncClient, x: int, y: int, direction: str) -> int:
+    response = await client.post("/api/v1/robots", json={"x": x, "y": y, "direction": direction})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_create_robot_with_own_start_pose(client: AsyncClient) -> None:
+    """GIVEN: a new robot created at (10, -3, EAST)."""
+    robot_id = await create_robot(client, 10, -3, "EAST")
+
+    # WHEN
+    response = await client.get(f"/api/v1/robots/{robot_id}/position")
+
+    # THEN
+    assert response.status_code == 200
+    assert response.json() == {"x": 10, "y": -3, "direction": "EAST"}
+
+
+@pytest.mark.asyncio
+async def test_commands_only_move_the_addressed_robot(client: AsyncClient) -> None:
+    """GIVEN: two robots."""
+    first = await create_robot(client, 0, 0, "NORTH")
+    second = await create_robot(client, 5, 5, "SOUTH")
+
+    # WHEN
+    response = await client.post(f"/api/v1/robots/{second}/commands", json={"commands": "FF"})
+
+    # THEN
+    assert response.status_code == 200
+    assert (response.json()["x"], response.json()["y"]) == (5, 3)
+    first_position = (await client.get(f"/api/v1/robots/{first}/position")).json()
+    assert first_position == {"x": 0, "y": 0, "direction": "NORTH"}
+
+
+@pytest.mark.asyncio
+async def test_unknown_robot_returns_404(client: AsyncClient) -> None:
+    """GIVEN: no robot with id 999."""
+    # THEN
+    assert (await client.get("/api/v1/robots/999/position")).status_code == 404
+    response = await client.post("/api/v1/robots/999/commands", json={"commands": "F"})
+    assert response.status_code == 404
+    response = await client.post(
+        "/api/v1/robots/commands", json={"items": [{"robot_id": 999, "commands": "F"}]}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("loading", ["snapshot", "tiled"])
+async def test_fleet_batch(
+    client: AsyncClient, test_db_session: AsyncSession, test_engine, settings, monkeypatch, loading
+) -> None:
+    """GIVEN: three robots, one of them heading into an obstacle."""
+    monkeypatch.setattr(settings, "obstacle_loading", loading)
+    await ObstacleRepository(test_db_session).create_obstacle(0, 3)
+    a = await create_robot(client, 0, 0, "NORTH")
+    b = await create_robot(client, 10, 10, "WEST")
+    c = await create_robot(client, -5, 0, "EAST")
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(" ".join(statement.split()[:4]))
+
+    # WHEN: robot a gets two entries which must run in order
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await client.post(
+            "/api/v1/robots/commands",
+            json={
+                "items": [
+                    {"robot_id": a, "commands": "FF"},
+                    {"robot_id": b, "commands": "FFF"},
+                    {"robot_id": a, "commands": "FF"},
+                    {"robot_id": c, "commands": "RR"},
+                ]
+            },
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+    # THEN: results in request order, the second entry for a starts at (0, 2)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["robot_id"] for r in results] == [a, b, a, c]
+    assert (results[0]["x"], results[0]["y"]) == (0, 2)
+    assert (results[1]["x"], results[1]["y"]) == (7, 10)
+    assert results[2]["stopped_by_obstacle"] is True
+    assert results[2]["obstacle_coordinate"] == [0, 3]
+    assert (results[2]["x"], results[2]["y"]) == (0, 2)
+    assert results[3]["direction"] == "WEST"
+
+    # one robot SELECT, one UPDATE for all robots, one INSERT for all history rows
+    assert sum(s.startswith("SELECT robots.id") for s in statements) == 1
+    assert sum(s.startswith("UPDATE robots") for s in statements) == 1
+    assert sum(s.startswith("INSERT INTO command_history") for s in statements) == 1
+
+    history_rows = await test_db_session.scalar(select(func.count(CommandHistory.id)))
+    assert history_rows == 4
+    position = (await client.get(f"/api/v1/robots/{a}/position")).json()
+    assert (position["x"], position["y"]) == (0, 2)
+
+
+@pytest.mark.asyncio
+async def test_large_fleet_batch_runs_off_the_event_loop(
+    client: AsyncClient, settings, monkeypatch
+) -> None:
+    """GIVEN: two robots and batches of 10 commands or more counted as large."""
+    monkeypatch.setattr(settings, "offload_min_commands", 10)
+    a = await create_robot(client, 0, 0, "NORTH")
+    b = await create_robot(client, 0, 0, "SOUTH")
+    threads = []
+    run_commands = simulation.run_commands
+
+    def spy(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return run_commands(*args, **kwargs)
+
+    monkeypatch.setattr(simulation, "run_commands", spy)
+
+    # WHEN: a small batch, then a large one
+    items = [{"robot_id": a, "commands": "FFFFF"}, {"robot_id": b, "commands": "FFFFF"}]
+    small = await client.post("/api/v1/robots/commands", json={"items": items[:1]})
+    small_threads, threads[:] = list(threads), []
+    large = await client.post("/api/v1/robots/commands", json={"items": items})
+
+    # THEN: the small one ran on the event loop, the large one in one worker thread
+    assert small.status_code == large.status_code == 200
+    assert small_threads == [threading.main_thread()]
+    assert len(threads) == 2 and len(set(threads)) == 1
+    assert threads[0] is not threading.main_thread()
+    assert [(r["x"], r["y"]) for r in large.json()["results"]] == [(0, 10), (0, -5)]
+
+
+@pytest.mark.asyncio
+async def test_default_robot_endpoints_still_work(client: AsyncClient) -> None:
+    """GIVEN: the default robot exists before other robots are added."""
+    await client.get("/api/v1/robot/position")
+    await create_robot(client, 100, 100, "NORTH")
+
+    # WHEN
+    response = await client.post("/api/v1/robot/commands", json={"commands": "F"})
+
+    # THEN: the singleton endpoints still drive the first robot
+    assert (response.json()["x"], response.json()["y"]) == (3, 2)
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.obstacle_repository import ObstacleRepository
+
+
+async def send(client: AsyncClient, *commands: str) -> None:
+    for command in commands:
+        response = await client.post("/api/v1/robot/commands", json={"commands": command})
+        assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_history_pages_with_cursor(client: AsyncClient) -> None:
+    """GIVEN: five commands sent to the default robot."""
+    await send(client, "F", "FF", "L", "R", "B")
+
+    # WHEN: reading two at a time
+    seen = []
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = (await client.get("/api/v1/robot/history", params=params)).json()
+        seen.extend(item["command_string"] for item in page["items"])
+        cursor = page["next_cursor"]
+
+    # THEN: newest first, every row exactly once, no cursor after the last page
+    assert seen == ["B", "R", "L", "FF", "F"]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_history_filters(client: AsyncClient, test_db_session: AsyncSession) -> None:
+    """GIVEN: robot at (4, 2, WEST), obstacle at (2, 2); the second F is blocked."""
+    await ObstacleRepository(test_db_session).create_obstacle(2, 2)
+    await send(client, "F", "F", "L")
+
+    # WHEN
+    url = "/api/v1/robot/history"
+    stopped = (await client.get(url, params={"stopped_by_obstacle": True})).json()
+    moving = (await client.get(url, params={"stopped_by_obstacle": False})).json()
+    old = (await client.get(url, params={"until": "1970-01-01T00:00:00"})).json()
+    recent = (await client.get(url, params={"since": "1970-01-01T00:00:00"})).json()
+
+    # THEN
+    assert [(i["command_string"], i["obstacle_x"]) for i in stopped["items"]] == [("F", 2)]
+    assert [i["command_string"] for i in moving["items"]] == ["L", "F"]
+    assert old["items"] == []
+    assert len(recent["items"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_history_of_other_robot(client: AsyncClient) -> None:
+    """GIVEN: two robots with their own history."""
+    await send(client, "F")
+    robot = (await client.post("/api/v1/robots", json={"x": 0, "y": 0, "direction": "EAST"})).json()
+    await client.post(f"/api/v1/robots/{robot['id']}/commands", json={"commands": "RRFF"})
+
+    # WHEN
+    page = (await client.get("/api/v1/robot/history", params={"robot_id": robot["id"]})).json()
+
+    # THEN
+    assert [item["command_string"] for item in page["items"]] == ["RRFF"]
+    assert (page["items"][0]["final_x"], page["items"][0]["final_direction"]) == (-2, "WEST")
+    assert (await client.get("/api/v1/robot/history", params={"robot_id": 999})).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_history_export_ndjson(client: AsyncClient) -> None:
+    """GIVEN: a few commands."""
+    await send(client, "F", "LF", "RB")
+
+    # WHEN
+    response = await client.get("/api/v1/robot/history/export")
+
+    # THEN: one JSON object per line, oldest first
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["command_string"] for row in rows] == ["F", "LF", "RB"]
+    assert rows[0]["initial_x"] == 4 and rows[0]["final_x"] == 3
+    assert "created_at" in rows[0]
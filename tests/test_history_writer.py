@@ -0,0 +1,135 @@
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models.command_history import CommandHistory
+from app.repositories.command_history_repository import history_row
+from app.services.history_writer import HistoryWriter, history_writer
+from app.services.robot_service import RobotService
+from app.utils.enums import Direction
+
+
+def make_row(command: str = "F") -> dict:
+    return history_row(1, command, 4, 2, Direction.WEST, 3, 2, Direction.WEST)
+
+
+async def count_history(db: AsyncSession) -> int:
+    return await db.scalar(select(func.count(CommandHistory.id)))
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+@pytest.fixture
+def session_factory(test_db_session: AsyncSession) -> async_sessionmaker[AsyncSession]:
+    # the writer's sessions share the test connection (and its rolled-back transaction)
+    return async_sessionmaker(bind=test_db_session.bind, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def writer() -> AsyncGenerator[HistoryWriter, None]:
+    writer = HistoryWriter()
+    yield writer
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_is_full(
+    writer: HistoryWriter, session_factory, test_db_session
+) -> None:
+    """GIVEN: batch size 3 and a long flush interval."""
+    await writer.start(session_factory, batch_size=3, flush_interval=60)
+
+    # WHEN
+    await writer.submit([make_row() for _ in range(3)])
+
+    # THEN: written without waiting for the interval, in one batch
+    await wait_for(lambda: writer.rows_written == 3)
+    assert writer.batches == 1
+    assert await count_history(test_db_session) == 3
+
+
+@pytest.mark.asyncio
+async def test_flushes_after_interval(
+    writer: HistoryWriter, session_factory, test_db_session
+) -> None:
+    """GIVEN: a large batch size and a short flush interval."""
+    await writer.start(session_factory, batch_size=100, flush_interval=0.05)
+
+    # WHEN
+    await writer.submit([make_row(), make_row()])
+
+    # THEN
+    await wait_for(lambda: writer.rows_written == 2)
+    assert await count_history(test_db_session) == 2
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_queue(writer: HistoryWriter, session_factory, test_db_session) -> None:
+    """GIVEN: rows that would only be flushed much later."""
+    await writer.start(session_factory, batch_size=100, flush_interval=60)
+    await writer.submit([make_row(c) for c in "FBLRF"])
+
+    # WHEN
+    await writer.stop()
+
+    # THEN
+    assert not writer.running
+    assert writer.rows_written == 5
+    assert await count_history(test_db_session) == 5
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure(
+    writer: HistoryWriter, session_factory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """GIVEN: a queue of one row and a flush stuck on a slow database."""
+    release = asyncio.Event()
+    flushed: list[int] = []
+
+    async def slow_flush(rows: list) -> None:
+        await release.wait()
+        flushed.append(len(rows))
+
+    monkeypatch.setattr(writer, "_flush", slow_flush)
+    await writer.start(session_factory, batch_size=1, flush_interval=60, max_queue=1)
+
+    # WHEN: one row is being flushed, one fills the queue
+    await writer.submit([make_row(), make_row()])
+
+    # THEN: the next submit waits for room
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(writer.submit([make_row()]), 0.05)
+
+    release.set()
+    await writer.submit([make_row()])
+    await writer.stop()
+    assert sum(flushed) == 3
+
+
+@pytest.mark.asyncio
+async def test_service_writes_history_behind(
+    session_factory, test_db_session: AsyncSession
+) -> None:
+    """GIVEN: the process-wide writer running in batched mode."""
+    await history_writer.start(session_factory, batch_size=100, flush_interval=60)
+    try:
+        # WHEN
+        service = RobotService(test_db_session)
+        x, y, direction, stopped, obstacle = await service.execute_commands("FF")
+
+        # THEN: position is committed right away, history once the writer drains
+        assert (x, y) == (2, 2)
+        assert await service.get_position() == (2, 2, Direction.WEST)
+        assert await count_history(test_db_session) == 0
+    finally:
+        await history_writer.stop()
+
+    assert await count_history(test_db_session) == 1
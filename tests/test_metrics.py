@@ -0,0 +1,74 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import Counter, Histogram, Registry
+from app.repositories.obstacle_repository import ObstacleRepository
+
+
+def sample(text: str, line_start: str) -> float:
+    """Value of the first exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {line_start!r} in:\n{text}")
+
+
+def test_exposition_format() -> None:
+    """GIVEN: a counter with labels and a histogram."""
+    registry = Registry()
+    requests = registry.register(Counter("requests", "Requests", ("path",)))
+    sizes = registry.register(Histogram("size", "Sizes", (1, 10)))
+
+    # WHEN
+    requests.inc('/a"b')
+    requests.inc('/a"b', amount=2)
+    for value in (0.5, 1, 5, 50):
+        sizes.observe(value)
+
+    # THEN: cumulative buckets, escaped label values
+    assert registry.render().splitlines() == [
+        "# HELP requests Requests",
+        "# TYPE requests counter",
+        'requests_total{path="/a\\"b"} 3',
+        "# HELP size Sizes",
+        "# TYPE size histogram",
+        'size_bucket{le="1"} 2',
+        'size_bucket{le="10"} 3',
+        'size_bucket{le="+Inf"} 4',
+        "size_sum 56.5",
+        "size_count 4",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_metrics_after_commands(client: AsyncClient, test_db_session: AsyncSession) -> None:
+    """GIVEN: robot at (4, 2, WEST) with an obstacle at (2, 2)."""
+    await ObstacleRepository(test_db_session).create_obstacle(2, 2)
+
+    # WHEN: one string runs into it, one runs to the end
+    await client.post("/api/v1/robot/commands", json={"commands": "FFFF"})
+    await client.post("/api/v1/robot/commands", json={"commands": "RRFF"})
+    await client.get("/api/v1/robots/1/position")
+    await client.get("/no/such/path")
+    response = await client.get("/metrics")
+
+    # THEN
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert sample(text, "robot_obstacle_stops_total") == 1
+    assert sample(text, "robot_command_length_count") == 2
+    assert sample(text, "robot_commands_executed_sum") == 1 + 4  # stopped after one move
+    route = 'route="/api/v1/robot/commands"'
+    assert (
+        sample(text, f'http_request_duration_seconds_count{{method="POST",{route},status="200"}}')
+        == 2
+    )
+    assert 'route="/api/v1/robots/{robot_id}/position"' in text
+    assert 'route="<unmatched>",status="404"' in text
+    # the commands request read and wrote the robot and its history
+    assert sample(text, f"db_statements_per_request_sum{{{route}}}") >= 2 * 3
+    assert sample(text, f"db_time_per_request_seconds_sum{{{route}}}") > 0
+    assert sample(text, "db_statements_total") >= 6
+    assert "db_pool_checked_out " in text
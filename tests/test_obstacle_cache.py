@@ -0,0 +1,61 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.obstacle_cache import obstacle_cache
+from app.services.obstacle_service import create_obstacle, create_obstacles
+from app.services.robot_service import RobotService
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_reused_between_commands(test_db_session: AsyncSession) -> None:
+    """GIVEN: several commands with no obstacle writes in between."""
+    service = RobotService(test_db_session)
+
+    # WHEN
+    await service.execute_commands("F")
+    await service.execute_commands("F")
+    await service.execute_commands("F")
+
+    # THEN: obstacles loaded once, then served from the snapshot
+    assert obstacle_cache.misses == 1
+    assert obstacle_cache.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_new_obstacle_seen_by_next_command(test_db_session: AsyncSession) -> None:
+    """GIVEN: a warm snapshot without obstacles."""
+    service = RobotService(test_db_session)
+    await service.execute_commands("L")
+    version = obstacle_cache.version
+
+    # WHEN: an obstacle appears right in front of the robot (4, 2, SOUTH)
+    await create_obstacle(test_db_session, 4, 1)
+
+    # THEN: the write invalidated the snapshot and the next command stops
+    assert obstacle_cache.version == version + 1
+    x, y, direction, stopped, obstacle = await service.execute_commands("F")
+
+    assert (x, y) == (4, 2)
+    assert stopped is True
+    assert obstacle == (4, 1)
+    assert obstacle_cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_obstacles_seen_through_api(
+    client: AsyncClient, test_db_session: AsyncSession
+) -> None:
+    """GIVEN: the snapshot was built by an earlier request."""
+    await client.post("/api/v1/robot/commands", json={"commands": "R"})
+
+    # WHEN: obstacles are bulk inserted in front of the robot (4, 2, NORTH)
+    await create_obstacles(test_db_session, {(4, 4), (9, 9)})
+
+    # THEN
+    response = await client.post("/api/v1/robot/commands", json={"commands": "FFF"})
+    data = response.json()
+
+    assert (data["x"], data["y"]) == (4, 3)
+    assert data["stopped_by_obstacle"] is True
+    assert data["obstacle_coordinate"] == [4, 4]
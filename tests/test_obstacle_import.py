@@ -0,0 +1,154 @@
+import json
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.services.obstacle_import import ObstacleParseError, parse_obstacle_stream
+from app.services.obstacle_service import initialize_obstacles
+
+URL = "/api/v1/obstacles/bulk"
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def coordinates(db: AsyncSession) -> set[tuple[int, int]]:
+    return await ObstacleRepository(db).get_obstacle_coordinates()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+async def test_rows_split_across_chunks(size: int) -> None:
+    """GIVEN: a CSV body with a header, CRLF line ends and no final newline."""
+    data = b"x,y\r\n1,2\r\n-3, 4\n\n5,6\n7,8\n9,10"
+
+    # WHEN: streamed in chunks that cut rows in half, batched by 3
+    batches = [batch async for batch in parse_obstacle_stream(chunked(data, size), "csv", 3)]
+
+    # THEN
+    assert [len(batch) for batch in batches] == [3, 2]
+    assert np.concatenate(batches).tolist() == [[1, 2], [-3, 4], [5, 6], [7, 8], [9, 10]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "data, obstacle_format",
+    [
+        (b"1,2,3\n", "csv"),
+        (b"1,a\n", "csv"),
+        (b"1,4294967296\n", "csv"),
+        (b'{"x": 1}\n', "ndjson"),
+        (b"[1, 2.5]\n", "ndjson"),
+        (b"\x00" * 9, "binary"),
+    ],
+)
+async def test_malformed_bodies(data: bytes, obstacle_format: str) -> None:
+    with pytest.raises(ObstacleParseError):
+        async for _ in parse_obstacle_stream(chunked(data, 4), obstacle_format):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_csv(client: AsyncClient, test_db_session: AsyncSession) -> None:
+    """GIVEN: an existing obstacle, and a body repeating it plus a duplicate row."""
+    await ObstacleRepository(test_db_session).create_obstacle(3, 2)
+    body = b"x,y\n3,2\n0,0\n0,0\n-5,7\n"
+
+    # WHEN
+    response = await client.post(URL, content=body, headers={"content-type": "text/csv"})
+
+    # THEN: only new coordinates inserted
+    assert response.status_code == 200
+    assert response.json() == {"received": 4, "changed": 2}
+    assert await coordinates(test_db_session) == {(3, 2), (0, 0), (-5, 7)}
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_ndjson_and_binary(
+    client: AsyncClient, test_db_session: AsyncSession
+) -> None:
+    """GIVEN: obstacles as NDJSON (both row forms) and as int32 pairs."""
+    ndjson = b'{"x": 1, "y": 1}\n[2, 2]\n'
+    binary = np.array([[3, 3], [-4, -4]], dtype="<i4").tobytes()
+
+    # WHEN
+    first = await client.post(URL, content=ndjson, headers={"content-type": "application/x-ndjson"})
+    second = await client.post(
+        URL, content=binary, headers={"content-type": "application/octet-stream"}
+    )
+
+    # THEN
+    assert first.json() == {"received": 2, "changed": 2}
+    assert second.json() == {"received": 2, "changed": 2}
+    assert await coordinates(test_db_session) == {(1, 1), (2, 2), (3, 3), (-4, -4)}
+
+
+@pytest.mark.asyncio
+async def test_new_obstacles_block_the_robot(client: AsyncClient) -> None:
+    """GIVEN: robot at (4, 2, WEST) with a warm obstacle snapshot."""
+    await client.post("/api/v1/robot/commands", json={"commands": "L"})
+    await client.post("/api/v1/robot/commands", json={"commands": "R"})
+
+    # WHEN: an obstacle is bulk-loaded in its way
+    await client.post(URL, content=b"2,2\n", headers={"content-type": "text/csv"})
+    response = await client.post("/api/v1/robot/commands", json={"commands": "FFF"})
+
+    # THEN
+    assert response.json()["obstacle_coordinate"] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete(client: AsyncClient, test_db_session: AsyncSession) -> None:
+    """GIVEN: three obstacles."""
+    await client.post(URL, content=b"1,1\n2,2\n3,3\n", headers={"content-type": "text/csv"})
+
+    # WHEN: deleting two of them and one that does not exist
+    response = await client.request(
+        "DELETE", URL, content=b"1,1\n3,3\n9,9\n", headers={"content-type": "text/csv"}
+    )
+
+    # THEN
+    assert response.json() == {"received": 3, "changed": 2}
+    assert await coordinates(test_db_session) == {(2, 2)}
+
+
+@pytest.mark.asyncio
+async def test_bad_body_writes_nothing(
+    client: AsyncClient, test_db_session: AsyncSession, settings, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """GIVEN: small batches, so good rows are written before the bad one is parsed."""
+    monkeypatch.setattr(settings, "obstacle_batch_size", 2)
+    body = b"1,1\n2,2\n3,3\n4,4\noops\n"
+
+    # WHEN
+    response = await client.post(URL, content=body, headers={"content-type": "text/csv"})
+
+    # THEN: rejected as a whole
+    assert response.status_code == 422
+    assert await coordinates(test_db_session) == set()
+
+    response = await client.post(URL, content=body, headers={"content-type": "application/xml"})
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_startup_loads_map_file(
+    test_db_session: AsyncSession, settings, tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """GIVEN: a map file configured instead of the OBSTACLES string."""
+    path = tmp_path / "map.ndjson"
+    path.write_text("\n".join(json.dumps([x, -x]) for x in range(250)))
+    monkeypatch.setattr(settings, "obstacle_map_file", str(path))
+    monkeypatch.setattr(settings, "obstacle_batch_size", 100)
+
+    # WHEN
+    await initialize_obstacles(test_db_session)
+    await initialize_obstacles(test_db_session)  # restart: nothing new
+
+    # THEN
+    assert await coordinates(test_db_session) == {(x, -x) for x in range(250)}
@@ -0,0 +1,147 @@
+import asyncio
+import random
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.services.command_engine import ObstacleIndex, run_commands
+from app.services.obstacle_tiles import TileCache, tile_ranges, tiles_on_path
+from app.utils.enums import Direction
+
+
+def test_tiles_on_path() -> None:
+    """GIVEN: robot at (-1, 0) facing EAST on 4x4 tiles."""
+    # WHEN: it drives 5 east, turns left and drives 4 north
+    tiles = tiles_on_path("FFFFFLFFFF", -1, 0, Direction.EAST, 4)
+
+    # THEN: every tile of the free path, merged into one box per tile row
+    assert tiles == [(-1, 0), (0, 0), (1, 0), (1, 1)]
+    assert tile_ranges(tiles, 4) == [(-4, 7, 0, 3), (4, 7, 4, 7)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("seed", range(10))
+async def test_tiled_results_match_full_map(seed: int) -> None:
+    """GIVEN: a random map behind a loader that only answers range queries."""
+    rng = random.Random(seed)
+    cells = np.array(
+        [(rng.randint(-40, 40), rng.randint(-40, 40)) for _ in range(400)], dtype=np.int64
+    )
+    full = ObstacleIndex(cells)
+    queried: list[tuple[int, int, int, int]] = []
+
+    async def load(ranges: list[tuple[int, int, int, int]]) -> np.ndarray:
+        queried.extend(ranges)
+        mask = np.zeros(len(cells), dtype=bool)
+        for x_min, x_max, y_min, y_max in ranges:
+            mask |= (
+                (cells[:, 0] >= x_min)
+                & (cells[:, 0] <= x_max)
+                & (cells[:, 1] >= y_min)
+                & (cells[:, 1] <= y_max)
+            )
+        return cells[mask]
+
+    tiles = TileCache(tile_size=8, capacity=3)
+    x, y, direction = 0, 0, Direction.NORTH
+
+    # WHEN: a robot wanders for a while, tile by tile
+    for _ in range(60):
+        commands = "".join(rng.choice("FFFFBLR") for _ in range(rng.randint(1, 40)))
+        region = await tiles.get_index(load, commands, x, y, direction)
+        result = run_commands(commands, x, y, direction, region)
+
+        # THEN: same outcome as with every obstacle in memory
+        assert result == run_commands(commands, x, y, direction, full)
+        x, y, direction = result.x, result.y, result.direction
+
+    stats = tiles.stats()
+    assert stats["tiles"] <= 3
+    assert stats["evictions"] > 0
+    assert stats["misses"] == sum((x_max - x_min + 1) // 8 for x_min, x_max, _, _ in queried)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_regions_over_capacity() -> None:
+    """GIVEN: one obstacle per 4x4 tile and a cache holding fewer tiles than a region."""
+    cells = np.array([(x, 0) for x in range(0, 40, 4)], dtype=np.int64)
+
+    async def load(ranges: list[tuple[int, int, int, int]]) -> np.ndarray:
+        await asyncio.sleep(0)  # let the other requests run meanwhile
+        mask = np.zeros(len(cells), dtype=bool)
+        for x_min, x_max, _, _ in ranges:
+            mask |= (cells[:, 0] >= x_min) & (cells[:, 0] <= x_max)
+        return cells[mask]
+
+    tiles = TileCache(tile_size=4, capacity=2)
+
+    async def fetch(first_tile: int) -> list[tuple[int, int]]:
+        region = await tiles.get_box_index(load, first_tile * 4, 0, first_tile * 4 + 11, 3)
+        return sorted(region)
+
+    # WHEN: overlapping three-tile regions evict each other's tiles while loading
+    for _ in range(3):
+        regions = await asyncio.gather(*(fetch(first_tile) for first_tile in range(7)))
+
+        # THEN: each still sees the obstacles of all its tiles
+        for first_tile, found in enumerate(regions):
+            assert found == [(x, 0) for x in range(first_tile * 4, first_tile * 4 + 12, 4)]
+    assert tiles.stats()["tiles"] <= 2
+
+
+@pytest.mark.asyncio
+async def test_tiles_dropped_while_loading() -> None:
+    """GIVEN: a cached tile, and obstacles that change while the next tile loads."""
+    tiles = TileCache(tile_size=4, capacity=8)
+
+    async def load(ranges: list[tuple[int, int, int, int]]) -> np.ndarray:
+        return np.array([(x_min, 0) for x_min, _, _, _ in ranges], dtype=np.int64)
+
+    async def load_and_drop(ranges: list[tuple[int, int, int, int]]) -> np.ndarray:
+        tiles.clear()  # what a version bump does
+        return await load(ranges)
+
+    await tiles.get_box_index(load, 0, 0, 3, 3)
+
+    # WHEN
+    region = await tiles.get_box_index(load_and_drop, 0, 0, 7, 3)
+
+    # THEN: answered from what was read, none of it kept
+    assert sorted(region) == [(0, 0), (4, 0)]
+    assert tiles.stats()["tiles"] == 0
+
+
+@pytest.mark.asyncio
+async def test_tiled_loading_through_api(
+    client: AsyncClient, test_db_session: AsyncSession, settings, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """GIVEN: one obstacle near the robot at (4, 2, WEST) and many far away."""
+    monkeypatch.setattr(settings, "obstacle_loading", "tiled")
+    monkeypatch.setattr(settings, "obstacle_tile_size", 16)
+    repo = ObstacleRepository(test_db_session)
+    await repo.create_obstacle(2, 2)
+    await repo.bulk_create_obstacles({(10_000 + i, 0) for i in range(500)})
+
+    # WHEN
+    first = await client.post("/api/v1/robot/commands", json={"commands": "FFF"})
+    second = await client.post("/api/v1/robot/commands", json={"commands": "RFLB"})
+
+    # THEN: only the robot's tile was loaded, once
+    assert first.json()["obstacle_coordinate"] == [2, 2]
+    assert second.json()["stopped_by_obstacle"] is False
+    tiles = (await client.get("/api/v1/obstacles/cache")).json()["tiles"]
+    assert tiles["loads"] == 1
+    assert tiles["obstacles"] == 1
+    assert tiles["hits"] > 0
+
+    # WHEN: an obstacle is added right behind the robot, now at (4, 3, WEST)
+    await client.post(
+        "/api/v1/obstacles/bulk", content=b"5,3\n", headers={"content-type": "text/csv"}
+    )
+    response = await client.post("/api/v1/robot/commands", json={"commands": "B"})
+
+    # THEN: tiles were dropped and reloaded with it
+    assert response.json()["obstacle_coordinate"] == [5, 3]
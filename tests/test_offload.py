@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from app.services import simulation
+from app.services.command_engine import ObstacleIndex
+from app.services.simulation_pool import SimulationPool, simulation_pool
+from app.utils.enums import Direction
+
+OPTIONS = {"engine": "stepwise", "vectorized_min_commands": 300, "segmented_min_run_length": 24}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("executor", ["thread", "process"])
+async def test_health_stays_responsive_during_huge_command(
+    client: AsyncClient, settings, monkeypatch: pytest.MonkeyPatch, executor: str
+) -> None:
+    """GIVEN: a multi-megabyte command string on the slow stepwise engine."""
+    monkeypatch.setattr(settings, "command_engine", "stepwise")
+    monkeypatch.setattr(settings, "offload_executor", executor)
+    # in a thread the command waits for the test to let it finish; a process
+    # worker cannot be held, the stepwise engine takes seconds there instead
+    started, release = threading.Event(), threading.Event()
+    if executor == "process":
+        simulation_pool.start(workers=1)
+        # spawn the worker before the command is sent
+        await simulation_pool.run(["F"], 0, 0, Direction.NORTH, ObstacleIndex(), OPTIONS)
+        submitted = simulation_pool.tasks
+
+        def offloaded() -> bool:
+            return simulation_pool.tasks > submitted
+
+    else:
+        run = simulation.simulate
+
+        def held(*args):
+            started.set()
+            release.wait(timeout=10)
+            return run(*args)
+
+        monkeypatch.setattr(simulation, "simulate", held)
+        offloaded = started.is_set
+    commands = "FFRFFRFFRFFL" * 250_000
+
+    try:
+        # WHEN: /health is polled once the command is being simulated
+        task = asyncio.create_task(
+            client.post("/api/v1/robot/commands", json={"commands": commands})
+        )
+        while not offloaded() and not task.done():
+            await asyncio.sleep(0)
+        answered = 0
+        while not task.done() and answered < 5:
+            assert (await client.get("/api/v1/health")).status_code == 200
+            answered += 1
+        running_after_checks = not task.done()
+        release.set()
+        response = await task
+    finally:
+        release.set()
+        await simulation_pool.stop()
+
+    # THEN: the event loop answered every health check while the command ran
+    assert response.status_code == 200
+    assert answered == 5
+    assert running_after_checks
+
+
+@pytest.mark.asyncio
+async def test_snapshot_shipped_once_per_worker() -> None:
+    """GIVEN: a pool with one worker and one snapshot."""
+    pool = SimulationPool()
+    pool.start(workers=1)
+    obstacles = ObstacleIndex({(0, 3)})
+
+    try:
+        # WHEN: several batches over the same snapshot, then a new snapshot
+        for _ in range(3):
+            results = await pool.run(["FFFF", "RFF"], 0, 0, Direction.NORTH, obstacles, OPTIONS)
+        sent_before_change = pool.snapshots_sent
+        moved = await pool.run(["FFFF"], 0, 0, Direction.NORTH, ObstacleIndex(), OPTIONS)
+    finally:
+        await pool.stop()
+
+    # THEN: the first snapshot crossed once per chunk at most, the new one once more
+    assert results[0].obstacle_coordinate == (0, 3)
+    assert (results[1].x, results[1].y) == (2, 0)
+    assert sent_before_change <= 2
+    assert pool.snapshots_sent == sent_before_change + 1
+    assert pool.tasks == 3 * 2 + 1
+    assert (moved[0].x, moved[0].y) == (0, 4)
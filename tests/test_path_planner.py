@@ -0,0 +1,147 @@
+import random
+from collections import deque
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.services.command_engine import DELTAS, HEADINGS, ObstacleIndex, run_commands
+from app.services.path_planner import NoPathError, plan_path
+from app.utils.enums import Direction
+
+URL = "/api/v1/robot/plan"
+
+
+def bfs_length(obstacles: set, start: tuple, target: tuple, limit: int = 14):
+    """Fewest commands by breadth-first search over (x, y, heading), inside a box."""
+    seen = {start}
+    queue = deque([(start, 0)])
+    while queue:
+        (x, y, heading), length = queue.popleft()
+        if (x, y) == target:
+            return length
+        dx, dy = DELTAS[heading]
+        for nx, ny, nh in (
+            (x + dx, y + dy, heading),
+            (x - dx, y - dy, heading),
+            (x, y, (heading + 1) % 4),
+            (x, y, (heading - 1) % 4),
+        ):
+            state = (nx, ny, nh)
+            if (nx, ny) in obstacles or abs(nx) > limit or abs(ny) > limit or state in seen:
+                continue
+            seen.add(state)
+            queue.append((state, length + 1))
+    return None
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_plan_is_shortest_and_obstacle_free(seed: int) -> None:
+    """GIVEN: a random dense map and a random target."""
+    rng = random.Random(seed)
+    obstacles = {(rng.randint(-6, 6), rng.randint(-6, 6)) for _ in range(50)} - {(0, 0)}
+    target = (rng.randint(-6, 6), rng.randint(-6, 6))
+    obstacles.discard(target)
+    direction = rng.choice(list(Direction))
+    index = ObstacleIndex(obstacles)
+
+    # WHEN
+    expected = bfs_length(obstacles, (0, 0, HEADINGS.index(direction)), target)
+    if expected is None:
+        with pytest.raises(NoPathError):
+            plan_path(index, 0, 0, direction, *target, bounds=(-14, -14, 14, 14))
+        return
+    plan = plan_path(index, 0, 0, direction, *target)
+
+    # THEN: as short as breadth-first search finds, and it really gets there
+    assert len(plan.commands) == expected
+    result = run_commands(plan.commands, 0, 0, direction, index)
+    assert (result.x, result.y, result.stopped_by_obstacle) == (*target, False)
+
+
+def test_plan_with_target_direction() -> None:
+    """GIVEN: robot at (0, 0) facing NORTH, target (0, 3) facing SOUTH."""
+    plan = plan_path(ObstacleIndex(), 0, 0, Direction.NORTH, 0, 3, Direction.SOUTH)
+
+    # THEN: drive backwards after turning around, 2 turns + 3 moves
+    assert len(plan.commands) == 5
+    assert run_commands(plan.commands, 0, 0, Direction.NORTH, ObstacleIndex()).direction == (
+        Direction.SOUTH
+    )
+
+
+def test_search_limits() -> None:
+    """GIVEN: a target walled in on all four sides."""
+    walled = ObstacleIndex({(10, 11), (10, 9), (11, 10), (9, 10)})
+
+    # THEN
+    with pytest.raises(NoPathError, match="search nodes"):
+        plan_path(walled, 0, 0, Direction.NORTH, 10, 10, max_nodes=5000)
+    with pytest.raises(NoPathError, match="unreachable"):
+        plan_path(walled, 0, 0, Direction.NORTH, 10, 10, bounds=(-20, -20, 20, 20))
+    with pytest.raises(NoPathError, match="is an obstacle"):
+        plan_path(walled, 0, 0, Direction.NORTH, 10, 11)
+    with pytest.raises(NoPathError, match="within 0.0"):
+        plan_path(walled, 0, 0, Direction.NORTH, 10, 10, max_nodes=10**6, time_limit=0.0)
+
+
+@pytest.mark.asyncio
+async def test_plan_endpoint(client: AsyncClient, test_db_session: AsyncSession) -> None:
+    """GIVEN: robot at (4, 2, WEST) with an obstacle two cells ahead."""
+    await ObstacleRepository(test_db_session).create_obstacle(2, 2)
+
+    # WHEN
+    response = await client.post(URL, json={"x": 0, "y": 2})
+    again = await client.post(URL, json={"x": 0, "y": 2})
+
+    # THEN: a detour around the obstacle, cached the second time
+    plan = response.json()
+    assert response.status_code == 200
+    assert plan["start"] == {"x": 4, "y": 2, "direction": "WEST"}
+    assert plan["length"] == len(plan["commands"]) == 9  # 4 across, out and back, 3 turns
+    assert plan["cached"] is False
+    assert again.json()["cached"] is True
+
+    moved = await client.post("/api/v1/robot/commands", json={"commands": plan["commands"]})
+    assert moved.json()["x"] == 0 and moved.json()["y"] == 2
+    assert moved.json()["stopped_by_obstacle"] is False
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_follows_obstacle_version(client: AsyncClient) -> None:
+    """GIVEN: a cached plan straight ahead."""
+    first = (await client.post(URL, json={"x": 1, "y": 2})).json()
+    assert first["commands"] == "FFF"
+
+    # WHEN: an obstacle appears on the route
+    await client.post(
+        "/api/v1/obstacles/bulk", content=b"2,2\n", headers={"content-type": "text/csv"}
+    )
+    second = (await client.post(URL, json={"x": 1, "y": 2})).json()
+
+    # THEN: searched again
+    assert second["cached"] is False
+    assert second["commands"] != "FFF"
+
+
+@pytest.mark.asyncio
+async def test_plan_errors(
+    client: AsyncClient, test_db_session: AsyncSession, settings, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """GIVEN: a walled-in target, tiled loading and a small node budget."""
+    monkeypatch.setattr(settings, "obstacle_loading", "tiled")
+    monkeypatch.setattr(settings, "obstacle_tile_size", 8)
+    monkeypatch.setattr(settings, "plan_max_nodes", 20_000)
+    await ObstacleRepository(test_db_session).bulk_create_obstacles(
+        {(10, 11), (10, 9), (11, 10), (9, 10)}
+    )
+
+    # THEN
+    walled = await client.post(URL, json={"x": 10, "y": 10})
+    assert walled.status_code == 422
+    assert "unreachable" in walled.json()["detail"]
+    reachable = await client.post(URL, json={"x": 10, "y": 12, "direction": "SOUTH"})
+    assert reachable.status_code == 200
+    missing = await client.post("/api/v1/robots/999/plan", json={"x": 0, "y": 0})
+    assert missing.status_code == 404
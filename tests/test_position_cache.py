@@ -0,0 +1,75 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.services.position_cache import position_cache
+
+URL = "/api/v1/robot/position"
+
+
+@pytest.mark.asyncio
+async def test_conditional_get(client: AsyncClient) -> None:
+    """GIVEN: a first read of the position."""
+    first = await client.get(URL)
+    etag = first.headers["etag"]
+
+    # WHEN: polled again with the ETag
+    unchanged = await client.get(URL, headers={"If-None-Match": etag})
+
+    # THEN: 304 without a body
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["etag"] == etag
+
+    # WHEN: the robot moves
+    await client.post("/api/v1/robot/commands", json={"commands": "F"})
+    changed = await client.get(URL, headers={"If-None-Match": etag})
+
+    # THEN: full response with a newer ETag
+    assert changed.status_code == 200
+    assert changed.json() == {"x": 3, "y": 2, "direction": "WEST"}
+    assert changed.headers["etag"] != etag
+    assert (await client.get(URL, headers={"If-None-Match": "*"})).status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_reads_after_cold_start_skip_the_database(client: AsyncClient, test_engine) -> None:
+    """GIVEN: the position read once from the database (cold start)."""
+    assert (await client.get(URL)).status_code == 200
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        # WHEN
+        for _ in range(5):
+            assert (await client.get(URL)).json() == {"x": 4, "y": 2, "direction": "WEST"}
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+    # THEN
+    assert statements == []
+    assert position_cache.stats()["hits"] == 5
+
+
+@pytest.mark.asyncio
+async def test_every_write_path_updates_the_cache(client: AsyncClient) -> None:
+    """GIVEN: a robot created through the fleet API."""
+    robot = (
+        await client.post("/api/v1/robots", json={"x": 0, "y": 0, "direction": "NORTH"})
+    ).json()
+    url = f"/api/v1/robots/{robot['id']}/position"
+    etag = (await client.get(url)).headers["etag"]
+
+    # WHEN: moved by a fleet batch
+    await client.post(
+        "/api/v1/robots/commands", json={"items": [{"robot_id": robot["id"], "commands": "FF"}]}
+    )
+
+    # THEN
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == {"x": 0, "y": 2, "direction": "NORTH"}
+    assert (await client.get("/api/v1/robots/999/position")).status_code == 404
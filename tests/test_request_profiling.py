@@ -0,0 +1,74 @@
+import logging
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+
+
+def parse_server_timing(value: str) -> dict[str, float]:
+    metrics = {}
+    for entry in value.split(", "):
+        name, *params = entry.split(";")
+        metrics[name] = float(dict(param.split("=", 1) for param in params)["dur"])
+    return metrics
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(client: AsyncClient) -> None:
+    """GIVEN: the default robot."""
+    # WHEN
+    response = await client.post("/api/v1/robot/commands", json={"commands": "FF"})
+
+    # THEN: SQL and application time, in milliseconds
+    assert response.status_code == 200
+    header = response.headers["server-timing"]
+    assert 'desc="' in header
+    timing = parse_server_timing(header)
+    assert timing.keys() == {"db", "app"}
+    assert timing["db"] > 0 and timing["app"] > 0
+
+
+@pytest.mark.asyncio
+async def test_server_timing_disabled(client: AsyncClient, settings: Any, monkeypatch) -> None:
+    """GIVEN: SERVER_TIMING=false."""
+    monkeypatch.setattr(settings, "server_timing", False)
+
+    # WHEN
+    response = await client.get("/api/v1/robot/position")
+
+    # THEN
+    assert "server-timing" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_slow_request_logs_its_sql(
+    client: AsyncClient, settings: Any, monkeypatch, caplog
+) -> None:
+    """GIVEN: requests running more than one statement count as slow."""
+    monkeypatch.setattr(settings, "slow_request_statements", 1)
+
+    # WHEN
+    with caplog.at_level(logging.WARNING, logger="app.api.middleware"):
+        await client.post("/api/v1/robot/commands", json={"commands": "FF"})
+
+    # THEN: one warning listing every statement the request ran
+    [record] = [r for r in caplog.records if r.name == "app.api.middleware"]
+    message = record.getMessage()
+    assert message.startswith("Slow request: POST /api/v1/robot/commands 200")
+    assert "UPDATE robots SET" in message
+    assert "INSERT INTO command_history" in message
+
+
+@pytest.mark.asyncio
+async def test_fast_request_not_logged(
+    client: AsyncClient, settings: Any, monkeypatch, caplog
+) -> None:
+    """GIVEN: the statement check disabled and the default latency threshold."""
+    monkeypatch.setattr(settings, "slow_request_statements", 0)
+
+    # WHEN
+    with caplog.at_level(logging.WARNING, logger="app.api.middleware"):
+        await client.post("/api/v1/robot/commands", json={"commands": "FF"})
+
+    # THEN
+    assert not [r for r in caplog.records if r.name == "app.api.middleware"]
@@ -0,0 +1,228 @@
+import asyncio
+from collections.abc import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.middleware import server_timing
+from app.db.base import Base
+from app.db.instrumentation import RequestDbStats, request_db_stats
+from app.db.models.command_history import CommandHistory
+from app.db.session import get_db
+from app.main import app
+from app.repositories.robot_repository import RobotRepository
+from app.services.command_stream import CommandStream
+from app.services.robot_actor import robot_actors
+from app.services.robot_service import RobotService
+from app.utils.enums import Direction
+from tests.test_metrics import sample
+from tests.test_request_profiling import parse_server_timing
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
+    # a file database: every request and the actors get their own connection
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'actor.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def actors(session_factory) -> AsyncGenerator[None, None]:
+    robot_actors.start(session_factory, max_group=50)
+    yield
+    await robot_actors.stop()
+
+
+async def send(session_factory, commands: str):
+    async with session_factory() as db:
+        return await RobotService(db).execute_commands(commands)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_lose_no_updates(actors, session_factory) -> None:
+    """GIVEN: the default robot at (4, 2, WEST) and 200 concurrent requests."""
+    await send(session_factory, "L")  # create the robot, now facing SOUTH
+
+    # WHEN: every request moves one cell
+    await asyncio.gather(*(send(session_factory, "F") for _ in range(200)))
+
+    # THEN: all 200 moves applied, history chained, fewer commits than requests
+    async with session_factory() as db:
+        assert await RobotService(db).get_position() == (4, -198, Direction.SOUTH)
+        history = (await db.scalars(select(CommandHistory).order_by(CommandHistory.id))).all()
+
+    assert len(history) == 201
+    for previous, row in zip(history, history[1:]):
+        assert (row.initial_x, row.initial_y) == (previous.final_x, previous.final_y)
+    stats = robot_actors.stats()
+    assert stats["requests"] == 201
+    assert stats["groups"] < stats["requests"]
+
+
+@pytest.mark.asyncio
+async def test_fleet_and_stream_share_the_actor(actors, session_factory) -> None:
+    """GIVEN: command requests, fleet batches and a command stream on the same robot."""
+    await send(session_factory, "L")  # create the robot, now facing SOUTH
+
+    async def fleet() -> None:
+        async with session_factory() as db:
+            await RobotService(db).execute_fleet([(1, "F"), (1, "FF")])
+
+    async def stream() -> None:
+        async with session_factory() as db:
+            command_stream = CommandStream(db, 1)
+            await command_stream.open()
+            for _ in range(10):
+                await command_stream.execute("F")
+            await command_stream.close()
+
+    # WHEN: 20 + 10 * 3 + 10 moves race each other
+    await asyncio.gather(
+        *(send(session_factory, "F") for _ in range(20)), *(fleet() for _ in range(10)), stream()
+    )
+
+    # THEN: none of them is lost
+    async with session_factory() as db:
+        assert await RobotService(db).get_position() == (4, -58, Direction.SOUTH)
+        history = (await db.scalars(select(CommandHistory))).all()
+    assert len(history) == 1 + 20 + 20 + 10
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks_reach_the_actor_in_batches(
+    actors, session_factory, settings, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """GIVEN: a command stream persisting every 5 chunks."""
+    monkeypatch.setattr(settings, "ws_persist_every", 5)
+    monkeypatch.setattr(settings, "ws_persist_interval", 3600)
+
+    # WHEN: 22 chunks, then the stream closes
+    async with session_factory() as db:
+        command_stream = CommandStream(db)
+        await command_stream.open()
+        for _ in range(22):
+            await command_stream.execute("F")
+        await command_stream.close()
+
+    # THEN: every chunk applied, in one actor commit per flush
+    async with session_factory() as db:
+        assert await RobotService(db).get_position() == (-18, 2, Direction.WEST)
+        history = (await db.scalars(select(CommandHistory))).all()
+    assert len(history) == 22
+    assert robot_actors.stats()["groups"] == 5
+
+
+@pytest.mark.asyncio
+async def test_actor_sql_is_not_counted_on_other_requests(actors, session_factory) -> None:
+    """GIVEN: SQL counted per request, as RequestStatsMiddleware does."""
+
+    async def request(commands: str) -> RequestDbStats:
+        # a task of its own, so a context of its own
+        stats = RequestDbStats()
+        request_db_stats.set(stats)
+        await send(session_factory, commands)
+        return stats
+
+    first = await asyncio.create_task(request("L"))  # creates the robot and its actor
+    own_statements = first.statements
+
+    # WHEN
+    later = await asyncio.gather(*(asyncio.create_task(request("F")) for _ in range(5)))
+
+    # THEN: the first request's stats stopped with it; the others see their own
+    # SQL plus the actor's group they waited on, shown apart in Server-Timing
+    assert first.statements == own_statements
+    assert first.actor_statements > 0
+    for stats in later:
+        assert 0 < stats.statements <= own_statements
+        assert stats.actor_statements > 0
+        assert "actor;dur=" in server_timing(stats, 1.0)
+
+
+@pytest.mark.asyncio
+async def test_request_histograms_observe_own_sql(actors, session_factory) -> None:
+    """GIVEN: the app with robot actors running and a robot with no actor yet."""
+    async with session_factory() as db:
+        await RobotRepository(db).create_robot(0, 0, Direction.NORTH)
+        await db.commit()
+
+    async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # WHEN: concurrent command requests, grouped by the actor
+            responses = await asyncio.gather(
+                *(client.post("/api/v1/robot/commands", json={"commands": "F"}) for _ in range(10))
+            )
+            metrics = (await client.get("/metrics")).text
+    finally:
+        app.dependency_overrides.clear()
+
+    # THEN: every request ran the same SQL of its own, and that is what the
+    # histogram saw; the actor's groups are reported apart
+    statements = [int(r.headers["server-timing"].split('"')[1].split()[0]) for r in responses]
+    assert len(set(statements)) == 1
+    assert all("actor" in parse_server_timing(r.headers["server-timing"]) for r in responses)
+    route = 'route="/api/v1/robot/commands"'
+    assert sample(metrics, f"db_statements_per_request_count{{{route}}}") == 10
+    assert sample(metrics, f"db_statements_per_request_sum{{{route}}}") == sum(statements)
+
+
+@pytest.mark.asyncio
+async def test_each_caller_gets_its_own_result(actors, session_factory) -> None:
+    """GIVEN: requests queued for the same robot at once."""
+    await send(session_factory, "")
+
+    # WHEN
+    answers = await asyncio.gather(
+        robot_actors.execute(1, "F"), robot_actors.execute(1, "L"), robot_actors.execute(1, "F")
+    )
+
+    # THEN: applied in queue order, each answered with its own start pose and result
+    (first_start, first), (second_start, second), (third_start, third) = answers
+    assert (first_start, second_start, third_start) == (
+        (4, 2, Direction.WEST),
+        (3, 2, Direction.WEST),
+        (3, 2, Direction.SOUTH),
+    )
+    assert (first.x, first.y, first.direction) == (3, 2, Direction.WEST)
+    assert (second.x, second.y, second.direction) == (3, 2, Direction.SOUTH)
+    assert (third.x, third.y, third.direction) == (3, 1, Direction.SOUTH)
+    assert robot_actors.stats()["groups"] == 2  # plus the request creating the robot
+
+
+@pytest.mark.asyncio
+async def test_failed_group_fails_every_caller(actors) -> None:
+    """GIVEN: an actor for a robot that does not exist."""
+    # WHEN / THEN
+    results = await asyncio.gather(
+        robot_actors.execute(999, "F"), robot_actors.execute(999, "L"), return_exceptions=True
+    )
+    assert all(isinstance(result, LookupError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_stop_finishes_queued_requests(session_factory) -> None:
+    """GIVEN: requests still queued when the actors stop."""
+    robot_actors.start(session_factory)
+    await send(session_factory, "")
+    pending = [asyncio.create_task(robot_actors.execute(1, "F")) for _ in range(10)]
+    await asyncio.sleep(0)  # queued, not yet applied
+
+    # WHEN
+    await robot_actors.stop()
+
+    # THEN
+    assert not robot_actors.running
+    assert all(task.done() for task in pending)
+    async with session_factory() as db:
+        assert await RobotService(db).get_position() == (-6, 2, Direction.WEST)
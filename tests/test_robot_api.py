@@ -1,5 +1,10 @@
+import hashlib
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.obstacle_repository import ObstacleRepository
 
 
 @pytest.mark.asyncio
@@ -105,3 +110,47 @@ async def test_execute_all_command_types(client: AsyncClient) -> None:
     assert "x" in data
     assert "y" in data
     assert "direction" in data
+
+
+@pytest.mark.asyncio
+async def test_compact_response(client: AsyncClient, test_db_session: AsyncSession) -> None:
+    """GIVEN: an obstacle two cells west of the robot."""
+    await ObstacleRepository(test_db_session).create_obstacle(2, 2)
+
+    # WHEN
+    response = await client.post("/api/v1/robot/commands?compact=true", json={"commands": "FFLR"})
+
+    # THEN: how far the commands got instead of the commands themselves
+    assert response.status_code == 200
+    assert response.json() == {
+        "x": 3,
+        "y": 2,
+        "direction": "WEST",
+        "commands_length": 4,
+        "commands_sha256": hashlib.sha256(b"FFLR").hexdigest(),
+        "steps_executed": 1,
+        "stopped_by_obstacle": True,
+        "obstacle_coordinate": [2, 2],
+    }
+
+
+@pytest.mark.asyncio
+async def test_compact_by_default_for_long_strings(
+    client: AsyncClient, settings, monkeypatch
+) -> None:
+    """GIVEN: strings of 4 or more commands answered compactly."""
+    monkeypatch.setattr(settings, "compact_response_min_commands", 4)
+
+    # WHEN
+    short = await client.post("/api/v1/robot/commands", json={"commands": "LRL"})
+    long = await client.post(
+        "/api/v1/robots/1/commands", content=b"RRLL", headers={"content-type": "text/plain"}
+    )
+    echoed = await client.post("/api/v1/robot/commands?compact=false", json={"commands": "RRLL"})
+
+    # THEN
+    assert short.json()["commands_executed"] == "LRL"
+    assert long.json()["commands_length"] == 4
+    assert long.json()["steps_executed"] == 4
+    assert "commands_executed" not in long.json()
+    assert echoed.json()["commands_executed"] == "RRLL"
@@ -1,6 +1,9 @@
 import pytest
+from pydantic import ValidationError
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import Settings
 from app.services.robot_service import RobotService
 from app.utils.enums import Direction
 
@@ -139,3 +142,73 @@ async def test_execute_only_rotations(test_db_session: AsyncSession) -> None:
     assert direction == Direction.WEST
     assert stopped is False
     assert obstacle is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "mode, expected",
+    [
+        # Core UPDATE, Core INSERT
+        ("core", ["SELECT", "UPDATE", "INSERT"]),
+        # UPDATE RETURNING, INSERT RETURNING
+        ("single_commit", ["SELECT", "UPDATE", "INSERT"]),
+        # UPDATE, refresh SELECT, INSERT, refresh SELECT
+        ("per_statement", ["SELECT", "UPDATE", "SELECT", "INSERT", "SELECT"]),
+    ],
+)
+async def test_persistence_modes(
+    test_db_session: AsyncSession, test_engine, settings, monkeypatch, mode, expected
+) -> None:
+    """GIVEN: a robot and a warm obstacle snapshot."""
+    monkeypatch.setattr(settings, "persistence_mode", mode)
+    service = RobotService(test_db_session)
+    await service.execute_commands("F")
+
+    statements: list[str] = []
+    commits: list[bool] = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement.split()[0])
+
+    def on_commit(conn) -> None:
+        commits.append(True)
+
+    # WHEN
+    event.listen(test_engine.sync_engine, "before_cursor_execute", on_execute)
+    event.listen(test_db_session.sync_session, "after_commit", on_commit)
+    try:
+        x, y, direction, stopped, obstacle = await service.execute_commands("F")
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", on_execute)
+        event.remove(test_db_session.sync_session, "after_commit", on_commit)
+
+    # THEN: same result, core and single_commit need one commit and no refresh SELECTs
+    assert (x, y, direction) == (2, 2, Direction.WEST)
+    assert statements == expected
+    assert len(commits) == (2 if mode == "per_statement" else 1)
+    assert await service.get_position() == (2, 2, Direction.WEST)
+
+
+@pytest.mark.asyncio
+async def test_core_mode_builds_no_orm_objects(test_db_session: AsyncSession) -> None:
+    """GIVEN: an existing robot and an empty session."""
+    service = RobotService(test_db_session)
+    await service.execute_commands("F")
+    test_db_session.expunge_all()
+
+    # WHEN
+    result = await service.execute_commands("FRF")
+
+    # THEN: the command ran and nothing was loaded into the identity map
+    assert result[:3] == (2, 3, Direction.NORTH)
+    assert len(test_db_session.identity_map) == 0
+    assert await service.get_position() == (2, 3, Direction.NORTH)
+
+
+def test_persistence_mode_needs_direct_execution() -> None:
+    """GIVEN: a persistence mode the robot actors do not use."""
+    # WHEN / THEN: refused with actors, accepted with direct execution
+    with pytest.raises(ValidationError, match="COMMAND_EXECUTION=direct"):
+        Settings(persistence_mode="per_statement", command_execution="actor")
+    settings = Settings(persistence_mode="single_commit", command_execution="direct")
+    assert settings.persistence_mode == "single_commit"
@@ -0,0 +1,130 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import Headers
+
+from app.api import serialization
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.schemas.robot_schema import (
+    CommandHistoryItem,
+    CommandHistoryPage,
+    CommandResponse,
+    CompactCommandResponse,
+    FleetCommandResponse,
+    PositionResponse,
+    SimulateResponse,
+)
+
+
+@pytest.mark.asyncio
+async def test_payloads_match_response_models(
+    client: AsyncClient, test_db_session: AsyncSession
+) -> None:
+    """GIVEN: an obstacle in the way, so every optional field is filled somewhere."""
+    await ObstacleRepository(test_db_session).create_obstacle(0, 3)
+    created = await client.post("/api/v1/robots", json={"x": 0, "y": 0, "direction": "NORTH"})
+    robot_id = created.json()["id"]
+
+    # WHEN
+    responses = {
+        CommandResponse: await client.post("/api/v1/robot/commands", json={"commands": "FFFF"}),
+        CompactCommandResponse: await client.post(
+            "/api/v1/robot/commands?compact=true", json={"commands": "FRR"}
+        ),
+        PositionResponse: await client.get("/api/v1/robot/position"),
+        FleetCommandResponse: await client.post(
+            "/api/v1/robots/commands", json={"items": [{"robot_id": robot_id, "commands": "FR"}]}
+        ),
+        SimulateResponse: await client.post(
+            "/api/v1/robot/simulate", json={"candidates": ["F", "RRFF"]}
+        ),
+        CommandHistoryPage: await client.get("/api/v1/robot/history"),
+    }
+
+    # THEN: each body is exactly what the model would have produced
+    for model, response in responses.items():
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        body = response.json()
+        assert model.model_validate(body).model_dump(mode="json") == body
+    item = responses[CommandHistoryPage].json()["items"][0]
+    assert item.keys() == CommandHistoryItem.model_fields.keys()
+    assert responses[CommandResponse].json()["obstacle_coordinate"] == [0, 3]
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, False),
+        ("application/json", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack, application/json;q=0.5", True),
+        ("application/json, application/msgpack;q=0.9", False),
+        ("application/msgpack;q=0, */*", False),
+        ("*/*;q=0.1, application/vnd.msgpack", True),
+    ],
+)
+def test_accept_negotiation(monkeypatch, accept: str, expected: bool) -> None:
+    """GIVEN: msgpack available on the server."""
+    monkeypatch.setattr(serialization, "msgpack", object())
+    headers = Headers({"accept": accept} if accept else {})
+
+    # WHEN / THEN
+    assert serialization.wants_msgpack(headers) is expected
+
+
+@pytest.mark.asyncio
+async def test_without_msgpack(client: AsyncClient, monkeypatch) -> None:
+    """GIVEN: a server without the msgpack package."""
+    monkeypatch.setattr(serialization, "msgpack", None)
+
+    # WHEN
+    body = await client.post(
+        "/api/v1/robot/commands",
+        content=b"\x81\xa8commands\xa2FF",
+        headers={"content-type": "application/msgpack"},
+    )
+    position = await client.get("/api/v1/robot/position", headers={"accept": "application/msgpack"})
+
+    # THEN: MessagePack bodies are refused, MessagePack clients get JSON
+    assert body.status_code == 415
+    assert position.status_code == 200
+    assert position.headers["content-type"] == "application/json"
+    assert "Accept" in position.headers["vary"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_body(client: AsyncClient) -> None:
+    """GIVEN: a body that is not JSON."""
+    # WHEN
+    response = await client.post(
+        "/api/v1/robot/commands", content=b"{nope", headers={"content-type": "application/json"}
+    )
+
+    # THEN: the usual validation error
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+@pytest.mark.asyncio
+async def test_msgpack_round_trip(client: AsyncClient) -> None:
+    """GIVEN: a MessagePack client."""
+    msgpack = pytest.importorskip("msgpack")
+    headers = {"content-type": "application/msgpack", "accept": "application/msgpack"}
+
+    # WHEN
+    response = await client.post(
+        "/api/v1/robot/commands", content=msgpack.packb({"commands": "FF"}), headers=headers
+    )
+    position = await client.get("/api/v1/robot/position", headers=headers)
+    json_position = await client.get("/api/v1/robot/position")
+    invalid = await client.post(
+        "/api/v1/robot/commands", content=msgpack.packb({"commands": "FX"}), headers=headers
+    )
+
+    # THEN
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["x"] == 2
+    assert msgpack.unpackb(position.content) == {"x": 2, "y": 2, "direction": "WEST"}
+    assert position.headers["etag"] != json_position.headers["etag"]
+    assert invalid.status_code == 422
@@ -0,0 +1,126 @@
+import random
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.command_history import CommandHistory
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.services.command_engine import ObstacleIndex, run_commands
+from app.services.simulation_pool import simulation_pool, split_by_length
+from app.utils.enums import Direction
+
+URL = "/api/v1/robot/simulate"
+
+
+@pytest_asyncio.fixture
+async def pool():
+    simulation_pool.start(workers=2)
+    yield simulation_pool
+    await simulation_pool.stop()
+
+
+def random_candidates(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choices("FFFBLR", k=rng.randint(1, 40))) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_simulate_does_not_move_the_robot(
+    client: AsyncClient, test_db_session: AsyncSession
+) -> None:
+    """GIVEN: robot at (4, 2, WEST) with an obstacle at (2, 2)."""
+    await ObstacleRepository(test_db_session).create_obstacle(2, 2)
+
+    # WHEN
+    response = await client.post(URL, json={"candidates": ["F", "FF", "RFF", "LLFF"]})
+
+    # THEN: each candidate runs from the same start, nothing is written
+    assert response.status_code == 200
+    body = response.json()
+    assert body["start"] == {"x": 4, "y": 2, "direction": "WEST"}
+    assert [(r["x"], r["y"], r["direction"]) for r in body["results"]] == [
+        (3, 2, "WEST"),
+        (3, 2, "WEST"),
+        (4, 4, "NORTH"),
+        (6, 2, "EAST"),
+    ]
+    assert body["results"][1]["stopped_by_obstacle"] is True
+    assert body["results"][1]["obstacle_coordinate"] == [2, 2]
+
+    position = (await client.get("/api/v1/robot/position")).json()
+    assert position == {"x": 4, "y": 2, "direction": "WEST"}
+    assert await test_db_session.scalar(select(func.count()).select_from(CommandHistory)) == 0
+
+
+@pytest.mark.asyncio
+async def test_simulate_from_given_pose(client: AsyncClient, settings, monkeypatch) -> None:
+    """GIVEN: an explicit start pose, with tiled obstacle loading."""
+    monkeypatch.setattr(settings, "obstacle_loading", "tiled")
+    monkeypatch.setattr(settings, "obstacle_tile_size", 4)
+    await client.post(
+        "/api/v1/obstacles/bulk", content=b"0,5\n9,0\n", headers={"content-type": "text/csv"}
+    )
+
+    # WHEN
+    response = await client.post(
+        URL, json={"candidates": ["FFFFFF", "RFFFFFFFFFFF"], "x": 0, "y": 0, "direction": "NORTH"}
+    )
+
+    # THEN: both obstacles are found, in tiles only one candidate reaches each
+    results = response.json()["results"]
+    assert response.json()["start"] == {"x": 0, "y": 0, "direction": "NORTH"}
+    assert results[0]["obstacle_coordinate"] == [0, 5]
+    assert results[1]["obstacle_coordinate"] == [9, 0]
+
+
+@pytest.mark.asyncio
+async def test_simulate_validation(client: AsyncClient) -> None:
+    """GIVEN: a partial pose, a bad command and an empty batch."""
+    # THEN
+    assert (await client.post(URL, json={"candidates": ["F"], "x": 1})).status_code == 422
+    assert (await client.post(URL, json={"candidates": ["F", "FX"]})).status_code == 422
+    assert (await client.post(URL, json={"candidates": []})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_serial(client: AsyncClient, pool, settings, monkeypatch) -> None:
+    """GIVEN: a running process pool that takes every batch."""
+    monkeypatch.setattr(settings, "simulation_pool_min_commands", 1)
+    await client.post(
+        "/api/v1/obstacles/bulk",
+        content="".join(f"{x},{y}\n" for x, y in [(1, 4), (3, 5), (7, 4), (4, 6), (0, 0)]).encode(),
+        headers={"content-type": "text/csv"},
+    )
+    candidates = random_candidates(500)
+
+    # WHEN
+    response = await client.post(URL, json={"candidates": candidates})
+
+    # THEN: the same results as running each candidate here, in order
+    assert response.status_code == 200
+    assert pool.tasks == 4  # 2 chunks per worker
+    index = ObstacleIndex({(1, 4), (3, 5), (7, 4), (4, 6), (0, 0)})
+    for commands, result in zip(candidates, response.json()["results"]):
+        expected = run_commands(commands, 4, 2, Direction.WEST, index)
+        assert (result["x"], result["y"], result["direction"]) == (
+            expected.x,
+            expected.y,
+            expected.direction.value,
+        )
+        assert result["stopped_by_obstacle"] == expected.stopped_by_obstacle
+
+
+def test_split_by_length() -> None:
+    """GIVEN: candidates of very different lengths."""
+    candidates = ["F" * 100, "F", "F", "F" * 50, "F" * 50] + ["F"] * 3
+
+    # WHEN
+    chunks = split_by_length(candidates, 3)
+
+    # THEN: contiguous, nothing lost, none empty
+    assert [c for chunk in chunks for c in chunk] == candidates
+    assert all(chunks)
+    assert split_by_length(["F"], 8) == [["F"]]
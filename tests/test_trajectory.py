@@ -0,0 +1,125 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.services import robot_service
+from app.services.command_engine import ObstacleIndex
+from app.services.trajectory import encode_path
+
+
+def decode_path(path: dict) -> list[tuple[int, int]]:
+    """Visited cells from an encoded path, as a client would decode it."""
+    if path["format"] == "json":
+        return [tuple(cell) for cell in path["data"]]
+
+    if path["format"] == "base64":
+        deltas = np.frombuffer(base64.b64decode(path["data"]), dtype=np.int8)
+    else:
+        deltas = np.array(path["data"], dtype=np.int8)
+    cells = np.cumsum(deltas.reshape(-1, 2).astype(np.int64), axis=0) + path["start"]
+    return [tuple(cell) for cell in cells.tolist()]
+
+
+@pytest.mark.parametrize("path_format", ["delta", "base64", "json"])
+def test_encoding_is_independent_of_chunking(path_format: str) -> None:
+    """GIVEN: the same path split into chunks of different sizes."""
+    rng = np.random.default_rng(0)
+    steps = rng.choice([[1, 0], [-1, 0], [0, 1], [0, -1]], size=1000)
+    cells = np.cumsum(steps, axis=0) + [3, -2]
+
+    # WHEN
+    whole = b"".join(encode_path(path_format, (3, -2), [cells]))
+    chunked = b"".join(
+        encode_path(path_format, (3, -2), np.array_split(cells, [1, 5, 6, 500, 998]))
+    )
+
+    # THEN
+    assert whole == chunked
+    assert decode_path(json.loads(whole)) == [tuple(cell) for cell in cells.tolist()]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path_format", ["delta", "base64", "json"])
+async def test_commands_with_path(client: AsyncClient, path_format: str) -> None:
+    """GIVEN: robot at (4, 2, WEST)."""
+    # WHEN
+    response = await client.post(
+        "/api/v1/robot/commands",
+        params={"include_path": True, "path_format": path_format},
+        json={"commands": "FLFRFFF"},
+    )
+
+    # THEN: the usual fields plus one cell per move, turns visit none
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["x"], body["y"], body["direction"]) == (0, 1, "WEST")
+    assert body["path"]["format"] == path_format
+    assert body["path"]["start"] == [4, 2]
+    assert decode_path(body["path"]) == [(3, 2), (3, 1), (2, 1), (1, 1), (0, 1)]
+
+
+@pytest.mark.asyncio
+async def test_path_stops_at_obstacle(client: AsyncClient, test_db_session: AsyncSession) -> None:
+    """GIVEN: an obstacle two cells west of the robot."""
+    await ObstacleRepository(test_db_session).create_obstacle(2, 2)
+
+    # WHEN
+    response = await client.post(
+        "/api/v1/robot/commands", params={"include_path": True}, json={"commands": "FFFF"}
+    )
+
+    # THEN
+    body = response.json()
+    assert body["stopped_by_obstacle"] is True
+    assert decode_path(body["path"]) == [(3, 2)]
+
+
+@pytest.mark.asyncio
+async def test_path_ignores_later_obstacles(client: AsyncClient, monkeypatch) -> None:
+    """GIVEN: an obstacle added in the robot's way right after its commands ran."""
+    snapshots = iter([ObstacleIndex(), ObstacleIndex(np.array([[2, 2]]))])
+
+    async def get_obstacles(*args) -> ObstacleIndex:
+        return next(snapshots)
+
+    monkeypatch.setattr(robot_service, "get_obstacles", get_obstacles)
+
+    # WHEN
+    response = await client.post(
+        "/api/v1/robot/commands", params={"include_path": True}, json={"commands": "FFFF"}
+    )
+
+    # THEN: the path is the one the robot took
+    body = response.json()
+    assert (body["x"], body["stopped_by_obstacle"]) == (0, False)
+    assert decode_path(body["path"]) == [(3, 2), (2, 2), (1, 2), (0, 2)]
+
+
+@pytest.mark.asyncio
+async def test_path_is_opt_in(client: AsyncClient) -> None:
+    """GIVEN: a plain command request."""
+    response = await client.post("/api/v1/robot/commands", json={"commands": "FF"})
+
+    # THEN
+    assert "path" not in response.json()
+
+
+@pytest.mark.asyncio
+async def test_path_for_fleet_robot(client: AsyncClient) -> None:
+    """GIVEN: a second robot."""
+    robot = (await client.post("/api/v1/robots", json={"x": 0, "y": 0, "direction": "EAST"})).json()
+    url = f"/api/v1/robots/{robot['id']}/commands"
+
+    # WHEN
+    response = await client.post(url, params={"include_path": True}, json={"commands": "FFLF"})
+
+    # THEN
+    assert decode_path(response.json()["path"]) == [(1, 0), (2, 0), (2, 1)]
+    missing = "/api/v1/robots/999/commands"
+    response = await client.post(missing, params={"include_path": True}, json={"commands": "F"})
+    assert response.status_code == 404